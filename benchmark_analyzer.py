@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+메시지 분석기 마이크로 벤치마크
+
+기존 analyze_message_content(메시지마다 패턴 컴파일)와 peanut.utils.analyzer의
+사전 컴파일/배치/프로세스 풀 분석을 같은 메시지로 실행해 초당 처리 메시지 수를 비교하고,
+두 구현의 분석 결과가 같은지 확인합니다.
+
+사용법:
+    python benchmark_analyzer.py [--count 20000] [--db db/discord_messages.db]
+"""
+
+import re
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Dict, Any
+
+# 프로젝트 경로 추가
+sys.path.append(str(Path(__file__).parent))
+
+from peanut.utils.analyzer import ContentAnalyzer, analyze_batch
+
+def legacy_analyze(content: str) -> Dict[str, Any]:
+    """기존 MessageCollector.analyze_message_content 구현 (비교 기준)
+
+    메시지마다 패턴을 다시 컴파일하고 이벤트 루프에서 바로 실행하던 방식입니다.
+
+    Args:
+        content: 메시지 내용
+
+    Returns:
+        분석 결과 딕셔너리
+    """
+    if not content:
+        return {
+            'topics': [],
+            'sections': [],
+            'markdown_used': [],
+            'message_type': 'unknown',
+            'content_structure': []
+        }
+
+    # 분석 결과 초기화
+    analysis = {
+        'topics': [],           # 주제 목록
+        'sections': [],         # 섹션 구분 (여러 주제가 있는 경우)
+        'markdown_used': [],    # 사용된 마크다운
+        'message_type': 'text', # 메시지 유형 (text, code, question, explanation)
+        'content_structure': [] # 콘텐츠 구조 (sections, paragraphs 등)
+    }
+
+    # 마크다운 분석
+    markdown_patterns = {
+        'code_block': re.compile(r'```(?:\w+)?\n(.+?)\n```', re.DOTALL),
+        'inline_code': re.compile(r'`([^`]+)`'),
+        'bold': re.compile(r'\*\*(.+?)\*\*'),
+        'italic': re.compile(r'\*(.+?)\*'),
+        'heading': re.compile(r'^#{1,6}\s+(.+?)$', re.MULTILINE),
+        'bullet_list': re.compile(r'^\s*[\*\-\+]\s+(.+?)$', re.MULTILINE),
+        'numbered_list': re.compile(r'^\s*\d+\.\s+(.+?)$', re.MULTILINE),
+        'blockquote': re.compile(r'^\s*>\s+(.+?)$', re.MULTILINE),
+        'link': re.compile(r'\[(.+?)\]\((.+?)\)')
+    }
+
+    for md_type, pattern in markdown_patterns.items():
+        if pattern.search(content):
+            analysis['markdown_used'].append(md_type)
+
+    # 코드 블록이 많으면 코드 유형으로 판단
+    if 'code_block' in analysis['markdown_used'] and len(re.findall(r'```', content)) >= 2:
+        analysis['message_type'] = 'code'
+
+    # 질문 패턴 분석
+    question_patterns = [r'\?$', r'어떻게', r'무엇', r'언제', r'어디', r'누구', r'왜', r'질문', r'알려줘', r'알고 싶어']
+    for pattern in question_patterns:
+        if re.search(pattern, content):
+            analysis['message_type'] = 'question'
+            break
+
+    # 설명 패턴 분석
+    explanation_patterns = [r'설명', r'방법', r'다음과 같이', r'다음과 같은', r'입니다', r'됩니다', r'~입니다', r'~됩니다']
+    if analysis['message_type'] != 'question':  # 이미 질문으로 분류되지 않았다면
+        for pattern in explanation_patterns:
+            if re.search(pattern, content):
+                analysis['message_type'] = 'explanation'
+                break
+
+    # 콘텐츠 구조 분석
+
+    # 1. 헤더 기반 구조 분석
+    header_sections = re.split(r'^#{1,6}\s+(.+?)$', content, flags=re.MULTILINE)
+    if len(header_sections) > 2:  # 헤더가 있으면
+        sections = [s.strip() for s in header_sections if s.strip()]
+        analysis['content_structure'].append('headers')
+
+    # 2. 줄바꿈 기반 단락 분석
+    paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+    if len(paragraphs) > 1:
+        analysis['content_structure'].append('paragraphs')
+
+    # 3. 목록 구조 분석
+    if re.search(r'^\s*[\*\-\+]\s+(.+?)$', content, re.MULTILINE) or re.search(r'^\s*\d+\.\s+(.+?)$', content, re.MULTILINE):
+        analysis['content_structure'].append('lists')
+
+    # 주제 추출 및 섹션 분석 (개선된 알고리즘)
+    # 1. 빈 줄로 구분된 섹션 식별
+    sections = []
+    current_section = {"title": "", "content": "", "subtopics": []}
+
+    # 빈 줄 기준으로 섹션 분리 (기본 분리)
+    raw_sections = re.split(r'\n\s*\n', content)
+    if len(raw_sections) > 1:
+        analysis['content_structure'].append('multi_section')
+
+    # 2. 주제와 제목 패턴 인식
+    title_patterns = [
+        # 제목 다음 개행
+        (r'^([^\n:]+)[\s]*\n', 1),
+        # 물음표로 끝나는 문장
+        (r'^([^\n]+\?)[\s]*\n', 1),
+        # 콜론으로 구분된 형태 (제목: 내용)
+        (r'^([^:]+):(.+)$', 1)
+    ]
+
+    # 섹션 분석
+    for i, section_text in enumerate(raw_sections):
+        if not section_text.strip():
+            continue
+
+        section = {"content": section_text.strip(), "subtopics": [], "title": ""}
+
+        # 첫 줄이나 패턴에서 섹션 제목 추출
+        lines = section_text.strip().split('\n')
+        potential_title = lines[0].strip() if lines else ""
+
+        # 제목 패턴 검출
+        is_title_found = False
+        for pattern, group in title_patterns:
+            title_match = re.match(pattern, section_text, re.MULTILINE)
+            if title_match:
+                potential_title = title_match.group(group).strip()
+                is_title_found = True
+                break
+
+        # 제목이 특별한 패턴을 가진 경우
+        if potential_title.endswith('?') or len(potential_title) < 50:
+            section["title"] = potential_title
+            analysis['topics'].append(potential_title)
+
+        # 하위 주제 추출 (콜론으로 구분된 경우)
+        subtopic_pattern = re.findall(r'^([^:]+):\s*(.+)$', section_text, re.MULTILINE)
+        for topic, _ in subtopic_pattern:
+            topic = topic.strip()
+            if topic and topic != section["title"] and len(topic) < 50:
+                section["subtopics"].append(topic)
+                analysis['topics'].append(topic)
+
+        sections.append(section)
+
+    # 특정 패턴으로 구분된 섹션 추가 처리
+    section_divider_patterns = [
+        r'\d+\.\s+(.+?)\n',  # 숫자 + 점 + 공백 + 제목 패턴 (예: "1. 제목")
+        r'^-+\s*$',         # 구분선 패턴 (----------)
+        r'^=+\s*$',         # 구분선 패턴 (==========)
+    ]
+
+    # 패턴에 따라 더 정확한 섹션 구분 시도
+    for pattern in section_divider_patterns:
+        if re.search(pattern, content, re.MULTILINE):
+            analysis['content_structure'].append('sectioned')
+            break
+
+    # 섹션 저장
+    analysis['sections'] = sections
+
+    # 마크다운, 주제, 콘텐츠 구조 중복 제거
+    for key in ['markdown_used', 'content_structure', 'topics']:
+        analysis[key] = list(set(analysis[key]))
+
+    return analysis
+
+SAMPLE_MESSAGES = [
+    "안녕하세요",
+    "이거 어떻게 설정하나요?",
+    "설치 방법은 다음과 같이 진행하면 됩니다.\n\n1. 저장소를 클론합니다\n2. 의존성을 설치합니다",
+    "```python\nprint('hello')\n```",
+    "## 업데이트 내역\n- 버그 수정\n- **성능 개선**\n\n자세한 내용은 [문서](https://example.com)를 참고하세요",
+    "> 인용문입니다\n그리고 `inline code`도 있어요",
+    "문제: 부팅이 안 됨\n원인: 펌웨어 버전 불일치\n해결: 최신 버전으로 업데이트",
+    "오늘 주행 테스트 해봤는데 *꽤* 괜찮네요\n\n다음에는 고속도로에서도 해볼게요\n----------\n후기 끝",
+    "왜 이런 오류가 나는지 알려줘\n\n```\nTraceback (most recent call last):\n  File \"main.py\", line 1\n```",
+    "ㅋㅋㅋ",
+]
+
+def load_contents(count, db_path=None):
+    """벤치마크에 사용할 메시지 내용 목록 (DB가 있으면 실제 메시지 사용)"""
+    if db_path and Path(db_path).exists():
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT content FROM discord_messages WHERE content IS NOT NULL AND content != '' LIMIT ?", (count,)
+        ).fetchall()
+        conn.close()
+        if rows:
+            contents = [row[0] for row in rows]
+            print(f"DB에서 메시지 {len(contents)}개를 불러왔습니다: {db_path}")
+            return contents
+    
+    rng = random.Random(42)
+    return [rng.choice(SAMPLE_MESSAGES) + f" #{i}" * rng.randint(0, 1) for i in range(count)]
+
+def normalize(analysis):
+    """결과 비교용 정규화 (기존 구현은 set으로 중복을 제거해 목록 순서가 일정하지 않음)"""
+    return (
+        analysis['message_type'],
+        frozenset(analysis['topics']),
+        frozenset(analysis['markdown_used']),
+        frozenset(analysis['content_structure']),
+        analysis['sections'],
+    )
+
+def measure(label, func, count):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}초  {count / elapsed:12,.0f} 메시지/초")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='메시지 분석기 벤치마크')
+    parser.add_argument('--count', type=int, default=20000, help='분석할 메시지 수')
+    parser.add_argument('--db', default=None, help='실제 메시지를 읽어올 SQLite DB 경로')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 풀 작업자 수')
+    args = parser.parse_args()
+    
+    contents = load_contents(args.count, args.db)
+    count = len(contents)
+    print(f"메시지 {count}개 분석\n")
+    
+    legacy = measure("기존 (메시지마다 컴파일)", lambda: [legacy_analyze(c) for c in contents], count)
+    batched = measure("사전 컴파일 배치", lambda: analyze_batch(contents), count)
+    
+    analyzer = ContentAnalyzer(process_threshold=1, max_workers=args.workers)
+    try:
+        # 프로세스 시작 비용은 제외하고 측정
+        asyncio.run(analyzer.analyze_many(contents[:analyzer.max_workers]))
+        pooled = measure(
+            f"프로세스 풀 ({analyzer.max_workers}개)",
+            lambda: asyncio.run(analyzer.analyze_many(contents)),
+            count
+        )
+    finally:
+        analyzer.shutdown()
+    
+    mismatches = [
+        i for i in range(count)
+        if not (normalize(legacy[i]) == normalize(batched[i]) == normalize(pooled[i]))
+    ]
+    if mismatches:
+        print(f"\n❌ 결과 불일치 {len(mismatches)}건 (첫 번째: {contents[mismatches[0]]!r})")
+        sys.exit(1)
+    print("\n✅ 세 구현의 분석 결과가 모두 같습니다.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+근사 최근접 이웃(IVF-PQ) 검색 벤치마크
+
+peanut.utils.embeddings의 float16 임베딩 파일과 같은 형식의 행렬에 대해
+전체 내적 검색(정확 검색)과 IVF-PQ 근사 검색을 비교합니다. nprobe마다
+정확 검색 대비 recall@k와 질의 지연 시간 p50/p99를 출력합니다.
+
+--vectors를 주면 서버의 임베딩 파일(<db>.<모델>.npy)을, 없으면 군집 구조가 있는
+가상 정규화 벡터를 사용합니다.
+
+사용법:
+    python benchmark_ann.py [--count 200000] [--dim 256] [--queries 200] [--k 10] [--nprobe 1,4,8,16,32]
+    python benchmark_ann.py --vectors peanut/db/discord_messages_guild_1.hashing-256.npy
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 경로 추가
+sys.path.append(str(Path(__file__).parent))
+
+from peanut.utils.embeddings import VectorFile, top_k_rows
+from peanut.utils.ann_index import build_ivfpq_index
+
+def make_vectors(path, count, dim, clusters=500, seed=0):
+    """군집 주변에 흩어진 가상 정규화 벡터를 임베딩 파일로 저장"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vector_file = VectorFile(path, dim)
+    for start in range(0, count, 50000):
+        size = min(50000, count - start)
+        vectors = centers[rng.integers(0, clusters, size)] + 0.8 * rng.standard_normal((size, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        vector_file.append(vectors)
+    return vector_file
+
+def make_queries(matrix, count, seed=1):
+    """저장된 벡터에 잡음을 더한 질의 벡터"""
+    rng = np.random.default_rng(seed)
+    queries = np.asarray(matrix[np.sort(rng.choice(len(matrix), count, replace=False))], dtype=np.float32)
+    queries += 0.3 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(matrix.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='IVF-PQ 근사 검색 벤치마크')
+    parser.add_argument('--vectors', help='벤치마크할 임베딩 파일 (.npy, 없으면 가상 벡터 생성)')
+    parser.add_argument('--count', type=int, default=200000, help='가상 벡터 수')
+    parser.add_argument('--dim', type=int, default=256, help='가상 벡터 차원 수')
+    parser.add_argument('--queries', type=int, default=200, help='질의 수')
+    parser.add_argument('--k', type=int, default=10, help='recall@k의 k')
+    parser.add_argument('--nlist', type=int, default=0, help='거친 군집 수 (0이면 4 * sqrt(행 수))')
+    parser.add_argument('--subvectors', type=int, default=32, help='PQ 부분 벡터 수')
+    parser.add_argument('--refine', type=int, default=10, help='원래 벡터로 재정렬할 후보 배수 (0이면 PQ 점수만 사용)')
+    parser.add_argument('--nprobe', default='1,4,8,16,32', help='비교할 nprobe 값 (쉼표로 구분)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.vectors:
+            matrix = np.load(args.vectors, mmap_mode='r')
+        else:
+            print(f"가상 벡터 {args.count:,}개 ({args.dim}차원) 생성 중...")
+            matrix = make_vectors(str(Path(tmp) / 'vectors.npy'), args.count, args.dim).matrix()
+
+        rows, dim = matrix.shape
+        valid = np.ones(rows, dtype=bool)
+        queries = make_queries(matrix, min(args.queries, rows))
+        k = args.k
+
+        started = time.perf_counter()
+        index = build_ivfpq_index(matrix, nlist=args.nlist, m=args.subvectors)
+        build_seconds = time.perf_counter() - started
+        print(f"인덱스 생성: 행 {rows:,}개, 군집 {index.nlist}개, PQ 부분 벡터 {index.m}개, {build_seconds:.1f}초\n")
+
+        # 정확 검색 (정답과 기준 지연 시간)
+        exact_results, exact_latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            hits = top_k_rows(matrix, query, k, valid)
+            exact_latencies.append(time.perf_counter() - started)
+            exact_results.append({row for row, _ in hits})
+
+        print(f"{'방식':<16} {f'recall@{k}':>10} {'p50(ms)':>9} {'p99(ms)':>9}")
+        print(f"{'exact':<16} {1.0:10.3f} {percentile(exact_latencies, 50):9.2f} {percentile(exact_latencies, 99):9.2f}")
+
+        for nprobe in [int(value) for value in args.nprobe.split(',') if value.strip()]:
+            latencies, recalls = [], []
+            for query, expected in zip(queries, exact_results):
+                started = time.perf_counter()
+                candidates, _ = index.search(query, k * max(1, args.refine), nprobe, valid)
+                if args.refine and len(candidates):
+                    candidates = np.sort(candidates)
+                    scores = np.asarray(matrix[candidates], dtype=np.float32) @ query
+                    candidates = candidates[np.argsort(-scores)[:k]]
+                latencies.append(time.perf_counter() - started)
+                recalls.append(len(expected.intersection(candidates[:k].tolist())) / max(1, len(expected)))
+            print(
+                f"{f'ivfpq nprobe={nprobe}':<16} {statistics.mean(recalls):10.3f} "
+                f"{percentile(latencies, 50):9.2f} {percentile(latencies, 99):9.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
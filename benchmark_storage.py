@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+SQLite 저장소 프로필 벤치마크
+
+peanut.db.database의 저장소 프로필(default: SQLite 기본값, wal: WAL + 성능 PRAGMA)마다
+임시 데이터베이스를 만들어 배치 저장 속도와, 저장하는 동안 동시에 실행한 읽기 쿼리
+(/질문과 같이 읽기 전용 엔진으로 실행하는 채널별 최신 메시지 조회)의 지연 시간을 비교합니다.
+
+사용법:
+    python benchmark_storage.py [--count 20000] [--batch 500] [--profiles default,wal]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+# 프로젝트 경로 추가
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import select
+
+from peanut.db.database import DatabaseManager, DiscordMessage, datetime_to_snowflake
+
+CHANNEL_COUNT = 8
+
+def make_messages(count):
+    """저장할 가상 메시지 딕셔너리 목록 (1분 간격, 채널 CHANNEL_COUNT개에 분산)"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages = []
+    for i in range(count):
+        created_at = start + timedelta(minutes=i)
+        messages.append({
+            'id': datetime_to_snowflake(created_at) + i % 4096,
+            'channel_id': 1000 + i % CHANNEL_COUNT,
+            'guild_id': 1,
+            'channel_name': f'채널-{i % CHANNEL_COUNT}',
+            'guild_name': '벤치마크',
+            'author_id': 2000 + i % 50,
+            'author_name': f'사용자-{i % 50}',
+            'content': f'벤치마크 메시지 {i} ' + '내용 ' * (i % 20),
+            'collected_at': datetime.now(),
+            'analysis_version': None,
+        })
+    return messages
+
+async def run_reader(db_manager, stop, latencies, errors):
+    """저장이 끝날 때까지 채널별 최신 메시지 조회를 반복"""
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            async with db_manager.ReadSessionLocal() as session:
+                query = select(DiscordMessage).where(
+                    DiscordMessage.channel_id == 1000 + i % CHANNEL_COUNT
+                ).order_by(DiscordMessage.created_at.desc()).limit(20)
+                (await session.execute(query)).scalars().all()
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors.append(time.perf_counter() - started)
+        i += 1
+        await asyncio.sleep(0)
+
+async def run_profile(profile, messages, batch_size):
+    """프로필 하나로 저장/읽기 벤치마크 실행"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(str(Path(tmp) / f'{profile}.db'), storage_profile=profile)
+        stop = asyncio.Event()
+        latencies, errors = [], []
+        reader = asyncio.create_task(run_reader(db_manager, stop, latencies, errors))
+
+        started = time.perf_counter()
+        for i in range(0, len(messages), batch_size):
+            await db_manager.bulk_upsert_messages([dict(m) for m in messages[i:i + batch_size]])
+        write_seconds = time.perf_counter() - started
+
+        stop.set()
+        await reader
+
+        maintenance_started = time.perf_counter()
+        await db_manager.run_maintenance()
+        maintenance_seconds = time.perf_counter() - maintenance_started
+
+        await db_manager.close()
+        db_manager.engine.dispose()
+
+    return {
+        'write_rate': len(messages) / write_seconds,
+        'reads': len(latencies),
+        'p50': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95': statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 20 else 0.0,
+        'max': max(latencies) * 1000 if latencies else 0.0,
+        'errors': len(errors),
+        'maintenance': maintenance_seconds * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 저장소 프로필 벤치마크')
+    parser.add_argument('--count', type=int, default=20000, help='저장할 메시지 수')
+    parser.add_argument('--batch', type=int, default=500, help='한 번에 커밋할 메시지 수')
+    parser.add_argument('--profiles', default='default,wal', help='비교할 저장소 프로필 (쉼표로 구분)')
+    args = parser.parse_args()
+
+    messages = make_messages(args.count)
+    print(f"메시지 {args.count}개를 {args.batch}개씩 저장하면서 동시에 최신 메시지 조회\n")
+    print(f"{'프로필':<10} {'저장(메시지/초)':>16} {'읽기 수':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'최대(ms)':>9} {'오류':>5} {'유지보수(ms)':>13}")
+    for profile in [name.strip() for name in args.profiles.split(',') if name.strip()]:
+        result = asyncio.run(run_profile(profile, messages, args.batch))
+        print(
+            f"{profile:<10} {result['write_rate']:16,.0f} {result['reads']:8d} {result['p50']:9.2f} "
+            f"{result['p95']:9.2f} {result['max']:9.2f} {result['errors']:5d} {result['maintenance']:13.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
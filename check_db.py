@@ -6,7 +6,7 @@ from datetime import datetime
 # 프로젝트 경로 추가
 sys.path.append('.')
 
-from peanut.db.database import get_db_manager, DiscordMessage, CollectionMetadata
+from peanut.db.database import get_db_manager, DiscordMessage, CollectionMetadata, ChannelState
 from sqlalchemy import select, func, text
 
 async def check_database():
@@ -64,21 +64,18 @@ async def check_database():
         else:
             print("메타데이터 레코드가 없습니다.")
         
-        # 채널별 마지막 수집 시간 확인
-        channel_meta_query = select(CollectionMetadata).where(
-            CollectionMetadata.key.like('last_collected_channel_%')
-        )
-        result = await session.execute(channel_meta_query)
-        channel_metadata = result.scalars().all()
+        # 채널별 수집 상태 확인
+        channel_state_query = select(ChannelState).order_by(ChannelState.last_collected_at.desc())
+        result = await session.execute(channel_state_query)
+        channel_states = result.scalars().all()
         
-        if channel_metadata:
-            print("\n채널별 마지막 수집 시간:")
+        if channel_states:
+            print("\n채널별 수집 상태:")
             print("-" * 50)
-            for record in channel_metadata:
-                channel_id = record.key.replace('last_collected_channel_', '')
-                print(f"채널 ID: {channel_id}")
-                print(f"마지막 수집 시간: {record.value}")
-                print(f"업데이트 시간: {record.updated_at}")
+            for state in channel_states:
+                print(f"채널 ID: {state.channel_id}")
+                print(f"폴링 커서: {state.last_message_id}")
+                print(f"마지막 수집 시간: {state.last_collected_at} (본 메시지 {state.last_seen_count}개)")
                 print("-" * 30)
         
         # 서버별 마지막 수집 시간 확인
@@ -100,9 +97,10 @@ async def check_database():
         
         # 작성자별 메시지 수 확인
         author_query = text("""
-            SELECT author_id, author_name, COUNT(*) as message_count
-            FROM discord_messages
-            GROUP BY author_id, author_name
+            SELECT m.author_id, a.name, COUNT(*) as message_count
+            FROM discord_messages m
+            LEFT JOIN authors a ON a.id = m.author_id
+            GROUP BY m.author_id
             ORDER BY message_count DESC
             LIMIT 10
         """)
@@ -10,8 +10,10 @@ from datetime import datetime
 from .utils.config import get_config
 from .utils.logger import setup_logger
 from .utils.collector import MessageCollector
-from .db.database import get_db_manager
+from .utils.ratelimit import RequestScheduler
+from .db.database import get_db_manager, db_managers
 from .utils.llm import get_llm_manager
+from .utils.ngram_index import get_ngram_indexer, save_ngram_snapshots
 
 # 로거 설정
 logger = setup_logger()
@@ -38,8 +40,11 @@ class PeanutBot(commands.Bot):
         intents.message_content = True
         intents.members = True
         
-        # 봇 초기화
-        super().__init__(command_prefix='!', intents=intents)
+        # 레이트 리밋 헤더를 읽어 수집 요청 속도를 조절하는 스케줄러
+        self.request_scheduler = RequestScheduler(self.config.get('REQUEST_MAX_CONCURRENCY', 8))
+        
+        # 봇 초기화 (HTTP 응답 헤더를 스케줄러가 읽을 수 있도록 트레이스 연결)
+        super().__init__(command_prefix='!', intents=intents, http_trace=self.request_scheduler.trace_config)
         
         # 데이터베이스 매니저 초기화 - 기본 데이터베이스 사용
         self.db_manager = get_db_manager()
@@ -124,9 +129,9 @@ class PeanutBot(commands.Bot):
                 
                 for msg in relevant_messages:
                     context_messages.append({
-                        'id': msg.id,
-                        'channel_id': msg.channel_id,
-                        'author_id': msg.author_id,
+                        'id': str(msg.id),
+                        'channel_id': str(msg.channel_id),
+                        'author_id': str(msg.author_id),
                         'author_name': msg.author_name,
                         'content': msg.content,
                         'created_at': msg.created_at.isoformat() if msg.created_at else None,
@@ -454,6 +459,19 @@ class PeanutBot(commands.Bot):
             
             logger.info(f"봇이 {allowed_guilds}개의 허용된 서버와 {not_allowed_guilds}개의 허용되지 않은 서버에 참여중입니다.")
             
+            # n-gram 검색 모드면 서버별 색인을 백그라운드에서 준비 (스냅샷이 있으면 읽고 누락분만 색인)
+            if self.config.get('SEARCH_MODE') == 'ngram':
+                for guild in self.guilds:
+                    if self.is_guild_allowed(guild.id):
+                        get_ngram_indexer(self.get_guild_db_manager(guild.id)).start()
+            
+            # 임베딩 검색 모드면 서버별로 아직 임베딩하지 않은 메시지를 백그라운드에서 임베딩
+            if self.config.get('SEARCH_MODE') in ('vector', 'hybrid'):
+                from .utils.embeddings import get_vector_store
+                for guild in self.guilds:
+                    if self.is_guild_allowed(guild.id):
+                        get_vector_store(self.get_guild_db_manager(guild.id)).start()
+            
             # Cog 설정
             await self.setup_cogs()
             
@@ -511,9 +529,13 @@ class PeanutBot(commands.Bot):
             except Exception as e:
                 logger.error(f"명령어 등록 상태 확인 중 오류 발생: {str(e)}", exc_info=True)
             
-            # 수집 스케줄러 시작
-            self.collector.start_collection_scheduler()
-            logger.info("메시지 수집 스케줄러가 시작되었습니다.")
+            # 수집 스케줄러 시작 (재연결로 on_ready가 다시 호출되면 누락분 보충만 요청)
+            collection_task = getattr(self.collector, 'collection_task', None)
+            if collection_task and not collection_task.done():
+                self.collector.request_gap_fill()
+            else:
+                self.collector.start_collection_scheduler()
+                logger.info("메시지 수집 스케줄러가 시작되었습니다.")
         
         @self.event
         async def on_guild_join(guild):
@@ -549,9 +571,40 @@ class PeanutBot(commands.Bot):
             """새로운 메시지가 생성되었을 때 호출되는 이벤트"""
             # 허용된 서버의 메시지만 처리
             if message.guild and self.is_guild_allowed(message.guild.id):
+                # 실시간 수집 (마이크로 배치로 서버별 DB에 저장)
+                if self.collector.live_ingest_enabled:
+                    await self.collector.ingest_live_message(message)
+                
                 # 명령어 처리
                 await self.process_commands(message)
     
+    async def close(self):
+        """봇 종료 (실시간 수집 버퍼에 남은 메시지를 저장한 뒤 종료)"""
+        try:
+            saved = await self.collector.flush_live_messages()
+            if saved:
+                logger.info(f"종료 전 실시간 수집 메시지 {saved}개를 저장했습니다.")
+        except Exception as e:
+            logger.error(f"종료 전 실시간 수집 메시지 저장 중 오류 발생: {str(e)}")
+        self.collector.analyzer.shutdown()
+        
+        # 다음 시작 때 바로 쓸 수 있도록 n-gram 색인 스냅샷과 근사 검색 인덱스 저장
+        try:
+            await save_ngram_snapshots()
+            if self.config.get('SEARCH_MODE') in ('vector', 'hybrid'):
+                from .utils.embeddings import save_vector_indexes
+                await save_vector_indexes()
+        except Exception as e:
+            logger.error(f"검색 색인 저장 중 오류 발생: {str(e)}")
+        
+        # 데이터베이스별 쓰기 큐에 남은 작업 저장
+        for db_manager in list(db_managers.values()):
+            try:
+                await db_manager.close()
+            except Exception as e:
+                logger.error(f"데이터베이스 종료 중 오류 발생: {str(e)}")
+        await super().close()
+    
     async def on_error(self, event, *args, **kwargs):
         """봇 오류 처리"""
         logger.error(f"이벤트 {event} 처리 중 오류 발생:", exc_info=True)
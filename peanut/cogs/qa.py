@@ -56,9 +56,9 @@ class QACog(commands.Cog):
             
             for msg in relevant_messages:
                 context_messages.append({
-                    'id': msg.id,
-                    'channel_id': msg.channel_id,
-                    'author_id': msg.author_id,
+                    'id': str(msg.id),
+                    'channel_id': str(msg.channel_id),
+                    'author_id': str(msg.author_id),
                     'author_name': msg.author_name,
                     'content': msg.content,
                     'created_at': msg.created_at.isoformat() if msg.created_at else None,
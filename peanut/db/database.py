@@ -1,14 +1,26 @@
 import os
+import json
 import asyncio
 import logging
-from datetime import datetime
+import operator
+import calendar
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import quote
+from collections.abc import Sequence
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, create_engine, select, func, delete, Table, MetaData, Boolean
+import aiosqlite
+
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Index, create_engine, select, update, bindparam, or_, func, delete, Table, MetaData, Boolean, inspect, event
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import sessionmaker, synonym, relationship
+from sqlalchemy.ext.hybrid import hybrid_property, Comparator
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from .writer import DatabaseWriter
+from . import fts
 
 # 로깅 설정
 logger = logging.getLogger('discord.database')
@@ -16,41 +28,397 @@ logger = logging.getLogger('discord.database')
 # Base 클래스 정의
 Base = declarative_base()
 
+# 분석 필드 비트 플래그 (값을 바꾸면 기존 데이터와 맞지 않으므로 새 항목은 다음 비트로만 추가)
+MARKDOWN_FLAGS = {
+    'code_block': 1 << 0,
+    'inline_code': 1 << 1,
+    'bold': 1 << 2,
+    'italic': 1 << 3,
+    'heading': 1 << 4,
+    'bullet_list': 1 << 5,
+    'numbered_list': 1 << 6,
+    'blockquote': 1 << 7,
+    'link': 1 << 8,
+}
+
+STRUCTURE_FLAGS = {
+    'headers': 1 << 0,
+    'paragraphs': 1 << 1,
+    'lists': 1 << 2,
+    'multi_section': 1 << 3,
+    'sectioned': 1 << 4,
+}
+
+# SQLite 저장소 프로필 (연결마다 실행할 PRAGMA)
+STORAGE_PROFILES = {
+    # SQLite 기본값 (rollback journal, 커밋마다 전체 fsync, 쓰는 동안 읽기 대기)
+    'default': {},
+    # WAL: 쓰기 중에도 읽기가 막히지 않고, fsync는 체크포인트 때만 수행
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+def get_storage_pragmas(profile='wal', mmap_size=256 * 1024 * 1024, cache_size_kb=64 * 1024):
+    """저장소 프로필의 PRAGMA 목록 (default 외 프로필은 mmap_size, cache_size 포함)"""
+    if profile not in STORAGE_PROFILES:
+        logger.warning(f"알 수 없는 저장소 프로필 '{profile}', wal 프로필을 사용합니다.")
+        profile = 'wal'
+    pragmas = dict(STORAGE_PROFILES[profile])
+    if profile != 'default':
+        pragmas['mmap_size'] = int(mmap_size)
+        pragmas['cache_size'] = -int(cache_size_kb)  # 음수면 KB 단위
+    return pragmas
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """새 DB-API 연결에 PRAGMA 적용 (엔진의 connect 이벤트에서 호출)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+# 디스코드 스노우플레이크 기준 시각 (2015-01-01T00:00:00Z, 밀리초)
+DISCORD_EPOCH = 1420070400000
+
+def snowflake_to_datetime(snowflake):
+    """스노우플레이크의 생성 시각 (UTC, tzinfo 없는 datetime)"""
+    if snowflake is None:
+        return None
+    timestamp_ms = (int(snowflake) >> 22) + DISCORD_EPOCH
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+def datetime_to_snowflake(dt, high=False):
+    """해당 시각(밀리초)에 만들어질 수 있는 가장 작은(high=True면 가장 큰) 스노우플레이크
+    
+    tzinfo가 없는 datetime은 UTC로 간주합니다.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    timestamp_ms = calendar.timegm(dt.timetuple()) * 1000 + dt.microsecond // 1000
+    snowflake = max(0, timestamp_ms - DISCORD_EPOCH) << 22
+    return snowflake + (1 << 22) - 1 if high else snowflake
+
+class SnowflakeTimeComparator(Comparator):
+    """created_at 비교/정렬을 스노우플레이크(id) 비교로 바꾸는 SQL 비교자
+    
+    같은 밀리초의 메시지가 모두 포함되도록 > 와 <= 는 해당 밀리초의 가장 큰 ID와,
+    >=, <, == 는 가장 작은 ID와 비교합니다.
+    """
+    
+    def operate(self, op, *other, **kwargs):
+        high = op in (operator.gt, operator.le)
+        other = [
+            datetime_to_snowflake(value, high=high) if isinstance(value, datetime) else value
+            for value in other
+        ]
+        return op(self.__clause_element__(), *other, **kwargs)
+
+def encode_flags(names, flags):
+    """이름 목록을 비트마스크로 변환 (알 수 없는 이름은 무시)"""
+    mask = 0
+    for name in names or []:
+        mask |= flags.get(name, 0)
+    return mask
+
+def decode_flags(mask, flags):
+    """비트마스크를 이름 목록으로 변환 (플래그 정의 순서)"""
+    if not mask:
+        return []
+    return [name for name, bit in flags.items() if mask & bit]
+
+def encode_sections(section_spans):
+    """섹션 위치 목록을 저장용 JSON으로 변환 (없으면 None)
+    
+    섹션마다 content 안의 [시작, 끝, 제목 시작, 제목 끝, 하위 주제 시작, 끝, ...] 위치만 저장하고
+    섹션 본문은 content를 잘라서 복원합니다.
+    """
+    if not section_spans:
+        return None
+    return json.dumps(section_spans, separators=(',', ':'))
+
+def _decode_section(content, span):
+    start, end, title_start, title_end, *subtopic_spans = span
+    return {
+        'content': content[start:end],
+        'subtopics': [content[a:b] for a, b in zip(subtopic_spans[::2], subtopic_spans[1::2])],
+        'title': content[title_start:title_end],
+    }
+
+class LazySections(Sequence):
+    """저장된 sections 값을 처음 접근할 때 해석하고, 섹션은 꺼낼 때 content에서 잘라 만드는 목록
+    
+    위치 형식과 본문을 그대로 저장하던 기존 딕셔너리 형식을 모두 지원합니다.
+    """
+    
+    def __init__(self, content, raw):
+        self._content = content or ''
+        self._raw = raw
+        self._spans = None
+    
+    def _load(self):
+        if self._spans is None:
+            try:
+                spans = json.loads(self._raw) if self._raw else []
+            except (TypeError, ValueError):
+                spans = []
+            self._spans = spans if isinstance(spans, list) else []
+        return self._spans
+    
+    def __len__(self):
+        return len(self._load())
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        span = self._load()[index]
+        if isinstance(span, dict):
+            return span
+        return _decode_section(self._content, span)
+
+def legacy_sections_to_spans(content, sections):
+    """기존 딕셔너리 형식의 섹션 목록을 content 내 위치 목록으로 변환
+    
+    Returns:
+        위치 목록 (본문이나 제목을 content에서 찾을 수 없으면 None)
+    """
+    content = content or ''
+    spans = []
+    position = 0
+    for section in sections:
+        start = content.find(section.get('content', ''), position)
+        if start < 0:
+            return None
+        end = start + len(section.get('content', ''))
+        span = [start, end, start, start]
+        
+        title = section.get('title') or ''
+        if title:
+            title_start = content.find(title, start, end)
+            if title_start < 0:
+                return None
+            span[2:4] = [title_start, title_start + len(title)]
+        
+        topic_position = start
+        for topic in section.get('subtopics') or []:
+            topic_start = content.find(topic, topic_position, end)
+            if topic_start < 0:
+                return None
+            span.extend([topic_start, topic_start + len(topic)])
+            topic_position = topic_start
+        
+        spans.append(span)
+        position = end
+    return spans
+
 class DiscordMessage(Base):
     """디스코드 메시지를 저장하는 모델"""
     __tablename__ = 'discord_messages'
     
-    id = Column(String, primary_key=True)
-    message_id = Column(String, index=True)
-    channel_id = Column(String, index=True)
-    guild_id = Column(String, index=True)
-    author_id = Column(String, index=True)
-    author_name = Column(String)
+    # 메시지 스노우플레이크를 그대로 INTEGER 기본 키(rowid)로 사용
+    # 스노우플레이크는 시간순이므로 created_at 정렬/범위 조회는 rowid 순서로 처리되고,
+    # SQLite 인덱스는 끝에 rowid를 포함하므로 channel_id 인덱스가 (channel_id, 시간) 인덱스 역할을 함
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    message_id = synonym('id')
+    channel_id = Column(BigInteger, index=True)
+    guild_id = Column(BigInteger, index=True)
+    author_id = Column(BigInteger, index=True)
     content = Column(Text)
-    created_at = Column(DateTime)
     attachments_count = Column(Integer, default=0)
     attachments_urls = Column(Text)
     collected_at = Column(DateTime, default=datetime.now)
     
-    # 채널, 서버 이름 (조회 편의를 위해 저장)
-    channel_name = Column(String)
-    guild_name = Column(String)
-    
-    # 메시지 링크
-    message_url = Column(String)
-    
-    # 스레드 관련 필드
+    # 스레드 관련 필드 (스레드/부모 채널 이름은 channels 테이블에 저장)
     is_thread = Column(Boolean, default=False)
-    thread_name = Column(String)
-    parent_channel_id = Column(String)
-    parent_channel_name = Column(String)
+    parent_channel_id = Column(BigInteger)
+    
+    # 서버, 채널, 작성자 이름은 정규화 테이블에서 조회 (메시지를 조회할 때 한 번에 함께 로드)
+    guild = relationship(
+        'Guild', primaryjoin='foreign(DiscordMessage.guild_id) == Guild.id',
+        lazy='selectin', viewonly=True
+    )
+    channel = relationship(
+        'Channel', primaryjoin='foreign(DiscordMessage.channel_id) == Channel.id',
+        lazy='selectin', viewonly=True
+    )
+    parent_channel = relationship(
+        'Channel', primaryjoin='foreign(DiscordMessage.parent_channel_id) == Channel.id',
+        lazy='selectin', viewonly=True
+    )
+    author = relationship(
+        'Author', primaryjoin='foreign(DiscordMessage.author_id) == Author.id',
+        lazy='selectin', viewonly=True
+    )
     
-    # 분석 정보
+    # 분석 정보 (마크다운/구조는 MARKDOWN_FLAGS, STRUCTURE_FLAGS 비트마스크)
     topics = Column(Text)
     message_type = Column(String)
-    content_structure = Column(Text)
-    markdown_used = Column(Text)
+    structure_flags = Column(Integer)
+    markdown_flags = Column(Integer)
     sections = Column(Text)
+    
+    # 분석 정보를 만든 분석기 버전 (NULL이면 분석 대기 중)
+    analysis_version = Column(Integer, index=True)
+    
+    __table_args__ = (
+        # 내용 있는 메시지만 담은 시간순(id순) 부분 인덱스 (최근 메시지 조회에서 빈 메시지를 건너뜀)
+        Index(
+            'ix_discord_messages_content_created', 'id',
+            sqlite_where=content.isnot(None) & (content != '')
+        ),
+    )
+    
+    @hybrid_property
+    def created_at(self):
+        """메시지 생성 시각 (스노우플레이크에서 계산, UTC)"""
+        return snowflake_to_datetime(self.id)
+    
+    @created_at.comparator
+    def created_at(cls):
+        return SnowflakeTimeComparator(cls.id)
+    
+    @property
+    def guild_name(self):
+        """서버 이름"""
+        return self.guild.name if self.guild else None
+    
+    @property
+    def channel_name(self):
+        """채널 이름 (스레드면 스레드 이름)"""
+        return self.channel.name if self.channel else None
+    
+    @property
+    def thread_name(self):
+        """스레드 이름 (스레드가 아니면 None)"""
+        return self.channel_name if self.is_thread else None
+    
+    @property
+    def parent_channel_name(self):
+        """스레드의 부모 채널 이름"""
+        return self.parent_channel.name if self.parent_channel else None
+    
+    @property
+    def author_name(self):
+        """작성자 이름"""
+        return self.author.name if self.author else None
+    
+    @property
+    def message_url(self):
+        """메시지 링크 (ID에서 계산)"""
+        return build_message_url(self.guild_id, self.channel_id, self.id)
+    
+    @property
+    def parsed_sections(self):
+        """섹션 목록 ({'content', 'title', 'subtopics'} 딕셔너리, 접근할 때 해석)"""
+        return LazySections(self.content, self.sections)
+    
+    @property
+    def markdown_used(self):
+        """사용된 마크다운 목록"""
+        return decode_flags(self.markdown_flags, MARKDOWN_FLAGS)
+    
+    @property
+    def content_structure(self):
+        """콘텐츠 구조 목록"""
+        return decode_flags(self.structure_flags, STRUCTURE_FLAGS)
+    
+    @classmethod
+    def uses_markdown(cls, name):
+        """특정 마크다운을 사용한 메시지 조건 (예: DiscordMessage.uses_markdown('code_block'))"""
+        return cls.markdown_flags.op('&')(MARKDOWN_FLAGS[name]) != 0
+    
+    @classmethod
+    def has_structure(cls, name):
+        """특정 콘텐츠 구조를 가진 메시지 조건 (예: DiscordMessage.has_structure('lists'))"""
+        return cls.structure_flags.op('&')(STRUCTURE_FLAGS[name]) != 0
+
+class Guild(Base):
+    """서버 이름 정규화 테이블"""
+    __tablename__ = 'guilds'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Channel(Base):
+    """채널/스레드 이름 정규화 테이블"""
+    __tablename__ = 'channels'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    guild_id = Column(BigInteger)
+    name = Column(String)
+    
+    # 스레드인 경우 부모 채널 ID
+    parent_id = Column(BigInteger)
+    is_thread = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Author(Base):
+    """작성자 이름 정규화 테이블"""
+    __tablename__ = 'authors'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def build_message_url(guild_id, channel_id, message_id):
+    """디스코드 메시지 링크 (서버가 없으면 DM 링크)"""
+    return f"https://discord.com/channels/{guild_id or '@me'}/{channel_id}/{message_id}"
+
+def extract_dimension_rows(messages):
+    """메시지 딕셔너리 목록에서 guilds/channels/authors 테이블에 저장할 행 추출
+    
+    같은 ID는 배치 안에서 마지막 이름 하나로 합치므로 배치마다 ID당 한 행만 저장합니다.
+    
+    Returns:
+        {'guilds': [...], 'channels': [...], 'authors': [...]} 딕셔너리
+    """
+    guilds, channels, authors = {}, {}, {}
+    for msg_data in messages:
+        if not msg_data:
+            continue
+        guild_id = msg_data.get('guild_id')
+        if guild_id and msg_data.get('guild_name') is not None:
+            guilds[int(guild_id)] = {'id': int(guild_id), 'name': msg_data['guild_name']}
+        
+        parent_id = msg_data.get('parent_channel_id')
+        if parent_id and msg_data.get('parent_channel_name') is not None:
+            row = channels.setdefault(int(parent_id), {'id': int(parent_id)})
+            row.update(name=msg_data['parent_channel_name'], guild_id=int(guild_id) if guild_id else None)
+        
+        channel_id = msg_data.get('channel_id')
+        if channel_id:
+            is_thread = bool(msg_data.get('is_thread'))
+            name = msg_data.get('thread_name') if is_thread else None
+            name = name or msg_data.get('channel_name')
+            row = channels.setdefault(int(channel_id), {'id': int(channel_id)})
+            row.update(guild_id=int(guild_id) if guild_id else None, is_thread=is_thread)
+            if name is not None:
+                row['name'] = name
+            if parent_id:
+                row['parent_id'] = int(parent_id)
+        
+        author_id = msg_data.get('author_id')
+        if author_id and msg_data.get('author_name') is not None:
+            authors[int(author_id)] = {'id': int(author_id), 'name': msg_data['author_name']}
+    
+    return {
+        'guilds': list(guilds.values()),
+        'channels': list(channels.values()),
+        'authors': list(authors.values()),
+    }
+
+class AnalysisFlag(Base):
+    """분석 비트 플래그 정의 (SQL에서 비트마스크를 해석할 때 참고용)"""
+    __tablename__ = 'analysis_flags'
+    
+    kind = Column(String, primary_key=True)   # markdown 또는 structure
+    name = Column(String, primary_key=True)
+    bit = Column(Integer, nullable=False)
 
 class CollectionMetadata(Base):
     """메시지 수집 메타데이터 저장 모델"""
@@ -61,9 +429,69 @@ class CollectionMetadata(Base):
     value = Column(Text, nullable=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class ChannelState(Base):
+    """채널별 수집 상태 저장 모델 (스노우플레이크 커서)"""
+    __tablename__ = 'channel_state'
+    
+    guild_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    channel_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    
+    # 폴링 커서: 이 ID까지의 메시지는 모두 읽음 (high-water mark)
+    last_message_id = Column(BigInteger)
+    
+    # 백필 프론티어: 이 ID보다 오래된 메시지는 아직 읽지 않음
+    backfill_before_id = Column(BigInteger)
+    backfill_complete = Column(Boolean, default=False)
+    
+    # 스레드인 경우 부모 채널 ID (텍스트/포럼 채널은 None)
+    parent_id = Column(BigInteger, index=True)
+    
+    # 부모 채널: 이 시각까지 보관(archive)된 스레드 목록은 이미 확인함
+    threads_synced_at = Column(DateTime)
+    
+    # 마지막 수집 결과
+    last_seen_count = Column(Integer, default=0)
+    last_collected_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class BackfillRange(Base):
+    """스노우플레이크 구간별 병렬 백필 진행 상태 저장 모델"""
+    __tablename__ = 'backfill_ranges'
+    
+    guild_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    channel_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    
+    # 구간 (range_start, range_end) - 양 끝 제외
+    range_start = Column(BigInteger, primary_key=True, autoincrement=False)
+    range_end = Column(BigInteger)
+    
+    # 구간 안에서 아직 읽지 않은 메시지의 상한 (이 ID보다 오래된 메시지가 남아 있음)
+    cursor = Column(BigInteger)
+    complete = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class EmbeddingRow(Base):
+    """임베딩 행렬 파일(.npy)의 행 번호와 메시지 ID 매핑 모델 (임베딩 모델별)"""
+    __tablename__ = 'embedding_rows'
+    
+    model = Column(String, primary_key=True)
+    row = Column(Integer, primary_key=True, autoincrement=False)
+    message_id = Column(BigInteger, nullable=False)
+    
+    # 임베딩한 내용의 체크섬 (내용이 바뀐 메시지를 다시 임베딩하기 위해 사용)
+    checksum = Column(BigInteger)
+    
+    __table_args__ = (
+        Index('ix_embedding_rows_model_message', 'model', 'message_id', unique=True),
+    )
+
 class DatabaseManager:
     """데이터베이스 관리 클래스"""
-    def __init__(self, db_path='db/discord_messages.db', guild_id=None):
+    
+    # 한 문장에 바인딩할 최대 변수 수 (SQLite 기본 제한 32766보다 여유 있게)
+    BULK_PARAM_LIMIT = 30000
+    
+    def __init__(self, db_path='db/discord_messages.db', guild_id=None, storage_profile=None):
         # 서버 ID가 제공된 경우 서버별 DB 파일 사용
         if guild_id:
             # 서버 ID에서 서버명 추출하기 위한 더미 변수 (실제로는 get_guild_name 함수 필요)
@@ -104,6 +532,19 @@ class DatabaseManager:
             pool_recycle=1800
         )
         
+        from ..utils.config import get_config
+        config = get_config()
+        
+        # 저장소 프로필 PRAGMA를 두 엔진의 모든 연결에 적용
+        self.storage_profile = storage_profile or config.get('DB_STORAGE_PROFILE', 'wal')
+        self.pragmas = get_storage_pragmas(
+            self.storage_profile,
+            mmap_size=config.get('DB_MMAP_SIZE', 256 * 1024 * 1024),
+            cache_size_kb=config.get('DB_CACHE_SIZE_KB', 64 * 1024)
+        )
+        for engine in (self.engine, self.async_engine.sync_engine):
+            event.listen(engine, 'connect', self._on_connect)
+        
         self.SessionLocal = sessionmaker(
             bind=self.engine, 
             autocommit=False, 
@@ -117,71 +558,208 @@ class DatabaseManager:
             autoflush=False
         )
         
+        # 조회 전용 엔진 (검색/질문 답변용, 읽기 전용으로 연 연결 여러 개를 풀로 유지)
+        # WAL 모드에서는 수집 중인 쓰기 트랜잭션과 관계없이 동시에 읽을 수 있음
+        # (URL 문자열로 전달하면 경로의 특수 문자가 풀려서 다시 조합되므로 URI를 직접 만들어 연결)
+        read_uri = f"file:{quote(Path(self.db_path).as_posix())}?mode=ro"
+        self.read_engine = create_async_engine(
+            "sqlite+aiosqlite://",
+            async_creator=lambda: aiosqlite.connect(read_uri, uri=True),
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=max(1, int(config.get('DB_READ_POOL_SIZE', 4))),
+            pool_recycle=1800
+        )
+        event.listen(self.read_engine.sync_engine, 'connect', self._on_read_connect)
+        
+        self.ReadSessionLocal = sessionmaker(
+            bind=self.read_engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        
+        # 모든 쓰기 작업을 실행하는 단일 작성자 (같은 시점의 쓰기를 한 트랜잭션으로 묶음)
+        self.writer = DatabaseWriter(
+            self.AsyncSessionLocal,
+            coalesce_interval=config.get('DB_WRITE_COALESCE_INTERVAL', 0.02),
+            max_operations=config.get('DB_WRITE_MAX_OPERATIONS', 100)
+        )
+        
+        # 메시지가 커밋된 뒤 호출할 콜백 (메모리 검색 인덱스 증분 갱신용)
+        self.message_listeners = []
+        
         # 테이블 생성
         self.create_tables()
         logger.info(f"데이터베이스가 초기화되었습니다: {self.db_path}")
     
+    def _on_connect(self, dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, self.pragmas)
+    
+    def _on_read_connect(self, dbapi_connection, connection_record):
+        # journal_mode는 데이터베이스 파일 설정이므로 쓰기 연결에서만 변경
+        pragmas = {name: value for name, value in self.pragmas.items() if name != 'journal_mode'}
+        pragmas['query_only'] = 1
+        apply_pragmas(dbapi_connection, pragmas)
+    
+    async def run_maintenance(self):
+        """WAL 체크포인트와 쿼리 플래너 통계 갱신 (주기적으로 실행)
+        
+        WAL 파일이 계속 커지지 않도록 체크포인트 후 파일을 비우고,
+        PRAGMA optimize로 필요한 테이블만 ANALYZE합니다.
+        
+        Returns:
+            {'wal_checkpoint': (busy, WAL 페이지 수, 체크포인트한 페이지 수)} 딕셔너리 (실패 시 빈 딕셔너리)
+        """
+        try:
+            result = {}
+            async with self.async_engine.connect() as conn:
+                if self.pragmas.get('journal_mode') == 'WAL':
+                    row = (await conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')).first()
+                    result['wal_checkpoint'] = tuple(row) if row else None
+                await conn.exec_driver_sql('PRAGMA optimize')
+            logger.debug(f"데이터베이스 유지보수 완료: {self.db_path} {result}")
+            return result
+        except Exception as e:
+            logger.error(f"데이터베이스 유지보수 중 오류 발생: {str(e)}")
+            return {}
+    
+    async def close(self):
+        """쓰기 큐에 남은 작업을 모두 저장한 뒤 연결 정리"""
+        await self.writer.close()
+        await self.async_engine.dispose()
+        await self.read_engine.dispose()
+    
     def create_tables(self):
-        """테이블 생성"""
+        """테이블 생성 및 스키마 마이그레이션
+        
+        create_all은 기존 테이블을 변경하지 않으므로 이미 있던 데이터베이스는
+        peanut.db.migrations의 버전별 마이그레이션으로 최신 스키마에 맞춥니다.
+        """
+        from .migrations import run_migrations
+        
+        fresh = not inspect(self.engine).has_table(DiscordMessage.__tablename__)
         Base.metadata.create_all(self.engine)
+        applied = run_migrations(self.engine, fresh=fresh)
+        if applied:
+            logger.info(f"스키마 마이그레이션 {applied}개를 적용했습니다: {self.db_path}")
+        self._sync_analysis_flags()
+        self.fts_available = self._create_fts_index()
+    
+    def _create_fts_index(self):
+        """메시지 전문 검색 인덱스 준비 (새로 만들었으면 저장된 메시지를 모두 색인)
         
+        Returns:
+            전문 검색 인덱스를 사용할 수 있으면 True (FTS5나 trigram을 지원하지 않는 SQLite면 False)
+        """
+        try:
+            with self.engine.begin() as conn:
+                if fts.create_fts_index(conn):
+                    count = fts.rebuild_fts_index(conn)
+                    logger.info(f"전문 검색 인덱스를 만들고 메시지 {count}개를 색인했습니다: {self.db_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"전문 검색 인덱스를 사용할 수 없어 LIKE 검색을 사용합니다: {str(e)}")
+            return False
+    
+    def rebuild_fts_index(self):
+        """전문 검색 인덱스를 저장된 메시지로 다시 만들기 (인덱스가 어긋났을 때 수동 실행)
+        
+        Returns:
+            색인된 메시지 수 (실패 시 0)
+        """
+        try:
+            with self.engine.begin() as conn:
+                fts.drop_fts_index(conn)
+                fts.create_fts_index(conn)
+                count = fts.rebuild_fts_index(conn)
+            self.fts_available = True
+            logger.info(f"전문 검색 인덱스를 다시 만들었습니다: 메시지 {count}개 ({self.db_path})")
+            return count
+        except Exception as e:
+            logger.error(f"전문 검색 인덱스 재생성 중 오류 발생: {str(e)}")
+            return 0
+    
+    def _sync_analysis_flags(self):
+        """analysis_flags 테이블을 코드의 플래그 정의와 맞춤"""
+        table = AnalysisFlag.__table__
+        rows = [
+            {'kind': kind, 'name': name, 'bit': bit}
+            for kind, flags in (('markdown', MARKDOWN_FLAGS), ('structure', STRUCTURE_FLAGS))
+            for name, bit in flags.items()
+        ]
+        statement = sqlite_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.kind, table.c.name], set_={'bit': statement.excluded.bit}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement)
+    
     async def get_latest_message_date(self, guild_id, channel_id=None):
         """지정된 길드와 채널의 가장 최근 메시지 날짜를 조회"""
         async with self.AsyncSessionLocal() as session:
-            query = select(func.max(DiscordMessage.created_at))
+            # 스노우플레이크가 가장 큰 메시지가 가장 최근 메시지
+            query = select(func.max(DiscordMessage.id))
             
             if channel_id:
                 query = query.where(
-                    DiscordMessage.guild_id == str(guild_id),
-                    DiscordMessage.channel_id == str(channel_id)
+                    DiscordMessage.guild_id == int(guild_id),
+                    DiscordMessage.channel_id == int(channel_id)
                 )
             else:
-                query = query.where(DiscordMessage.guild_id == str(guild_id))
+                query = query.where(DiscordMessage.guild_id == int(guild_id))
                 
             result = await session.execute(query)
-            latest_date = result.scalar()
-            
-            return latest_date
+            return snowflake_to_datetime(result.scalar())
     
     async def message_exists(self, message_id):
         """메시지 ID로 메시지 존재 여부 확인"""
         async with self.AsyncSessionLocal() as session:
-            query = select(DiscordMessage).where(DiscordMessage.message_id == str(message_id))
+            query = select(DiscordMessage.id).where(DiscordMessage.id == int(message_id))
             result = await session.execute(query)
             return result.scalar() is not None
     
-    async def save_messages(self, messages):
+    async def save_messages(self, messages, bulk=False):
         """디스코드 메시지 저장 (배치)
         
         Args:
             messages: 저장할 메시지 딕셔너리 목록
+            bulk: True면 bulk_upsert_messages로 배치 전체를 한 문장으로 저장
             
         Returns:
             저장된 메시지 수
         """
         if not messages:
             return 0
+        
+        if bulk:
+            counts = await self.bulk_upsert_messages(messages)
+            return counts['inserted'] + counts['updated']
             
-        saved_count = 0
-        async with self.AsyncSessionLocal() as session:
+        async def operation(session):
+            try:
+                await self._upsert_dimensions(session, messages)
+            except Exception as e:
+                logger.error(f"서버/채널/작성자 정보 저장 중 오류 발생: {str(e)}")
+            
+            saved_count = 0
             for msg_data in messages:
                 if not msg_data:  # None인 경우 건너뜀
                     continue
                     
                 # id 필드 설정 (message_id와 동일)
-                if 'id' not in msg_data and 'message_id' in msg_data:
-                    msg_data['id'] = msg_data['message_id']
+                if 'id' not in msg_data and msg_data.get('message_id'):
+                    msg_data['id'] = int(msg_data['message_id'])
                     
                 # 필드 검증 및 변환
                 for field, value in list(msg_data.items()):
                     # 존재하지 않는 필드는 제거
-                    if not hasattr(DiscordMessage, field):
+                    if field not in DiscordMessage.__table__.columns:
                         msg_data.pop(field, None)
                         
                 try:
                     # 기존 메시지가 있는지 확인
-                    msg_id = msg_data.get('message_id')
-                    query = select(DiscordMessage).where(DiscordMessage.message_id == msg_id)
+                    query = select(DiscordMessage).where(DiscordMessage.id == msg_data.get('id'))
                     result = await session.execute(query)
                     existing_message = result.scalar_one_or_none()
                     
@@ -200,15 +778,203 @@ class DatabaseManager:
                     logger.error(f"메시지 저장 중 오류 발생: {str(e)}")
                     logger.error(f"문제가 된 메시지 데이터: {msg_data}")
                     continue
-                    
-            # 커밋
+            return saved_count
+        
+        # 쓰기 작업자가 다른 쓰기와 함께 커밋
+        try:
+            saved_count = await self.writer.submit(operation)
+        except Exception as e:
+            logger.error(f"데이터베이스 커밋 중 오류 발생: {str(e)}")
+            return 0
+        
+        self._notify_message_listeners([msg_data for msg_data in messages if msg_data and msg_data.get('id')])
+        return saved_count
+    
+    def add_message_listener(self, callback):
+        """메시지가 커밋된 뒤 호출할 콜백 등록
+        
+        Args:
+            callback: 저장된 메시지 행 목록(id, content 등을 담은 딕셔너리)을 받는 함수
+        """
+        if callback not in self.message_listeners:
+            self.message_listeners.append(callback)
+    
+    def _notify_message_listeners(self, rows):
+        """저장된 메시지 행을 등록된 콜백에 전달 (콜백 오류는 저장 결과에 영향을 주지 않음)"""
+        rows = [row for row in rows if 'content' in row]
+        if not rows:
+            return
+        for callback in list(self.message_listeners):
             try:
-                await session.commit()
-                return saved_count
+                callback(rows)
             except Exception as e:
-                logger.error(f"데이터베이스 커밋 중 오류 발생: {str(e)}")
-                await session.rollback()
-                return 0
+                logger.error(f"메시지 저장 콜백 실행 중 오류 발생: {str(e)}")
+    
+    def _prepare_bulk_rows(self, messages):
+        """벌크 저장용 행 목록 생성 (모델에 없는 필드 제거, id 설정, 중복 제거)"""
+        columns = DiscordMessage.__table__.columns.keys()
+        rows = {}
+        for msg_data in messages:
+            if not msg_data:  # None인 경우 건너뜀
+                continue
+            
+            row = {field: value for field, value in msg_data.items() if field in columns}
+            if 'id' not in row and msg_data.get('message_id'):
+                row['id'] = int(msg_data['message_id'])
+            if not row.get('id'):
+                logger.warning(f"메시지 ID가 없어 건너뜁니다: {msg_data}")
+                continue
+            
+            row['id'] = int(row['id'])
+            
+            # 같은 배치 안에 동일 메시지가 여러 번 있으면 마지막 값 사용
+            rows[row['id']] = row
+        return list(rows.values())
+    
+    async def _upsert_rows(self, session, table, rows, index_elements):
+        """INSERT ... ON CONFLICT DO UPDATE로 여러 행을 저장 (세션 커밋은 호출자가 담당)
+        
+        필드 구성이 같은 행끼리 묶어서 실행하므로, 행에 없는 필드는
+        새 행이면 기본값을, 기존 행이면 저장된 값을 유지합니다.
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+        
+        conflict_columns = [column.name for column in index_elements]
+        for fields, group_rows in groups.items():
+            update_fields = [field for field in fields if field not in conflict_columns]
+            # SQLite 바인드 변수 수 제한을 넘지 않도록 나눠서 실행
+            chunk_size = max(1, self.BULK_PARAM_LIMIT // len(fields))
+            for i in range(0, len(group_rows), chunk_size):
+                stmt = sqlite_insert(table).values(group_rows[i:i + chunk_size])
+                if update_fields:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_={field: stmt.excluded[field] for field in update_fields}
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+                await session.execute(stmt)
+    
+    async def _upsert_dimensions(self, session, messages):
+        """메시지에 포함된 서버/채널/작성자 이름을 정규화 테이블에 저장 (이름이 바뀌면 갱신)"""
+        now = datetime.utcnow()
+        dimensions = extract_dimension_rows(messages)
+        for model in (Guild, Channel, Author):
+            rows = [dict(row, updated_at=now) for row in dimensions[model.__tablename__]]
+            if rows:
+                await self._upsert_rows(session, model.__table__, rows, [model.__table__.c.id])
+    
+    async def bulk_upsert_messages(self, messages, channel_states=None, backfill_ranges=None):
+        """디스코드 메시지 벌크 저장 (INSERT ... ON CONFLICT DO UPDATE)
+        
+        메시지마다 SELECT 후 ORM으로 추가/수정하는 save_messages와 달리
+        배치 전체를 한 번의 존재 여부 조회와 다중 행 INSERT 문으로 저장합니다.
+        
+        Args:
+            messages: 저장할 메시지 딕셔너리 목록
+            channel_states: 같은 트랜잭션에서 갱신할 채널 수집 상태 목록
+                (guild_id, channel_id와 변경할 ChannelState 필드를 담은 딕셔너리)
+            backfill_ranges: 같은 트랜잭션에서 갱신할 백필 구간 상태 목록
+                (guild_id, channel_id, range_start와 변경할 BackfillRange 필드를 담은 딕셔너리)
+            
+        Returns:
+            {'inserted': 새로 추가된 수, 'updated': 갱신된 수} 딕셔너리
+        """
+        counts = {'inserted': 0, 'updated': 0}
+        rows = self._prepare_bulk_rows(messages)
+        if not rows and not channel_states and not backfill_ranges:
+            return counts
+        
+        table = DiscordMessage.__table__
+        
+        async def operation(session):
+            # 이미 저장된 메시지 ID 조회 (추가/갱신 수 구분용)
+            existing_ids = set()
+            ids = [row['id'] for row in rows]
+            for i in range(0, len(ids), self.BULK_PARAM_LIMIT):
+                result = await session.execute(
+                    select(table.c.id).where(table.c.id.in_(ids[i:i + self.BULK_PARAM_LIMIT]))
+                )
+                existing_ids.update(result.scalars().all())
+            
+            if rows:
+                await self._upsert_dimensions(session, messages)
+                await self._upsert_rows(session, table, rows, [table.c.id])
+            
+            # 메시지와 같은 트랜잭션에서 채널 커서 갱신 (커서가 저장되지 않은 메시지를 앞지르지 않도록)
+            if channel_states:
+                state_table = ChannelState.__table__
+                now = datetime.utcnow()
+                state_rows = [dict(state, updated_at=now) for state in channel_states]
+                await self._upsert_rows(
+                    session, state_table, state_rows,
+                    [state_table.c.guild_id, state_table.c.channel_id]
+                )
+            
+            if backfill_ranges:
+                range_table = BackfillRange.__table__
+                now = datetime.utcnow()
+                range_rows = [dict(range_state, updated_at=now) for range_state in backfill_ranges]
+                await self._upsert_rows(
+                    session, range_table, range_rows,
+                    [range_table.c.guild_id, range_table.c.channel_id, range_table.c.range_start]
+                )
+            return existing_ids
+        
+        try:
+            existing_ids = await self.writer.submit(operation)
+        except Exception as e:
+            logger.error(f"벌크 메시지 저장 중 오류 발생: {str(e)}")
+            return counts
+        
+        counts['updated'] = len(existing_ids)
+        counts['inserted'] = len(rows) - counts['updated']
+        self._notify_message_listeners(rows)
+        logger.debug(f"벌크 저장 완료: 추가 {counts['inserted']}개, 갱신 {counts['updated']}개")
+        return counts
+    
+    async def get_channel_states(self, guild_id):
+        """서버의 모든 채널 수집 상태를 한 번의 쿼리로 조회
+        
+        Args:
+            guild_id: 서버 ID
+            
+        Returns:
+            {채널 ID(int): ChannelState} 딕셔너리
+        """
+        try:
+            async with self.AsyncSessionLocal() as session:
+                query = select(ChannelState).where(ChannelState.guild_id == int(guild_id))
+                result = await session.execute(query)
+                return {state.channel_id: state for state in result.scalars().all()}
+        except Exception as e:
+            logger.error(f"채널 수집 상태 조회 중 오류 발생: {str(e)}")
+            return {}
+    
+    async def get_backfill_ranges(self, guild_id, channel_id):
+        """채널의 백필 구간 목록 조회 (최신 구간부터)"""
+        try:
+            async with self.AsyncSessionLocal() as session:
+                query = select(BackfillRange).where(
+                    BackfillRange.guild_id == int(guild_id),
+                    BackfillRange.channel_id == int(channel_id)
+                ).order_by(BackfillRange.range_start.desc())
+                result = await session.execute(query)
+                return result.scalars().all()
+        except Exception as e:
+            logger.error(f"백필 구간 조회 중 오류 발생: {str(e)}")
+            return []
+    
+    async def get_channel_state(self, guild_id, channel_id):
+        """채널 하나의 수집 상태 조회 (없으면 None)"""
+        try:
+            async with self.AsyncSessionLocal() as session:
+                return await session.get(ChannelState, (int(guild_id), int(channel_id)))
+        except Exception as e:
+            logger.error(f"채널 수집 상태 조회 중 오류 발생: {str(e)}")
+            return None
     
     async def get_message_count(self, guild_id=None, channel_id=None):
         """저장된 메시지 수 조회"""
@@ -217,11 +983,11 @@ class DatabaseManager:
             
             if guild_id and channel_id:
                 query = query.where(
-                    DiscordMessage.guild_id == str(guild_id),
-                    DiscordMessage.channel_id == str(channel_id)
+                    DiscordMessage.guild_id == int(guild_id),
+                    DiscordMessage.channel_id == int(channel_id)
                 )
             elif guild_id:
-                query = query.where(DiscordMessage.guild_id == str(guild_id))
+                query = query.where(DiscordMessage.guild_id == int(guild_id))
                 
             result = await session.execute(query)
             count = result.scalar()
@@ -234,58 +1000,52 @@ class DatabaseManager:
             logger.warning("봇 ID가 제공되지 않아 메시지를 삭제할 수 없습니다.")
             return 0
             
+        async def operation(session):
+            # 봇 ID에 해당하는 메시지 삭제
+            delete_stmt = delete(DiscordMessage).where(
+                DiscordMessage.author_id == int(bot_id)
+            )
+            result = await session.execute(delete_stmt)
+            return result.rowcount
+        
         try:
-            async with self.AsyncSessionLocal() as session:
-                # 삭제 전 메시지 수 확인
-                count_before = await self.get_message_count()
-                
-                # 봇 ID에 해당하는 메시지 삭제
-                delete_stmt = delete(DiscordMessage).where(
-                    DiscordMessage.author_id == str(bot_id)
-                )
-                
-                result = await session.execute(delete_stmt)
-                await session.commit()
-                
-                # 삭제 후 메시지 수 확인
-                count_after = await self.get_message_count()
-                deleted_count = count_before - count_after
-                
-                logger.info(f"봇 ID {bot_id}에 해당하는 메시지 {deleted_count}개를 삭제했습니다.")
-                return deleted_count
-                
+            deleted_count = await self.writer.submit(operation)
+            logger.info(f"봇 ID {bot_id}에 해당하는 메시지 {deleted_count}개를 삭제했습니다.")
+            return deleted_count
         except Exception as e:
             logger.error(f"봇 메시지 삭제 중 오류 발생: {str(e)}")
             return 0
             
     async def save_collection_metadata(self, key, value):
         """수집 메타데이터 저장"""
-        try:
-            async with self.AsyncSessionLocal() as session:
-                # 기존 메타데이터 조회
-                query = select(CollectionMetadata).where(
-                    CollectionMetadata.key == key
+        async def operation(session):
+            # 기존 메타데이터 조회
+            query = select(CollectionMetadata).where(
+                CollectionMetadata.key == key
+            )
+            result = await session.execute(query)
+            metadata = result.scalar()
+            
+            if metadata:
+                # 기존 메타데이터 업데이트
+                metadata.value = str(value)
+                metadata.updated_at = datetime.utcnow()
+            else:
+                # 새 메타데이터 생성
+                metadata = CollectionMetadata(
+                    key=key,
+                    value=str(value),
+                    updated_at=datetime.utcnow()
                 )
-                result = await session.execute(query)
-                metadata = result.scalar()
-                
-                if metadata:
-                    # 기존 메타데이터 업데이트
-                    metadata.value = str(value)
-                    metadata.updated_at = datetime.utcnow()
-                else:
-                    # 새 메타데이터 생성
-                    metadata = CollectionMetadata(
-                        key=key,
-                        value=str(value),
-                        updated_at=datetime.utcnow()
-                    )
-                    session.add(metadata)
-                
-                await session.commit()
-                logger.debug(f"메타데이터 저장 완료: {key}={value}")
-                return True
-                
+                session.add(metadata)
+            
+            # 같은 트랜잭션의 다른 작업이 같은 키를 조회할 수 있도록 반영
+            await session.flush()
+        
+        try:
+            await self.writer.submit(operation)
+            logger.debug(f"메타데이터 저장 완료: {key}={value}")
+            return True
         except Exception as e:
             logger.error(f"메타데이터 저장 중 오류 발생: {str(e)}")
             return False
@@ -330,22 +1090,26 @@ class DatabaseManager:
                 return None
         return None
 
-    async def get_last_message_id(self, channel_id):
+    async def get_last_message_id(self, channel_id, before_id=None):
         """지정된 채널의 가장 최근 메시지 ID를 조회
         
         Args:
             channel_id: 채널 ID
+            before_id: 이 ID보다 작은 메시지만 조회 (None이면 제한 없음)
             
         Returns:
             가장 최근 메시지 ID 또는 None
         """
         try:
             async with self.AsyncSessionLocal() as session:
-                # 생성 시간순으로 정렬하여 가장 최근 메시지 조회
-                query = select(DiscordMessage.message_id).where(
-                    DiscordMessage.channel_id == str(channel_id)
-                ).order_by(
-                    DiscordMessage.created_at.desc()
+                # 스노우플레이크 순서가 생성 시간순이므로 ID가 가장 큰 메시지 조회
+                query = select(DiscordMessage.id).where(
+                    DiscordMessage.channel_id == int(channel_id)
+                )
+                if before_id is not None:
+                    query = query.where(DiscordMessage.id < int(before_id))
+                query = query.order_by(
+                    DiscordMessage.id.desc()
                 ).limit(1)
                 
                 result = await session.execute(query)
@@ -356,6 +1120,85 @@ class DatabaseManager:
             logger.error(f"마지막 메시지 ID 조회 중 오류 발생: {str(e)}")
             return None
 
+    async def get_oldest_message_id(self, channel_id):
+        """지정된 채널에 저장된 가장 오래된 메시지 ID를 조회
+        
+        Args:
+            channel_id: 채널 ID
+            
+        Returns:
+            가장 오래된 메시지 ID 또는 None
+        """
+        try:
+            async with self.AsyncSessionLocal() as session:
+                query = select(DiscordMessage.id).where(
+                    DiscordMessage.channel_id == int(channel_id)
+                ).order_by(
+                    DiscordMessage.id.asc()
+                ).limit(1)
+                
+                result = await session.execute(query)
+                return result.scalar()
+        except Exception as e:
+            logger.error(f"가장 오래된 메시지 ID 조회 중 오류 발생: {str(e)}")
+            return None
+
+    async def get_pending_analysis(self, version, limit=1000):
+        """분석이 필요한 메시지 조회 (분석 대기 중이거나 이전 버전 분석기로 분석된 메시지)
+        
+        Args:
+            version: 현재 분석기 버전
+            limit: 최대 조회 수
+            
+        Returns:
+            [(id, content)] 목록
+        """
+        try:
+            async with self.AsyncSessionLocal() as session:
+                query = select(DiscordMessage.id, DiscordMessage.content).where(
+                    or_(DiscordMessage.analysis_version.is_(None), DiscordMessage.analysis_version < version)
+                ).limit(limit)
+                result = await session.execute(query)
+                return [tuple(row) for row in result.all()]
+        except Exception as e:
+            logger.error(f"분석 대기 메시지 조회 중 오류 발생: {str(e)}")
+            return []
+    
+    async def update_message_analysis(self, updates):
+        """메시지 분석 필드를 일괄 UPDATE
+        
+        조회 이후 내용이 수정된 메시지는 건너뛰어 (content 비교) 다음 실행에서 다시 분석합니다.
+        
+        Args:
+            updates: id, content(분석한 내용)와 분석 컬럼 값을 담은 딕셔너리 목록
+            
+        Returns:
+            갱신된 메시지 수
+        """
+        if not updates:
+            return 0
+        
+        table = DiscordMessage.__table__
+        columns = ['topics', 'message_type', 'structure_flags', 'markdown_flags', 'sections', 'analysis_version']
+        statement = update(table).where(
+            table.c.id == bindparam('b_id'),
+            table.c.content.is_not_distinct_from(bindparam('b_content'))
+        ).values({column: bindparam(f'b_{column}') for column in columns})
+        params = [
+            {'b_id': row['id'], 'b_content': row['content'], **{f'b_{column}': row.get(column) for column in columns}}
+            for row in updates
+        ]
+        
+        async def operation(session):
+            result = await session.execute(statement, params)
+            return result.rowcount
+        
+        try:
+            return await self.writer.submit(operation)
+        except Exception as e:
+            logger.error(f"메시지 분석 정보 갱신 중 오류 발생: {str(e)}")
+            return 0
+
 # 데이터베이스 매니저 인스턴스 생성 - 딕셔너리로 여러 인스턴스 관리
 db_managers = {}
 
@@ -0,0 +1,147 @@
+import logging
+
+from sqlalchemy import Table, Column, Integer, Text, MetaData, select, text, func, literal_column
+
+# 로깅 설정
+logger = logging.getLogger('discord.database')
+
+# 메시지 내용과 스레드 이름 전문 검색 인덱스 (FTS5, trigram 토크나이저)
+# trigram은 공백으로 단어를 나누지 않으므로 조사가 붙은 한국어도 부분 문자열로 찾을 수 있음
+FTS_TABLE = 'messages_fts'
+
+# FTS 인덱스의 외부 콘텐츠 (메시지 내용 + 메시지가 속한 스레드 이름)
+# 인덱스에는 토큰만 저장하고 원문은 discord_messages에서 읽어 본문이 중복 저장되지 않음
+FTS_SOURCE_VIEW = 'messages_fts_source'
+
+# 최소 검색어 길이 (trigram 인덱스는 3글자 미만 검색어를 찾을 수 없음)
+MIN_TERM_LENGTH = 3
+
+# 검색 쿼리 작성용 테이블 정의 (Base.metadata에 넣지 않아 create_all 대상에서 제외)
+messages_fts = Table(
+    FTS_TABLE, MetaData(),
+    Column('rowid', Integer, primary_key=True),
+    Column('content', Text),
+    Column('thread_name', Text),
+)
+
+# 메시지의 스레드 이름 (스레드가 아니면 NULL)
+_THREAD_NAME = "(SELECT name FROM channels WHERE id = {alias}.channel_id AND is_thread)"
+
+FTS_DDL = [
+    f"""CREATE VIEW IF NOT EXISTS {FTS_SOURCE_VIEW} AS
+        SELECT m.id AS id, m.content AS content, {_THREAD_NAME.format(alias='m')} AS thread_name
+        FROM discord_messages m""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, thread_name,
+        content='{FTS_SOURCE_VIEW}', content_rowid='id',
+        tokenize='trigram'
+    )""",
+    # 메시지 추가/삭제/내용 변경 시 인덱스 갱신
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON discord_messages BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, thread_name)
+        VALUES (NEW.id, NEW.content, {_THREAD_NAME.format(alias='NEW')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON discord_messages BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, thread_name)
+        VALUES ('delete', OLD.id, OLD.content, {_THREAD_NAME.format(alias='OLD')});
+    END""",
+    # 업서트는 내용이 같아도 UPDATE를 실행하므로 내용이나 채널이 바뀐 경우에만 다시 색인
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content, channel_id ON discord_messages
+        WHEN OLD.content IS NOT NEW.content OR OLD.channel_id IS NOT NEW.channel_id BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, thread_name)
+        VALUES ('delete', OLD.id, OLD.content, {_THREAD_NAME.format(alias='OLD')});
+        INSERT INTO {FTS_TABLE}(rowid, content, thread_name)
+        VALUES (NEW.id, NEW.content, {_THREAD_NAME.format(alias='NEW')});
+    END""",
+    # 스레드가 처음 저장되거나 이름이 바뀌면 해당 스레드의 메시지를 새 이름으로 다시 색인
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_channel_ai AFTER INSERT ON channels
+        WHEN NEW.is_thread AND NEW.name IS NOT NULL BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, thread_name)
+        SELECT 'delete', id, content, NULL FROM discord_messages WHERE channel_id = NEW.id;
+        INSERT INTO {FTS_TABLE}(rowid, content, thread_name)
+        SELECT id, content, NEW.name FROM discord_messages WHERE channel_id = NEW.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_channel_au AFTER UPDATE OF name, is_thread ON channels
+        WHEN (OLD.name IS NOT NEW.name OR OLD.is_thread IS NOT NEW.is_thread)
+        AND (OLD.is_thread OR NEW.is_thread) BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content, thread_name)
+        SELECT 'delete', id, content, CASE WHEN OLD.is_thread THEN OLD.name END
+        FROM discord_messages WHERE channel_id = NEW.id;
+        INSERT INTO {FTS_TABLE}(rowid, content, thread_name)
+        SELECT id, content, CASE WHEN NEW.is_thread THEN NEW.name END
+        FROM discord_messages WHERE channel_id = NEW.id;
+    END""",
+]
+
+FTS_TRIGGERS = [f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au', f'{FTS_TABLE}_channel_ai', f'{FTS_TABLE}_channel_au']
+
+def fts_exists(conn):
+    """전문 검색 인덱스 테이블이 있는지 확인"""
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first() is not None
+
+def create_fts_index(conn):
+    """전문 검색 인덱스, 원본 뷰, 동기화 트리거 생성 (이미 있으면 유지)
+
+    Args:
+        conn: 동기 SQLAlchemy 연결 (트랜잭션 안)
+
+    Returns:
+        인덱스 테이블을 새로 만들었으면 True (기존 메시지를 색인하려면 rebuild_fts_index 필요)
+    """
+    created = not fts_exists(conn)
+    for statement in FTS_DDL:
+        conn.execute(text(statement))
+    return created
+
+def drop_fts_index(conn, keep_index=False):
+    """동기화 트리거와 원본 뷰 삭제 (keep_index가 False면 인덱스 테이블도 삭제)
+
+    discord_messages를 다시 만들기 전에 호출합니다. SQLite는 테이블 이름을 바꿀 때
+    없는 테이블을 참조하는 뷰/트리거가 있으면 실패합니다.
+    """
+    for trigger in FTS_TRIGGERS:
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    conn.execute(text(f'DROP VIEW IF EXISTS {FTS_SOURCE_VIEW}'))
+    if not keep_index:
+        conn.execute(text(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+
+def rebuild_fts_index(conn):
+    """저장된 모든 메시지로 전문 검색 인덱스를 다시 만들고 병합
+
+    Returns:
+        색인된 메시지 수
+    """
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    return conn.execute(text('SELECT COUNT(*) FROM discord_messages')).scalar()
+
+def fts_phrase(term):
+    """검색어를 FTS5 구문(큰따옴표 문자열)으로 변환 (trigram 인덱스에서는 부분 문자열 검색)"""
+    return '"' + term.replace('"', '""') + '"'
+
+def fts_contains(term):
+    """메시지 내용에 term이 들어 있는 메시지 ID를 전문 검색 인덱스에서 찾는 서브쿼리
+
+    trigram 인덱스의 구문 검색은 대소문자 구분 없는 부분 문자열 검색입니다.
+    (LIKE도 인덱스로 처리되지만 ESCAPE 절이 있으면 전체를 훑으므로 MATCH 사용)
+    term이 MIN_TERM_LENGTH보다 짧으면 인덱스를 사용할 수 없으므로 호출하기 전에 확인해야 합니다.
+    """
+    return select(messages_fts.c.rowid).where(
+        messages_fts.c.content.op('MATCH')(fts_phrase(term))
+    )
+
+def fts_match(terms):
+    """terms 중 하나라도 들어 있는 행을 찾는 MATCH 조건 (FROM에 messages_fts가 있어야 함)"""
+    expression = ' OR '.join(fts_phrase(term) for term in terms)
+    return literal_column(FTS_TABLE).op('MATCH')(expression)
+
+def fts_bm25(content_weight=1.0, thread_weight=0.5):
+    """MATCH 결과의 BM25 점수 (음수, 작을수록 관련성 높음)
+
+    Args:
+        content_weight: 메시지 내용 컬럼 가중치
+        thread_weight: 스레드 이름 컬럼 가중치
+    """
+    return func.bm25(literal_column(FTS_TABLE), content_weight, thread_weight)
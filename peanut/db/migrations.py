@@ -0,0 +1,497 @@
+import os
+import sys
+import glob
+import json
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from .fts import drop_fts_index
+from .database import (
+    encode_flags, encode_sections, legacy_sections_to_spans,
+    MARKDOWN_FLAGS, STRUCTURE_FLAGS
+)
+
+# 로깅 설정
+logger = logging.getLogger('discord.database')
+
+# 등록된 마이그레이션 목록 [(버전, 설명, 함수)]
+MIGRATIONS = []
+
+def migration(version, description):
+    """스키마 마이그레이션 등록 데코레이터
+
+    마이그레이션 함수는 동기 엔진을 받아 실행되며, 중간에 중단되어도 다시 실행할 수 있도록
+    이미 적용된 변경은 건너뛰어야 합니다. 버전은 성공한 뒤에만 PRAGMA user_version에 기록됩니다.
+    """
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+def get_schema_version(engine):
+    """데이터베이스에 기록된 스키마 버전 (PRAGMA user_version)"""
+    with engine.connect() as conn:
+        return conn.execute(text('PRAGMA user_version')).scalar() or 0
+
+def set_schema_version(engine, version):
+    """스키마 버전 기록"""
+    with engine.begin() as conn:
+        conn.execute(text(f'PRAGMA user_version = {int(version)}'))
+
+def latest_version():
+    """등록된 마이그레이션의 최신 버전"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def run_migrations(engine, fresh=False):
+    """아직 적용되지 않은 마이그레이션을 버전 순서대로 실행
+
+    Args:
+        engine: 동기 SQLAlchemy 엔진
+        fresh: 방금 create_all로 최신 스키마를 만든 데이터베이스면 True (실행 없이 최신 버전 기록)
+
+    Returns:
+        적용한 마이그레이션 수
+    """
+    if fresh:
+        set_schema_version(engine, latest_version())
+        return 0
+
+    current = get_schema_version(engine)
+    applied = 0
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"스키마 마이그레이션 {version} 적용 중: {description}")
+        func(engine)
+        set_schema_version(engine, version)
+        applied += 1
+    return applied
+
+def _columns(engine, table_name):
+    return {column['name'] for column in inspect(engine).get_columns(table_name)}
+
+def _add_columns(engine, table_name, columns):
+    """없는 컬럼만 추가 [(이름, 타입, 인덱스 여부)]"""
+    existing = _columns(engine, table_name)
+    with engine.begin() as conn:
+        for name, column_type, indexed in columns:
+            if name not in existing:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+                logger.info(f"테이블 {table_name}에 컬럼 {name} 추가")
+            if indexed:
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table_name}_{name} ON {table_name} ({name})'))
+
+def _load_json_list(value):
+    """JSON 배열 텍스트를 목록으로 변환 (해석할 수 없으면 빈 목록)"""
+    if not value:
+        return []
+    try:
+        loaded = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return loaded if isinstance(loaded, list) else []
+
+@migration(1, "스레드 수집, 분석 버전, 분석 비트마스크 컬럼 추가")
+def add_collection_columns(engine):
+    _add_columns(engine, 'channel_state', [
+        ('parent_id', 'BIGINT', True),
+        ('threads_synced_at', 'DATETIME', False),
+    ])
+    _add_columns(engine, 'discord_messages', [
+        ('analysis_version', 'INTEGER', True),
+        ('structure_flags', 'INTEGER', False),
+        ('markdown_flags', 'INTEGER', False),
+    ])
+
+    # 이전 수집기가 저장하면서 분석한 행은 분석기 버전 1과 결과가 같으므로 분석 완료로 표시
+    # (NULL이면 분석 대기로 보고 백그라운드 분석 작업이 전체 기록을 다시 분석함)
+    # 분석하지 않은 행(message_type이 NULL)과 마이그레이션 3에서 변환하지 못한 행만 NULL로 남음
+    with engine.begin() as conn:
+        stamped = conn.execute(text(
+            'UPDATE discord_messages SET analysis_version = 1 '
+            'WHERE analysis_version IS NULL AND message_type IS NOT NULL'
+        )).rowcount
+    if stamped:
+        logger.info(f"이미 분석된 메시지 {stamped}개를 분석기 버전 1로 표시했습니다.")
+
+@migration(2, "markdown_used/content_structure JSON을 비트마스크로 변환")
+def convert_analysis_flags(engine, batch_size=5000):
+    """batch_size개씩 변환하고 커밋하므로 중단되어도 다음 실행에서 이어서 진행"""
+    columns = _columns(engine, 'discord_messages')
+    if 'markdown_used' not in columns and 'content_structure' not in columns:
+        return
+
+    # 한쪽 컬럼만 남아 있으면 변환 쿼리를 위해 빈 컬럼을 임시로 추가 (마지막에 함께 삭제)
+    with engine.begin() as conn:
+        for column in ('markdown_used', 'content_structure'):
+            if column not in columns:
+                conn.execute(text(f'ALTER TABLE discord_messages ADD COLUMN {column} TEXT'))
+
+    converted = 0
+    last_rowid = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                'SELECT rowid, markdown_used, content_structure FROM discord_messages '
+                'WHERE rowid > :last AND (markdown_used IS NOT NULL OR content_structure IS NOT NULL) '
+                'ORDER BY rowid LIMIT :limit'
+            ), {'last': last_rowid, 'limit': batch_size}).all()
+            if not rows:
+                break
+
+            params = [
+                {
+                    'rowid': rowid,
+                    'markdown_flags': encode_flags(_load_json_list(markdown_json), MARKDOWN_FLAGS),
+                    'structure_flags': encode_flags(_load_json_list(structure_json), STRUCTURE_FLAGS),
+                }
+                for rowid, markdown_json, structure_json in rows
+            ]
+            conn.execute(text(
+                'UPDATE discord_messages SET markdown_flags = :markdown_flags, structure_flags = :structure_flags, '
+                'markdown_used = NULL, content_structure = NULL WHERE rowid = :rowid'
+            ), params)
+            last_rowid = rows[-1][0]
+            converted += len(rows)
+
+    if converted:
+        logger.info(f"메시지 {converted}개의 마크다운/구조 정보를 비트마스크로 변환했습니다.")
+
+    # 모든 행을 변환했으므로 JSON 컬럼 삭제 (SQLite 3.35 이상)
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        with engine.begin() as conn:
+            for column in ('markdown_used', 'content_structure'):
+                conn.execute(text(f'ALTER TABLE discord_messages DROP COLUMN {column}'))
+
+@migration(3, "sections를 content 내 위치 형식으로 변환")
+def convert_sections_to_offsets(engine, batch_size=2000):
+    """batch_size개씩 읽고 변환해 커밋 (위치를 찾을 수 없는 행은 분석 대기로 표시)"""
+    converted = 0
+    reanalyze = 0
+    last_rowid = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT rowid, content, sections FROM discord_messages "
+                "WHERE rowid > :last AND sections LIKE '[{%' ORDER BY rowid LIMIT :limit"
+            ), {'last': last_rowid, 'limit': batch_size}).all()
+            if not rows:
+                break
+
+            params = []
+            pending = []
+            for rowid, content, sections_json in rows:
+                spans = legacy_sections_to_spans(content, _load_json_list(sections_json))
+                if spans is None:
+                    pending.append({'rowid': rowid})
+                else:
+                    params.append({'rowid': rowid, 'sections': encode_sections(spans)})
+            if params:
+                conn.execute(text('UPDATE discord_messages SET sections = :sections WHERE rowid = :rowid'), params)
+            if pending:
+                conn.execute(text(
+                    'UPDATE discord_messages SET sections = NULL, analysis_version = NULL WHERE rowid = :rowid'
+                ), pending)
+            last_rowid = rows[-1][0]
+            converted += len(params)
+            reanalyze += len(pending)
+
+    if converted or reanalyze:
+        logger.info(f"메시지 {converted}개의 섹션 정보를 위치 형식으로 변환했습니다. (다시 분석할 메시지: {reanalyze}개)")
+
+@migration(4, "채널/서버별 시간순 복합 인덱스와 내용 있는 메시지 부분 인덱스 추가")
+def add_message_time_indexes(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_discord_messages_channel_created '
+            'ON discord_messages (channel_id, created_at)'
+        ))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_discord_messages_guild_created '
+            'ON discord_messages (guild_id, created_at)'
+        ))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_discord_messages_content_created '
+            "ON discord_messages (created_at) WHERE content IS NOT NULL AND content != ''"
+        ))
+        # 복합 인덱스의 앞 컬럼으로 대체되는 단일 컬럼 인덱스 삭제
+        conn.execute(text('DROP INDEX IF EXISTS ix_discord_messages_channel_id'))
+        conn.execute(text('DROP INDEX IF EXISTS ix_discord_messages_guild_id'))
+        conn.execute(text('ANALYZE discord_messages'))
+
+# discord_messages에 이름을 저장하던 시절의 컬럼 (정규화 테이블로 옮긴 뒤 삭제)
+NAME_COLUMNS = {'guild_name', 'channel_name', 'author_name', 'thread_name', 'parent_channel_name', 'message_url'}
+
+def _populate_dimensions(engine):
+    """discord_messages의 이름 컬럼으로 guilds/channels/authors 테이블 채우기 (ID별 가장 최근 이름)"""
+    columns = _columns(engine, 'discord_messages')
+    if not columns & NAME_COLUMNS:
+        return
+
+    # 가장 최근 메시지의 이름을 사용 (SQLite는 MAX()와 함께 조회한 다른 컬럼을 그 행의 값으로 반환)
+    newest = 'created_at' if 'created_at' in columns else 'id'
+
+    def as_id(column):
+        return f"CAST(NULLIF({column}, '') AS INTEGER)"
+
+    with engine.begin() as conn:
+        # 전문 검색 트리거가 이름 변경을 색인에 반영하지 않도록 제거 (시작 시 다시 만들고 색인)
+        drop_fts_index(conn)
+        if 'guild_name' in columns:
+            conn.execute(text(
+                'INSERT OR REPLACE INTO guilds (id, name, updated_at) '
+                f'SELECT id, name, CURRENT_TIMESTAMP FROM (SELECT {as_id("guild_id")} AS id, guild_name AS name, MAX({newest}) '
+                "FROM discord_messages WHERE guild_name IS NOT NULL GROUP BY 1) WHERE id IS NOT NULL"
+            ))
+        if 'author_name' in columns:
+            conn.execute(text(
+                'INSERT OR REPLACE INTO authors (id, name, updated_at) '
+                f'SELECT id, name, CURRENT_TIMESTAMP FROM (SELECT {as_id("author_id")} AS id, author_name AS name, MAX({newest}) '
+                "FROM discord_messages WHERE author_name IS NOT NULL GROUP BY 1) WHERE id IS NOT NULL"
+            ))
+        if 'channel_name' in columns:
+            thread_name = 'thread_name' if 'thread_name' in columns else 'NULL'
+            conn.execute(text(
+                'INSERT OR REPLACE INTO channels (id, guild_id, name, parent_id, is_thread, updated_at) '
+                'SELECT id, guild_id, name, parent_id, is_thread, CURRENT_TIMESTAMP FROM ('
+                f'SELECT {as_id("channel_id")} AS id, {as_id("guild_id")} AS guild_id, '
+                f'COALESCE(CASE WHEN is_thread THEN {thread_name} END, channel_name) AS name, '
+                f'{as_id("parent_channel_id")} AS parent_id, COALESCE(is_thread, 0) AS is_thread, MAX({newest}) '
+                'FROM discord_messages GROUP BY 1) WHERE id IS NOT NULL'
+            ))
+        if 'parent_channel_name' in columns:
+            # 메시지가 수집되지 않은 부모 채널 (포럼 등)만 추가
+            conn.execute(text(
+                'INSERT OR IGNORE INTO channels (id, guild_id, name, is_thread, updated_at) '
+                'SELECT id, guild_id, name, 0, CURRENT_TIMESTAMP FROM ('
+                f'SELECT {as_id("parent_channel_id")} AS id, {as_id("guild_id")} AS guild_id, '
+                f'parent_channel_name AS name, MAX({newest}) '
+                'FROM discord_messages WHERE parent_channel_name IS NOT NULL GROUP BY 1) WHERE id IS NOT NULL'
+            ))
+
+    with engine.connect() as conn:
+        counts = [conn.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar() for table in ('guilds', 'channels', 'authors')]
+    logger.info(f"이름 정규화 테이블 생성: 서버 {counts[0]}개, 채널 {counts[1]}개, 작성자 {counts[2]}개")
+
+# 마이그레이션이 다시 만드는 discord_messages 스키마 [(컬럼, 타입)]와 인덱스
+# 모델이 바뀌어도 이미 배포된 마이그레이션의 결과가 달라지지 않도록 모델 대신 여기에 고정합니다.
+MESSAGES_V5_COLUMNS = [
+    ('id', 'INTEGER NOT NULL'),
+    ('channel_id', 'BIGINT'),
+    ('guild_id', 'BIGINT'),
+    ('author_id', 'BIGINT'),
+    ('author_name', 'VARCHAR'),
+    ('content', 'TEXT'),
+    ('attachments_count', 'INTEGER'),
+    ('attachments_urls', 'TEXT'),
+    ('collected_at', 'DATETIME'),
+    ('channel_name', 'VARCHAR'),
+    ('guild_name', 'VARCHAR'),
+    ('message_url', 'VARCHAR'),
+    ('is_thread', 'BOOLEAN'),
+    ('thread_name', 'VARCHAR'),
+    ('parent_channel_id', 'BIGINT'),
+    ('parent_channel_name', 'VARCHAR'),
+    ('topics', 'TEXT'),
+    ('message_type', 'VARCHAR'),
+    ('structure_flags', 'INTEGER'),
+    ('markdown_flags', 'INTEGER'),
+    ('sections', 'TEXT'),
+    ('analysis_version', 'INTEGER'),
+]
+
+MESSAGES_V6_COLUMNS = [column for column in MESSAGES_V5_COLUMNS if column[0] not in NAME_COLUMNS]
+
+MESSAGES_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_discord_messages_channel_id ON discord_messages (channel_id)',
+    'CREATE INDEX IF NOT EXISTS ix_discord_messages_guild_id ON discord_messages (guild_id)',
+    'CREATE INDEX IF NOT EXISTS ix_discord_messages_author_id ON discord_messages (author_id)',
+    'CREATE INDEX IF NOT EXISTS ix_discord_messages_analysis_version ON discord_messages (analysis_version)',
+    # 마이그레이션 4의 (created_at) 부분 인덱스를 대신함 (id가 스노우플레이크라 시간순)
+    'CREATE INDEX IF NOT EXISTS ix_discord_messages_content_created '
+    "ON discord_messages (id) WHERE content IS NOT NULL AND content != ''",
+]
+
+def _rebuild_messages_table(engine, schema, batch_size=10000):
+    """discord_messages를 주어진 스키마로 다시 만들어 batch_size개씩 복사
+
+    스키마에 없는 컬럼은 버리고, ID 컬럼은 정수로 변환합니다 (빈 문자열은 NULL).
+    복사 중 중단되면 다음 실행에서 처음부터 다시 복사합니다.
+
+    Args:
+        engine: 동기 SQLAlchemy 엔진
+        schema: 새 테이블의 [(컬럼, 타입)] (첫 컬럼 id가 기본 키)
+        batch_size: 한 트랜잭션에서 복사할 행 수
+
+    Returns:
+        복사한 메시지 수
+    """
+    columns = _columns(engine, 'discord_messages')
+    column_ddl = ', '.join(f'{name} {column_type}' for name, column_type in schema)
+    with engine.begin() as conn:
+        # 테이블을 참조하는 전문 검색 뷰/트리거가 있으면 이름을 바꿀 수 없으므로 제거 (시작 시 다시 만들고 색인)
+        drop_fts_index(conn)
+        conn.execute(text('DROP TABLE IF EXISTS discord_messages_new'))
+        conn.execute(text(f'CREATE TABLE discord_messages_new ({column_ddl}, PRIMARY KEY (id))'))
+
+    integer_columns = {'channel_id', 'guild_id', 'author_id', 'parent_channel_id'}
+    target = ['id']
+    source = ['CAST(id AS INTEGER)']
+    for name, _ in schema:
+        if name == 'id' or name not in columns:
+            continue
+        target.append(name)
+        if name in integer_columns:
+            source.append(f"CAST(NULLIF({name}, '') AS INTEGER)")
+        else:
+            source.append(name)
+
+    copy_sql = text(
+        f"INSERT OR REPLACE INTO discord_messages_new ({', '.join(target)}) "
+        f"SELECT {', '.join(source)} FROM discord_messages "
+        "WHERE rowid > :last AND rowid <= :upper AND id GLOB '[0-9]*'"
+    )
+
+    copied = 0
+    last_rowid = 0
+    while True:
+        with engine.begin() as conn:
+            # 이번 배치의 마지막 rowid (남은 행이 batch_size보다 적으면 최대 rowid)
+            upper = conn.execute(text(
+                'SELECT rowid FROM discord_messages WHERE rowid > :last ORDER BY rowid LIMIT 1 OFFSET :offset'
+            ), {'last': last_rowid, 'offset': batch_size - 1}).scalar()
+            if upper is None:
+                upper = conn.execute(text('SELECT MAX(rowid) FROM discord_messages')).scalar()
+            if upper is None or upper <= last_rowid:
+                break
+            copied += conn.execute(copy_sql, {'last': last_rowid, 'upper': upper}).rowcount
+            last_rowid = upper
+
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE discord_messages'))
+        conn.execute(text('ALTER TABLE discord_messages_new RENAME TO discord_messages'))
+        for statement in MESSAGES_INDEXES:
+            conn.execute(text(statement))
+        conn.execute(text('ANALYZE discord_messages'))
+    return copied
+
+@migration(5, "메시지 ID를 정수 스노우플레이크 기본 키(rowid)로 변환하고 중복 컬럼 제거")
+def convert_message_ids_to_integer(engine, batch_size=10000):
+    """문자열 id/message_id와 created_at 컬럼을 정수 id 하나로 합치고 (created_at은 id에서 계산)
+    채널/서버/작성자 ID를 정수로 바꿉니다.
+    """
+    if 'message_id' not in _columns(engine, 'discord_messages'):
+        return
+
+    copied = _rebuild_messages_table(engine, MESSAGES_V5_COLUMNS, batch_size)
+    logger.info(f"메시지 {copied}개를 정수 기본 키 스키마로 복사했습니다.")
+
+@migration(6, "서버/채널/작성자 이름을 정규화 테이블로 분리하고 message_url 컬럼 제거")
+def normalize_message_names(engine, batch_size=10000):
+    if not _columns(engine, 'discord_messages') & NAME_COLUMNS:
+        return
+
+    _populate_dimensions(engine)
+    copied = _rebuild_messages_table(engine, MESSAGES_V6_COLUMNS, batch_size)
+    logger.info(f"메시지 {copied}개에서 이름 컬럼을 제거했습니다.")
+
+@migration(7, "다시 만든 메시지 테이블에 내용 있는 메시지 부분 인덱스 복구")
+def restore_content_index(engine):
+    with engine.begin() as conn:
+        for statement in MESSAGES_INDEXES:
+            conn.execute(text(statement))
+        conn.execute(text('ANALYZE discord_messages'))
+
+@migration(8, "채널별 마지막 수집 시간 메타데이터를 channel_state 폴링 커서로 변환")
+def convert_channel_collection_metadata(engine):
+    """last_collected_channel_{채널 ID} 메타데이터를 channel_state 행으로 옮기고 삭제
+
+    이전 수집기는 실시간 수집 없이 폴링으로만 저장했으므로 채널에 저장된 가장 최근 메시지를
+    폴링 커서로 사용합니다. 이미 channel_state가 있는 채널은 그대로 둡니다.
+    """
+    prefix = 'last_collected_channel_'
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            'SELECT key, value FROM collection_metadata WHERE substr(key, 1, :length) = :prefix'
+        ), {'length': len(prefix), 'prefix': prefix}).all()
+
+        converted = 0
+        for key, value in rows:
+            channel_id = key[len(prefix):]
+            if not channel_id.isdigit():
+                continue
+            channel_id = int(channel_id)
+            try:
+                # DateTime 컬럼과 같은 텍스트 형식으로 저장
+                collected_at = datetime.strptime(value, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S.%f')
+            except (TypeError, ValueError):
+                collected_at = None
+
+            # SQLite는 MAX()와 함께 조회한 다른 컬럼을 그 행의 값으로 반환
+            guild_id, last_message_id = conn.execute(text(
+                'SELECT guild_id, MAX(id) FROM discord_messages WHERE channel_id = :channel_id'
+            ), {'channel_id': channel_id}).one()
+            if guild_id is None:
+                guild_id = conn.execute(text(
+                    'SELECT guild_id FROM channels WHERE id = :channel_id'
+                ), {'channel_id': channel_id}).scalar()
+            if guild_id is None:
+                continue
+
+            converted += conn.execute(text(
+                'INSERT OR IGNORE INTO channel_state '
+                '(guild_id, channel_id, last_message_id, backfill_complete, last_seen_count, last_collected_at, updated_at) '
+                'VALUES (:guild_id, :channel_id, :last_message_id, 0, 0, :last_collected_at, CURRENT_TIMESTAMP)'
+            ), {
+                'guild_id': guild_id,
+                'channel_id': channel_id,
+                'last_message_id': last_message_id,
+                'last_collected_at': collected_at,
+            }).rowcount
+
+        conn.execute(text(
+            'DELETE FROM collection_metadata WHERE substr(key, 1, :length) = :prefix'
+        ), {'length': len(prefix), 'prefix': prefix})
+
+    if rows:
+        logger.info(f"채널 수집 메타데이터 {len(rows)}개 중 {converted}개를 channel_state로 옮겼습니다.")
+
+def main(argv=None):
+    """기존 데이터베이스 파일에 마이그레이션 적용 (python -m peanut.db.migrations [--rebuild-fts] [파일 ...])
+
+    파일을 지정하지 않으면 peanut/db 폴더의 모든 .db 파일(서버별 데이터베이스 포함)을 변환합니다.
+    """
+    from .database import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Peanut 데이터베이스 스키마 마이그레이션')
+    parser.add_argument('paths', nargs='*', help='마이그레이션할 데이터베이스 파일 (기본: peanut/db/*.db)')
+    parser.add_argument('--vacuum', action='store_true', help='마이그레이션 후 VACUUM으로 파일 크기 줄이기')
+    parser.add_argument('--rebuild-fts', action='store_true', help='전문 검색 인덱스를 저장된 메시지로 다시 만들기')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.db')))
+    if not paths:
+        print('마이그레이션할 데이터베이스 파일이 없습니다.')
+        return 0
+
+    for path in paths:
+        before = os.path.getsize(path) if os.path.exists(path) else 0
+        db_manager = DatabaseManager(os.path.abspath(path))
+        if args.rebuild_fts:
+            db_manager.rebuild_fts_index()
+        if args.vacuum:
+            with db_manager.engine.connect() as conn:
+                conn.execute(text('VACUUM'))
+        db_manager.engine.dispose()
+        after = os.path.getsize(path)
+        print(f'{path}: 스키마 버전 {get_schema_version(db_manager.engine)}, {before:,} → {after:,} bytes')
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    sys.exit(main())
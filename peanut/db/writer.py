@@ -0,0 +1,134 @@
+import time
+import asyncio
+import logging
+
+# 로깅 설정
+logger = logging.getLogger('discord.database')
+
+class DatabaseWriter:
+    """데이터베이스 하나의 쓰기를 전담하는 단일 작성자
+
+    SQLite는 한 번에 한 연결만 쓸 수 있으므로 DatabaseManager의 모든 쓰기 작업을
+    큐에 넣고 작업 태스크 하나가 순서대로 실행합니다. 큐에 쌓인 작업은 coalesce_interval초
+    동안 더 모아 한 트랜잭션으로 커밋하고, 호출자는 작업별 future로 결과를 받습니다.
+    """
+
+    def __init__(self, session_factory, coalesce_interval=0.02, max_operations=100):
+        self.session_factory = session_factory
+        self.coalesce_interval = max(0.0, float(coalesce_interval))
+        self.max_operations = max(1, int(max_operations))
+        self._queue = None
+        self._task = None
+
+        # 통계
+        self.transaction_count = 0
+        self.operation_count = 0
+        self.failed_count = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_started(self):
+        """현재 이벤트 루프에서 작업 태스크가 돌고 있지 않으면 시작"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, operation):
+        """쓰기 작업을 큐에 넣고 커밋될 때까지 대기
+
+        Args:
+            operation: AsyncSession을 받아 쓰기를 수행하는 코루틴 함수 (커밋하지 않아야 함)
+
+        Returns:
+            operation의 반환값 (작업이나 커밋이 실패하면 예외 발생)
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _run(self):
+        """큐에서 작업을 모아 한 트랜잭션씩 실행"""
+        while True:
+            batch = [await self._queue.get()]
+
+            # 잠시 기다리며 함께 커밋할 작업을 더 모음
+            deadline = time.monotonic() + self.coalesce_interval
+            while len(batch) < self.max_operations:
+                if self._queue.empty():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            started = time.monotonic()
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                # _execute는 오류를 future로 전달하므로 여기까지 오면 예상하지 못한 오류
+                logger.error(f"데이터베이스 쓰기 작업 실행 중 오류 발생: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self.busy_seconds += time.monotonic() - started
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, batch):
+        """작업 묶음을 한 트랜잭션으로 실행 (실패하면 작업마다 따로 다시 실행)"""
+        async with self.session_factory() as session:
+            try:
+                results = []
+                for operation, _ in batch:
+                    results.append(await operation(session))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                if len(batch) == 1:
+                    self.failed_count += 1
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                    return
+                error = e
+            else:
+                error = None
+
+        if error is not None:
+            # 묶음 중 하나가 실패하면 나머지 작업이 함께 실패하지 않도록 하나씩 다시 실행
+            logger.debug(f"묶음 쓰기 실패, 작업 {len(batch)}개를 따로 실행합니다: {str(error)}")
+            for item in batch:
+                await self._execute([item])
+            return
+
+        self.transaction_count += 1
+        self.operation_count += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """큐에 남은 작업을 모두 실행한 뒤 작업 태스크 종료"""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self):
+        """트랜잭션/작업 통계 반환"""
+        return {
+            'transactions': self.transaction_count,
+            'operations': self.operation_count,
+            'failed': self.failed_count,
+            'busy_seconds': round(self.busy_seconds, 3),
+        }
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from .config import get_config
+from ..db.database import encode_flags, encode_sections, MARKDOWN_FLAGS, STRUCTURE_FLAGS
+
+# 로깅 설정
+logger = logging.getLogger('discord.analyzer')
+
+# 분석기 버전 (분석 규칙을 바꾸면 올려서 기존 메시지를 백그라운드에서 다시 분석)
+ANALYZER_VERSION = 1
+
+# 마크다운 패턴 (모듈 로드 시 한 번만 컴파일)
+MARKDOWN_PATTERNS = {
+    'code_block': re.compile(r'```(?:\w+)?\n(.+?)\n```', re.DOTALL),
+    'inline_code': re.compile(r'`([^`]+)`'),
+    'bold': re.compile(r'\*\*(.+?)\*\*'),
+    'italic': re.compile(r'\*(.+?)\*'),
+    'heading': re.compile(r'^#{1,6}\s+(.+?)$', re.MULTILINE),
+    'bullet_list': re.compile(r'^\s*[\*\-\+]\s+(.+?)$', re.MULTILINE),
+    'numbered_list': re.compile(r'^\s*\d+\.\s+(.+?)$', re.MULTILINE),
+    'blockquote': re.compile(r'^\s*>\s+(.+?)$', re.MULTILINE),
+    'link': re.compile(r'\[(.+?)\]\((.+?)\)')
+}
+
+# 메시지 유형 패턴 (하나라도 일치하면 해당 유형)
+QUESTION_PATTERN = re.compile(r'\?$|어떻게|무엇|언제|어디|누구|왜|질문|알려줘|알고 싶어')
+EXPLANATION_PATTERN = re.compile(r'설명|방법|다음과 같이|다음과 같은|입니다|됩니다|~입니다|~됩니다')
+
+# 섹션 분석 패턴
+SECTION_SPLIT_PATTERN = re.compile(r'\n\s*\n')
+TITLE_PATTERNS = [
+    # 제목 다음 개행
+    (re.compile(r'^([^\n:]+)[\s]*\n', re.MULTILINE), 1),
+    # 물음표로 끝나는 문장
+    (re.compile(r'^([^\n]+\?)[\s]*\n', re.MULTILINE), 1),
+    # 콜론으로 구분된 형태 (제목: 내용)
+    (re.compile(r'^([^:]+):(.+)$', re.MULTILINE), 1)
+]
+SUBTOPIC_PATTERN = re.compile(r'^([^:]+):\s*(.+)$', re.MULTILINE)
+
+# 숫자 목록 제목 또는 구분선(----, ====)으로 나뉜 섹션
+SECTION_DIVIDER_PATTERN = re.compile(r'\d+\.\s+(.+?)\n|^-+\s*$|^=+\s*$', re.MULTILINE)
+
+def empty_analysis() -> Dict[str, Any]:
+    """내용이 없는 메시지의 분석 결과"""
+    return {
+        'topics': [],
+        'sections': [],
+        'section_spans': [],
+        'markdown_used': [],
+        'message_type': 'unknown',
+        'content_structure': []
+    }
+
+def _split_sections(content: str) -> List[Tuple[str, int]]:
+    """빈 줄 기준으로 나눈 (섹션 텍스트, content 내 시작 위치) 목록"""
+    parts = []
+    position = 0
+    for separator in SECTION_SPLIT_PATTERN.finditer(content):
+        parts.append((content[position:separator.start()], position))
+        position = separator.end()
+    parts.append((content[position:], position))
+    return parts
+
+def _leading_space(text: str) -> int:
+    """strip()으로 제거되는 앞쪽 공백 길이"""
+    return len(text) - len(text.lstrip())
+
+def analyze_content(content: str) -> Dict[str, Any]:
+    """메시지 내용을 분석하여 주제, 마크다운, 콘텐츠 구조, 섹션 등을 추출
+
+    Args:
+        content: 메시지 내용
+
+    Returns:
+        분석 결과 딕셔너리
+    """
+    if not content:
+        return empty_analysis()
+
+    markdown_used = [md_type for md_type, pattern in MARKDOWN_PATTERNS.items() if pattern.search(content)]
+    content_structure = []
+    topics = []
+
+    # 메시지 유형 판단 (질문 > 설명 > 코드 순으로 우선)
+    if QUESTION_PATTERN.search(content):
+        message_type = 'question'
+    elif EXPLANATION_PATTERN.search(content):
+        message_type = 'explanation'
+    elif 'code_block' in markdown_used:
+        # 코드 블록 패턴이 일치하면 ``` 가 두 번 이상 있음
+        message_type = 'code'
+    else:
+        message_type = 'text'
+
+    # 헤더 기반 구조
+    if 'heading' in markdown_used:
+        content_structure.append('headers')
+
+    # 줄바꿈 기반 단락
+    paragraph_count = 0
+    for paragraph in content.split('\n\n'):
+        if paragraph.strip():
+            paragraph_count += 1
+            if paragraph_count > 1:
+                content_structure.append('paragraphs')
+                break
+
+    # 목록 구조
+    if 'bullet_list' in markdown_used or 'numbered_list' in markdown_used:
+        content_structure.append('lists')
+
+    # 빈 줄 기준으로 섹션 분리
+    raw_sections = _split_sections(content)
+    if len(raw_sections) > 1:
+        content_structure.append('multi_section')
+
+    sections = []
+    section_spans = []  # 섹션별 content 내 위치 [시작, 끝, 제목 시작, 제목 끝, 하위 주제 시작, 끝, ...]
+    for section_text, section_offset in raw_sections:
+        stripped = section_text.strip()
+        if not stripped:
+            continue
+
+        section = {"content": stripped, "subtopics": [], "title": ""}
+        start = section_offset + _leading_space(section_text)
+        span = [start, start + len(stripped), start, start]
+
+        # 첫 줄이나 패턴에서 섹션 제목 추출
+        first_line = stripped.split('\n', 1)[0]
+        potential_title = first_line.strip()
+        title_start = start + _leading_space(first_line)
+        for pattern, group in TITLE_PATTERNS:
+            title_match = pattern.match(section_text)
+            if title_match:
+                potential_title = title_match.group(group).strip()
+                title_start = section_offset + title_match.start(group) + _leading_space(title_match.group(group))
+                break
+
+        if potential_title.endswith('?') or len(potential_title) < 50:
+            section["title"] = potential_title
+            span[2:4] = [title_start, title_start + len(potential_title)]
+            topics.append(potential_title)
+
+        # 하위 주제 추출 (콜론으로 구분된 경우)
+        for subtopic_match in SUBTOPIC_PATTERN.finditer(section_text):
+            topic = subtopic_match.group(1).strip()
+            if topic and topic != section["title"] and len(topic) < 50:
+                topic_start = section_offset + subtopic_match.start(1) + _leading_space(subtopic_match.group(1))
+                section["subtopics"].append(topic)
+                span.extend([topic_start, topic_start + len(topic)])
+                topics.append(topic)
+
+        sections.append(section)
+        section_spans.append(span)
+
+    if SECTION_DIVIDER_PATTERN.search(content):
+        content_structure.append('sectioned')
+
+    # 중복 제거 (처음 나온 순서 유지)
+    return {
+        'topics': list(dict.fromkeys(topics)),
+        'sections': sections,
+        'section_spans': section_spans,
+        'markdown_used': markdown_used,
+        'message_type': message_type,
+        'content_structure': list(dict.fromkeys(content_structure))
+    }
+
+def analyze_batch(contents: List[str]) -> List[Dict[str, Any]]:
+    """여러 메시지 내용을 한 번에 분석 (프로세스 풀 작업 단위)"""
+    return [analyze_content(content) for content in contents]
+
+def analysis_to_columns(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """분석 결과를 DiscordMessage 컬럼 값으로 변환 (빈 목록은 None, 분석기 버전 포함)"""
+    def to_json(values):
+        return json.dumps(values, ensure_ascii=False) if values else None
+
+    return {
+        'topics': to_json(analysis['topics']),
+        'message_type': analysis['message_type'],
+        'structure_flags': encode_flags(analysis['content_structure'], STRUCTURE_FLAGS),
+        'markdown_flags': encode_flags(analysis['markdown_used'], MARKDOWN_FLAGS),
+        'sections': encode_sections(analysis['section_spans']),
+        'analysis_version': ANALYZER_VERSION,
+    }
+
+class ContentAnalyzer:
+    """메시지 내용 배치 분석기
+
+    작은 배치는 이벤트 루프에서 바로 분석하고, process_threshold개 이상인 배치는
+    프로세스 풀에 나눠 보내 대량 백필 중에도 게이트웨이 하트비트가 밀리지 않도록 합니다.
+    """
+
+    def __init__(self, process_threshold=1000, max_workers=None):
+        self.process_threshold = max(1, int(process_threshold))
+        self.max_workers = max(1, int(max_workers or min(4, os.cpu_count() or 1)))
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # 이벤트 루프와 DB 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"메시지 분석 프로세스 풀 시작 (작업자 {self.max_workers}개)")
+        return self._executor
+
+    def analyze(self, content: str) -> Dict[str, Any]:
+        """메시지 하나를 바로 분석"""
+        return analyze_content(content)
+
+    async def analyze_many(self, contents: List[str]) -> List[Dict[str, Any]]:
+        """여러 메시지를 분석 (큰 배치는 프로세스 풀에서 실행)
+
+        Args:
+            contents: 메시지 내용 목록
+
+        Returns:
+            contents와 같은 순서의 분석 결과 목록
+        """
+        if len(contents) < self.process_threshold:
+            return analyze_batch(contents)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunk_size = -(-len(contents) // self.max_workers)
+        try:
+            chunks = await asyncio.gather(*[
+                loop.run_in_executor(executor, analyze_batch, contents[i:i + chunk_size])
+                for i in range(0, len(contents), chunk_size)
+            ])
+        except Exception as e:
+            # 프로세스 풀을 사용할 수 없으면 현재 프로세스에서 분석
+            logger.error(f"프로세스 풀 분석 중 오류 발생, 직접 분석합니다: {str(e)}")
+            self.shutdown()
+            return analyze_batch(contents)
+
+        return [analysis for chunk in chunks for analysis in chunk]
+
+    def shutdown(self):
+        """프로세스 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# 싱글톤 인스턴스
+_analyzer: Optional[ContentAnalyzer] = None
+
+def get_analyzer() -> ContentAnalyzer:
+    """설정값으로 생성한 공용 ContentAnalyzer 반환"""
+    global _analyzer
+    if _analyzer is None:
+        config = get_config()
+        _analyzer = ContentAnalyzer(
+            process_threshold=config.get('ANALYSIS_PROCESS_THRESHOLD', 1000),
+            max_workers=config.get('ANALYSIS_MAX_WORKERS') or None
+        )
+    return _analyzer
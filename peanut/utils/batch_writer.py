@@ -0,0 +1,121 @@
+import time
+import asyncio
+import logging
+
+from .analyzer import analysis_to_columns
+
+# 로깅 설정
+logger = logging.getLogger('discord.collector')
+
+class MessageBatchWriter:
+    """수집한 메시지를 모아 배치 단위로 저장하는 버퍼
+
+    메시지가 batch_size개 쌓이거나 마지막 저장 후 flush_interval초가 지나면
+    DatabaseManager.bulk_upsert_messages로 한 번에 저장합니다.
+    analyzer가 주어지면 저장 직전에 배치 전체의 내용 분석 필드를 한 번에 채웁니다.
+    """
+
+    def __init__(self, db_manager, batch_size=500, flush_interval=5.0, analyzer=None):
+        self.db_manager = db_manager
+        self.analyzer = analyzer
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.buffer = []
+        self.pending_states = {}  # 다음 저장 때 함께 기록할 채널 수집 상태
+        self.pending_ranges = {}  # 다음 저장 때 함께 기록할 백필 구간 상태
+        self.last_flush = time.monotonic()
+
+        # 저장 통계
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.flush_count = 0
+
+        # 여러 태스크가 같은 버퍼를 공유할 때 저장 순서를 보장하기 위한 잠금
+        self._lock = asyncio.Lock()
+
+    @property
+    def saved_count(self):
+        """지금까지 저장된 메시지 수"""
+        return self.inserted_count + self.updated_count
+
+    def should_flush(self):
+        """배치 크기 또는 시간 조건을 만족하는지 확인"""
+        if not self.buffer:
+            return False
+        if len(self.buffer) >= self.batch_size:
+            return True
+        return time.monotonic() - self.last_flush >= self.flush_interval
+
+    async def add(self, message_dict):
+        """메시지를 버퍼에 추가하고 필요하면 저장
+
+        Args:
+            message_dict: MessageCollector.message_to_dict 결과 (None이면 무시)
+
+        Returns:
+            버퍼에 추가되었는지 여부
+        """
+        if not message_dict:
+            return False
+
+        self.buffer.append(message_dict)
+        if self.should_flush():
+            await self.flush()
+        return True
+
+    def set_channel_state(self, guild_id, channel_id, **fields):
+        """다음 저장 때 메시지와 같은 트랜잭션으로 기록할 채널 수집 상태 설정
+
+        Args:
+            guild_id: 서버 ID
+            channel_id: 채널 ID
+            **fields: 변경할 ChannelState 필드 (last_message_id, backfill_before_id 등)
+        """
+        key = (int(guild_id), int(channel_id))
+        state = self.pending_states.setdefault(key, {'guild_id': key[0], 'channel_id': key[1]})
+        state.update(fields)
+
+    def set_backfill_range(self, guild_id, channel_id, range_start, **fields):
+        """다음 저장 때 메시지와 같은 트랜잭션으로 기록할 백필 구간 상태 설정
+
+        Args:
+            guild_id: 서버 ID
+            channel_id: 채널 ID
+            range_start: 구간 시작 스노우플레이크 (구간 식별자)
+            **fields: 변경할 BackfillRange 필드 (range_end, cursor, complete)
+        """
+        key = (int(guild_id), int(channel_id), int(range_start))
+        range_state = self.pending_ranges.setdefault(
+            key, {'guild_id': key[0], 'channel_id': key[1], 'range_start': key[2]}
+        )
+        range_state.update(fields)
+
+    async def flush(self):
+        """버퍼에 남은 메시지를 모두 저장
+
+        Returns:
+            이번에 저장된 메시지 수
+        """
+        async with self._lock:
+            self.last_flush = time.monotonic()
+            if not self.buffer and not self.pending_states and not self.pending_ranges:
+                return 0
+
+            batch, self.buffer = self.buffer, []
+            states, self.pending_states = list(self.pending_states.values()), {}
+            ranges, self.pending_ranges = list(self.pending_ranges.values()), {}
+            
+            if self.analyzer and batch:
+                analyses = await self.analyzer.analyze_many([message.get('content') for message in batch])
+                for message, analysis in zip(batch, analyses):
+                    message.update(analysis_to_columns(analysis))
+            
+            counts = await self.db_manager.bulk_upsert_messages(
+                batch, channel_states=states, backfill_ranges=ranges
+            )
+
+            self.inserted_count += counts['inserted']
+            self.updated_count += counts['updated']
+            self.flush_count += 1
+            logger.debug(f"배치 저장: {len(batch)}개 중 추가 {counts['inserted']}개, 갱신 {counts['updated']}개")
+            return counts['inserted'] + counts['updated']
@@ -2,13 +2,16 @@ import asyncio
 import logging
 import discord
 import colorama
-import re
 import json
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional, Any, Tuple
 
-from ..db.database import get_db_manager
+from ..db.database import get_db_manager, db_managers
 from ..utils.config import get_config
+from ..utils.batch_writer import MessageBatchWriter
+from ..utils.ratelimit import RequestScheduler
+from ..utils.analyzer import get_analyzer, analysis_to_columns, ANALYZER_VERSION
+from ..utils.ngram_index import save_ngram_snapshots
 
 # 색상 초기화
 colorama.init()
@@ -28,6 +31,51 @@ class MessageCollector:
         self.bot_id = self.config.get('BOT_ID')
         self.collection_interval = int(self.config.get('COLLECTION_INTERVAL', 30 * 60))
         
+        # 메시지 내용 분석기 (배치 저장 시 한 번에 분석, 큰 배치는 프로세스 풀 사용)
+        self.analyzer = get_analyzer()
+        
+        # deferred 모드에서는 원문만 저장하고 분석 필드는 백그라운드 작업이 채움
+        self.analysis_mode = self.config.get('ANALYSIS_MODE', 'inline')
+        self.writer_analyzer = None if self.analysis_mode == 'deferred' else self.analyzer
+        self.enrichment_batch_size = max(1, int(self.config.get('ENRICHMENT_BATCH_SIZE', 1000)))
+        self.enrichment_interval = float(self.config.get('ENRICHMENT_INTERVAL', 30))
+        self.enrichment_task = None
+        
+        # 데이터베이스 유지보수 (WAL 체크포인트, PRAGMA optimize) 간격
+        self.maintenance_interval = float(self.config.get('DB_MAINTENANCE_INTERVAL', 3600))
+        self.maintenance_task = None
+        
+        # 배치 저장 설정
+        self.batch_size = int(self.config.get('COLLECTION_BATCH_SIZE', 500))
+        self.flush_interval = float(self.config.get('COLLECTION_FLUSH_INTERVAL', 5))
+        
+        # 동시에 수집할 최대 채널 수 (1이면 순차 수집)
+        self.max_concurrent_channels = max(1, int(self.config.get('COLLECTION_MAX_CONCURRENT_CHANNELS', 4)))
+        
+        # 레이트 리밋 헤더 기반 요청 스케줄러 (봇의 HTTP 트레이스에 연결된 것을 공유)
+        self.scheduler = getattr(bot, 'request_scheduler', None) or RequestScheduler(
+            self.config.get('REQUEST_MAX_CONCURRENCY', 8)
+        )
+        
+        # 실시간 수집 설정 (게이트웨이 메시지를 마이크로 배치로 저장)
+        self.live_ingest_enabled = self.config.get('LIVE_INGEST_ENABLED', True)
+        self.live_batch_size = int(self.config.get('LIVE_INGEST_BATCH_SIZE', 100))
+        self.live_flush_interval = float(self.config.get('LIVE_INGEST_FLUSH_INTERVAL', 2))
+        self.live_writers = {}  # 서버별 실시간 저장 버퍼
+        # 이 시점 이후 ID의 메시지는 실시간 수집분일 수 있으므로 폴링 시작점 계산에서 제외
+        self.started_snowflake = discord.utils.time_snowflake(datetime.now(timezone.utc))
+        self.live_flush_task = None
+        
+        # 재연결 후 누락분 보충 수집 요청 이벤트 (서버별)
+        self.gap_fill_events = {}
+        
+        # 과거 메시지 백필 설정 (증분 수집보다 낮은 우선순위로 실행)
+        self.backfill_enabled = self.config.get('BACKFILL_ENABLED', True)
+        self.backfill_page_size = max(100, int(self.config.get('BACKFILL_PAGE_SIZE', 1000)))
+        self.backfill_partitions = max(1, int(self.config.get('BACKFILL_PARTITIONS', 4)))
+        self.backfill_partition_min_days = float(self.config.get('BACKFILL_PARTITION_MIN_DAYS', 30))
+        self.backfill_tasks = {}  # 서버별 백필 태스크
+        
         # 메시지 로깅 색상 설정
         self.colors = {
             'info': colorama.Fore.CYAN,
@@ -46,159 +94,14 @@ class MessageCollector:
         Returns:
             분석 결과 딕셔너리
         """
-        if not content:
-            return {
-                'topics': [],
-                'sections': [],
-                'markdown_used': [],
-                'message_type': 'unknown',
-                'content_structure': []
-            }
-        
-        # 분석 결과 초기화
-        analysis = {
-            'topics': [],           # 주제 목록
-            'sections': [],         # 섹션 구분 (여러 주제가 있는 경우)
-            'markdown_used': [],    # 사용된 마크다운
-            'message_type': 'text', # 메시지 유형 (text, code, question, explanation)
-            'content_structure': [] # 콘텐츠 구조 (sections, paragraphs 등)
-        }
-        
-        # 마크다운 분석
-        markdown_patterns = {
-            'code_block': re.compile(r'```(?:\w+)?\n(.+?)\n```', re.DOTALL),
-            'inline_code': re.compile(r'`([^`]+)`'),
-            'bold': re.compile(r'\*\*(.+?)\*\*'),
-            'italic': re.compile(r'\*(.+?)\*'),
-            'heading': re.compile(r'^#{1,6}\s+(.+?)$', re.MULTILINE),
-            'bullet_list': re.compile(r'^\s*[\*\-\+]\s+(.+?)$', re.MULTILINE),
-            'numbered_list': re.compile(r'^\s*\d+\.\s+(.+?)$', re.MULTILINE),
-            'blockquote': re.compile(r'^\s*>\s+(.+?)$', re.MULTILINE),
-            'link': re.compile(r'\[(.+?)\]\((.+?)\)')
-        }
-        
-        for md_type, pattern in markdown_patterns.items():
-            if pattern.search(content):
-                analysis['markdown_used'].append(md_type)
-        
-        # 코드 블록이 많으면 코드 유형으로 판단
-        if 'code_block' in analysis['markdown_used'] and len(re.findall(r'```', content)) >= 2:
-            analysis['message_type'] = 'code'
-        
-        # 질문 패턴 분석
-        question_patterns = [r'\?$', r'어떻게', r'무엇', r'언제', r'어디', r'누구', r'왜', r'질문', r'알려줘', r'알고 싶어']
-        for pattern in question_patterns:
-            if re.search(pattern, content):
-                analysis['message_type'] = 'question'
-                break
-        
-        # 설명 패턴 분석
-        explanation_patterns = [r'설명', r'방법', r'다음과 같이', r'다음과 같은', r'입니다', r'됩니다', r'~입니다', r'~됩니다']
-        if analysis['message_type'] != 'question':  # 이미 질문으로 분류되지 않았다면
-            for pattern in explanation_patterns:
-                if re.search(pattern, content):
-                    analysis['message_type'] = 'explanation'
-                    break
-        
-        # 콘텐츠 구조 분석
-        
-        # 1. 헤더 기반 구조 분석
-        header_sections = re.split(r'^#{1,6}\s+(.+?)$', content, flags=re.MULTILINE)
-        if len(header_sections) > 2:  # 헤더가 있으면
-            sections = [s.strip() for s in header_sections if s.strip()]
-            analysis['content_structure'].append('headers')
-        
-        # 2. 줄바꿈 기반 단락 분석
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-        if len(paragraphs) > 1:
-            analysis['content_structure'].append('paragraphs')
-        
-        # 3. 목록 구조 분석
-        if re.search(r'^\s*[\*\-\+]\s+(.+?)$', content, re.MULTILINE) or re.search(r'^\s*\d+\.\s+(.+?)$', content, re.MULTILINE):
-            analysis['content_structure'].append('lists')
-        
-        # 주제 추출 및 섹션 분석 (개선된 알고리즘)
-        # 1. 빈 줄로 구분된 섹션 식별
-        sections = []
-        current_section = {"title": "", "content": "", "subtopics": []}
-        
-        # 빈 줄 기준으로 섹션 분리 (기본 분리)
-        raw_sections = re.split(r'\n\s*\n', content)
-        if len(raw_sections) > 1:
-            analysis['content_structure'].append('multi_section')
-        
-        # 2. 주제와 제목 패턴 인식
-        title_patterns = [
-            # 제목 다음 개행
-            (r'^([^\n:]+)[\s]*\n', 1),
-            # 물음표로 끝나는 문장
-            (r'^([^\n]+\?)[\s]*\n', 1),
-            # 콜론으로 구분된 형태 (제목: 내용)
-            (r'^([^:]+):(.+)$', 1)
-        ]
-        
-        # 섹션 분석
-        for i, section_text in enumerate(raw_sections):
-            if not section_text.strip():
-                continue
-                
-            section = {"content": section_text.strip(), "subtopics": [], "title": ""}
-            
-            # 첫 줄이나 패턴에서 섹션 제목 추출
-            lines = section_text.strip().split('\n')
-            potential_title = lines[0].strip() if lines else ""
-            
-            # 제목 패턴 검출
-            is_title_found = False
-            for pattern, group in title_patterns:
-                title_match = re.match(pattern, section_text, re.MULTILINE)
-                if title_match:
-                    potential_title = title_match.group(group).strip()
-                    is_title_found = True
-                    break
-            
-            # 제목이 특별한 패턴을 가진 경우
-            if potential_title.endswith('?') or len(potential_title) < 50:
-                section["title"] = potential_title
-                analysis['topics'].append(potential_title)
-            
-            # 하위 주제 추출 (콜론으로 구분된 경우)
-            subtopic_pattern = re.findall(r'^([^:]+):\s*(.+)$', section_text, re.MULTILINE)
-            for topic, _ in subtopic_pattern:
-                topic = topic.strip()
-                if topic and topic != section["title"] and len(topic) < 50:
-                    section["subtopics"].append(topic)
-                    analysis['topics'].append(topic)
-            
-            sections.append(section)
-        
-        # 특정 패턴으로 구분된 섹션 추가 처리
-        section_divider_patterns = [
-            r'\d+\.\s+(.+?)\n',  # 숫자 + 점 + 공백 + 제목 패턴 (예: "1. 제목")
-            r'^-+\s*$',         # 구분선 패턴 (----------)
-            r'^=+\s*$',         # 구분선 패턴 (==========)
-        ]
-        
-        # 패턴에 따라 더 정확한 섹션 구분 시도
-        for pattern in section_divider_patterns:
-            if re.search(pattern, content, re.MULTILINE):
-                analysis['content_structure'].append('sectioned')
-                break
-        
-        # 섹션 저장
-        analysis['sections'] = sections
-        
-        # 마크다운, 주제, 콘텐츠 구조 중복 제거
-        for key in ['markdown_used', 'content_structure', 'topics']:
-            analysis[key] = list(set(analysis[key]))
-        
-        return analysis
+        return self.analyzer.analyze(content)
     
-    def message_to_dict(self, message: discord.Message) -> Dict[str, Any]:
+    def message_to_dict(self, message: discord.Message, analyze: bool = True) -> Dict[str, Any]:
         """Discord 메시지를 데이터베이스 저장용 딕셔너리로 변환
         
         Args:
             message: Discord 메시지 객체
+            analyze: False면 내용 분석 필드를 비워 둠 (배치 저장 시 MessageBatchWriter가 일괄 분석)
             
         Returns:
             저장용 딕셔너리 또는 None (무시할 메시지인 경우)
@@ -224,7 +127,6 @@ class MessageCollector:
         channel_name = None
         guild_id = None
         guild_name = None
-        message_url = None
         
         # 채널 정보 확인
         if hasattr(message.channel, 'name'):
@@ -254,47 +156,36 @@ class MessageCollector:
             # 부모 채널 정보
             parent = getattr(message.channel, 'parent', None)
             if parent:
-                parent_channel_id = str(parent.id)
+                parent_channel_id = parent.id
                 parent_channel_name = getattr(parent, 'name', f"채널-{parent.id}")
             
-        # 서버 정보 확인
+        # 서버 정보 확인 (DM 또는 그룹 DM이면 None)
         if message.guild:
-            guild_id = str(message.guild.id)
+            guild_id = message.guild.id
             guild_name = message.guild.name
             
-            # 메시지 URL 생성
-            message_url = f"https://discord.com/channels/{message.guild.id}/{message.channel.id}/{message.id}"
-        else:
-            # DM 또는 그룹 DM인 경우
-            message_url = f"https://discord.com/channels/@me/{message.channel.id}/{message.id}"
-            
-        # 메시지 내용 분석
-        content_analysis = self.analyze_message_content(message.content)
-        
-        # 저장용 딕셔너리 생성
+        # 저장용 딕셔너리 생성 (created_at과 message_url은 ID에서 계산되므로 저장하지 않음,
+        # 서버/채널/작성자 이름은 DatabaseManager가 정규화 테이블에 따로 저장)
         result = {
-            'message_id': str(message.id),
-            'channel_id': str(message.channel.id),
+            'id': message.id,
+            'channel_id': message.channel.id,
             'guild_id': guild_id,
             'channel_name': channel_name,
             'guild_name': guild_name,
-            'author_id': str(message.author.id),
+            'author_id': message.author.id,
             'author_name': message.author.name,
             'content': message.content,
-            'created_at': message.created_at,
             'attachments_count': len(message.attachments),
             'attachments_urls': json.dumps(attachments) if attachments else None,
             'collected_at': datetime.now(),
-            
-            # 추가 분석 정보
-            'message_url': message_url,
-            'topics': json.dumps(content_analysis['topics'], ensure_ascii=False) if content_analysis['topics'] else None,
-            'message_type': content_analysis['message_type'],
-            'content_structure': json.dumps(content_analysis['content_structure'], ensure_ascii=False) if content_analysis['content_structure'] else None,
-            'markdown_used': json.dumps(content_analysis['markdown_used'], ensure_ascii=False) if content_analysis['markdown_used'] else None,
-            'sections': json.dumps(content_analysis['sections'], ensure_ascii=False) if content_analysis['sections'] else None,
         }
         
+        # 메시지 내용 분석 정보 추가 (분석하지 않으면 분석 대기로 표시)
+        if analyze:
+            result.update(analysis_to_columns(self.analyze_message_content(message.content)))
+        else:
+            result['analysis_version'] = None
+        
         # 스레드 관련 정보 추가
         if is_thread:
             result['is_thread'] = True
@@ -370,109 +261,86 @@ class MessageCollector:
             if db_manager is None:
                 db_manager = self.db_manager
                 
-            # 채널별 마지막 수집 시간 키 생성
-            channel_last_collected_key = f"last_collected_channel_{channel.id}"
-                
-            # 최근 저장된 메시지 날짜 확인
+            # 이어서 수집할 위치 (저장된 폴링 커서 스노우플레이크부터 정확히 이어서 수집)
+            last_msg_id = None
             if after_date is None:
-                # 채널별 마지막 수집 시간 먼저 확인
-                channel_last_collected = await db_manager.get_collection_metadata(channel_last_collected_key)
-                if channel_last_collected:
-                    try:
-                        after_date = datetime.strptime(channel_last_collected, '%Y-%m-%d %H:%M:%S')
-                        logger.info(f"채널 '{channel_name}' 마지막 수집 시간: {after_date.strftime('%Y-%m-%d %H:%M:%S')}")
-                    except ValueError:
-                        logger.warning(f"채널 마지막 수집 시간 형식이 잘못되었습니다: {channel_last_collected}")
-                        after_date = None
+                channel_state = await db_manager.get_channel_state(channel.guild.id, channel.id)
+                last_msg_id = channel_state.last_message_id if channel_state else None
+                if not last_msg_id:
+                    # 커서가 없으면 저장된 최신 메시지로 대체 (이번 실행에서 실시간 수집된 메시지 제외)
+                    last_msg_id = await db_manager.get_last_message_id(channel.id, before_id=self.started_snowflake)
                 
-                # 채널별 데이터가 없으면 데이터베이스의 최신 메시지로 확인
-                if after_date is None:
-                    after_date = await db_manager.get_latest_message_date(channel.guild.id, channel.id)
-                    if after_date:
-                        logger.info(f"채널 '{channel_name}' 최신 메시지 날짜: {after_date.strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                if after_date:
-                    logger.info(f"'{channel_name}' 채널에서 {after_date.strftime('%Y-%m-%d %H:%M:%S')} 이후의 새 메시지만 수집합니다.")
+                if last_msg_id:
+                    logger.info(f"'{channel_name}' 채널에서 메시지 ID {last_msg_id} 이후의 새 메시지만 수집합니다.")
             else:
                 logger.info(f"'{channel_name}' 채널에서 {after_date.strftime('%Y-%m-%d %H:%M:%S')} 이후의 메시지만 수집합니다.")
                     
-            # 메시지 수집
-            processed_messages = []
+            # 메시지 수집 (배치 저장 버퍼 사용)
+            writer = MessageBatchWriter(db_manager, self.batch_size, self.flush_interval, analyzer=self.writer_analyzer)
             collected_count = 0
-            
-            # API 요청 최적화를 위한 배치 크기
-            batch_size = 50
+            newest_seen_id = last_msg_id or 0
             
             try:
-                if hasattr(channel, 'history'):
-                    # 일반 채널 및 스레드 처리
-                    # 메시지 검색 매개변수 설정
-                    kwargs = {
-                        'limit': 100,  # 한 번에 최대 100개씩 가져오기
-                        'oldest_first': False  # 최신 메시지부터 가져오기
-                    }
-                    
-                    if after_date:
-                        kwargs['after'] = after_date
-                        
-                    async for message in channel.history(**kwargs):
-                        # 봇 자신의 메시지는 무시
-                        if self.bot_id:
-                            # BOT_ID가 쉼표로 구분된 여러 ID를 포함하는 경우 처리
-                            bot_ids = [bot_id.strip() for bot_id in str(self.bot_id).split(',')]
-                            if str(message.author.id) in bot_ids:
-                                continue
-                            
-                        # 메시지를 딕셔너리로 변환
-                        message_dict = self.message_to_dict(message)
-                        if message_dict:  # None이 아닌 경우에만 추가
-                            processed_messages.append(message_dict)
-                            collected_count += 1
-                        
-                        # 배치 단위로 저장
-                        if len(processed_messages) >= batch_size:
-                            await db_manager.save_messages(processed_messages)
-                            processed_messages = []
+                try:
+                    if hasattr(channel, 'history'):
+                        # 일반 채널 및 스레드 처리
+                        # 메시지 검색 매개변수 설정
+                        if last_msg_id:
+                            # 커서 이후의 메시지를 모두 오래된 순으로 수집
+                            kwargs = {'after': discord.Object(id=last_msg_id), 'limit': None, 'oldest_first': True}
+                        else:
+                            kwargs = {
+                                'limit': 100,  # 한 번에 최대 100개씩 가져오기
+                                'oldest_first': False  # 최신 메시지부터 가져오기
+                            }
+                            if after_date:
+                                kwargs['after'] = after_date
                             
-                            # API 요청 제한 완화를 위한 짧은 대기
-                            await asyncio.sleep(0.1)
-                elif channel_type == discord.ChannelType.forum:
-                    # 포럼 채널 처리 - 활성 스레드 수집
-                    if hasattr(channel, 'threads'):
-                        # 활성 스레드 처리
-                        for thread in channel.threads:
-                            thread_count = await self.collect_channel_messages(thread, after_date, db_manager)
-                            collected_count += thread_count
+                        async for message in self._paced_history(channel, **kwargs):
+                            newest_seen_id = max(newest_seen_id, message.id)
                             
-                            # 스레드마다 잠시 대기 (레이트 리밋 방지)
-                            await asyncio.sleep(0.5)
-                        
-                        # 보관된 스레드도 처리
-                        if hasattr(channel, 'archived_threads'):
-                            try:
-                                async for thread in channel.archived_threads():
-                                    thread_count = await self.collect_channel_messages(thread, after_date, db_manager)
-                                    collected_count += thread_count
-                                    
-                                    # 스레드마다 잠시 대기 (레이트 리밋 방지)
-                                    await asyncio.sleep(0.5)
-                            except Exception as e:
-                                logger.warning(f"보관된 스레드 수집 중 오류 발생: {str(e)}")
-                else:
-                    logger.info(f"채널 타입 {channel_type_str}은(는) 현재 메시지 수집을 지원하지 않습니다.")
-                
-                # 남은 메시지 저장
-                if processed_messages:
-                    await db_manager.save_messages(processed_messages)
+                            # 봇 자신의 메시지는 무시
+                            if self.bot_id:
+                                # BOT_ID가 쉼표로 구분된 여러 ID를 포함하는 경우 처리
+                                bot_ids = [bot_id.strip() for bot_id in str(self.bot_id).split(',')]
+                                if str(message.author.id) in bot_ids:
+                                    continue
+                                
+                            # 메시지를 딕셔너리로 변환하여 버퍼에 추가 (None이면 무시)
+                            if await writer.add(self.message_to_dict(message, analyze=False)):
+                                collected_count += 1
+                    elif channel_type == discord.ChannelType.forum:
+                        # 포럼 채널 처리 - 활성 스레드와 마지막 확인 이후 보관된 스레드만
+                        # 서버 수집과 같은 스레드별 커서로 동시에 수집
+                        collected_count += await self._collect_forum_threads(channel, db_manager)
+                    else:
+                        logger.info(f"채널 타입 {channel_type_str}은(는) 현재 메시지 수집을 지원하지 않습니다.")
+                    
+                    # 폴링 커서와 수집 시간 기록 (남은 메시지와 같은 트랜잭션으로 저장)
+                    # 지정한 날짜부터 수집한 경우는 커서와의 사이가 비어 있을 수 있으므로 커서를 옮기지 않음
+                    collection_time = datetime.utcnow()
+                    if after_date is None and newest_seen_id:
+                        writer.set_channel_state(
+                            channel.guild.id, channel.id,
+                            last_message_id=newest_seen_id,
+                            last_seen_count=collected_count,
+                            last_collected_at=collection_time
+                        )
+                    elif collected_count > 0:
+                        writer.set_channel_state(
+                            channel.guild.id, channel.id,
+                            last_seen_count=collected_count,
+                            last_collected_at=collection_time
+                        )
+                finally:
+                    # 남은 메시지 저장 (오류로 중단된 경우에도 이미 받은 메시지는 저장)
+                    await writer.flush()
                     
                 # 수집 결과 로깅
                 if collected_count > 0:
                     logger.info(f"{channel_type_str} 채널 '{channel_name}'({channel.id})에서 {collected_count}개 메시지 수집 완료")
                     
-                    # 채널별 마지막 수집 시간 업데이트
-                    now = datetime.utcnow()
-                    await db_manager.save_collection_metadata(channel_last_collected_key, now.strftime('%Y-%m-%d %H:%M:%S'))
-                    logger.debug(f"채널 '{channel_name}'({channel.id}) 마지막 수집 시간을 {now.strftime('%Y-%m-%d %H:%M:%S')}로 업데이트했습니다.")
+                    logger.debug(f"채널 '{channel_name}'({channel.id}) 마지막 수집 시간을 {collection_time.strftime('%Y-%m-%d %H:%M:%S')}로 업데이트했습니다.")
                 else:
                     logger.info(f"{channel_type_str} 채널 '{channel_name}'({channel.id})에서 새로운 메시지가 없습니다.")
                     
@@ -509,50 +377,52 @@ class MessageCollector:
             text_channels = [c for c in guild.channels if isinstance(c, discord.TextChannel)]
             logger.info(f"ℹ️ 서버 '{guild.name}'({guild.id})의 텍스트 채널 수: {len(text_channels)}")
             
-            # 채널에서 마지막으로 수집한 메시지 ID 가져오기
+            # 채널별 수집 상태(폴링 커서)를 한 번의 쿼리로 가져오기
+            # 실시간 수집된 메시지가 DB의 최신 메시지가 될 수 있으므로 폴링 커서를 우선 사용
+            channel_states = await db_manager.get_channel_states(guild.id)
+            
+            # 텍스트/포럼 채널의 활성 스레드와 마지막 확인 이후 보관된 스레드
+            thread_parents = text_channels + [c for c in guild.channels if isinstance(c, discord.ForumChannel)]
+            threads, threads_synced = await self._discover_threads(guild, thread_parents, channel_states)
+            if threads:
+                logger.info(f"ℹ️ 서버 '{guild.name}'({guild.id})의 확인할 스레드 수: {len(threads)}")
+            
             last_message_ids = {}
-            for channel in text_channels:
-                last_msg_id = await db_manager.get_last_message_id(channel.id)
+            channels_to_collect = []
+            for channel in text_channels + threads:
+                state = channel_states.get(channel.id)
+                last_msg_id = state.last_message_id if state else None
+                if not last_msg_id:
+                    # 커서가 없으면 저장된 최신 메시지로 대체하되, 이번 실행에서 실시간 수집이
+                    # 저장한 메시지는 제외 (꺼져 있던 동안의 메시지를 건너뛰지 않도록)
+                    last_msg_id = await db_manager.get_last_message_id(channel.id, before_id=self.started_snowflake)
                 if last_msg_id:
                     last_message_ids[channel.id] = int(last_msg_id)
+                
+                # 캐시된 채널의 마지막 메시지 ID가 커서보다 새롭지 않으면 history 호출 생략
+                if not self._channel_has_new_messages(channel, last_message_ids.get(channel.id)):
+                    continue
+                channels_to_collect.append(channel)
+            
+            skipped_count = len(text_channels) + len(threads) - len(channels_to_collect)
+            if skipped_count:
+                logger.info(f"ℹ️ 새 메시지가 없는 채널 {skipped_count}개는 수집을 건너뜁니다.")
             
             # 수집 시작 시간 기록
             collection_start_time = datetime.utcnow()
             total_collected = 0
             
-            # 각 채널별로 메시지 수집
-            for channel in text_channels:
-                try:
-                    channel_collected = 0
-                    logger.info(f"🔍 채널 '{channel.name}'({channel.id}) 메시지 수집 중...")
-                    
-                    # 해당 채널의 마지막 메시지 ID 확인
-                    last_msg_id = last_message_ids.get(channel.id)
-                    if last_msg_id:
-                        logger.info(f"ℹ️ 채널 '{channel.name}'의 마지막 메시지 ID: {last_msg_id}")
-                        # 마지막 메시지 이후의 새 메시지만 수집
-                        async for message in channel.history(limit=None, after=discord.Object(id=last_msg_id)):
-                            # 메시지 정보 수집 및 저장
-                            await self._save_message(message, db_manager)
-                            channel_collected += 1
-                    else:
-                        # 첫 수집 시에는 최대 1000개 메시지만 수집
-                        async for message in channel.history(limit=1000):
-                            # 메시지 정보 수집 및 저장
-                            await self._save_message(message, db_manager)
-                            channel_collected += 1
-                    
-                    if channel_collected > 0:
-                        logger.info(f"✅ 채널 '{channel.name}'에서 {channel_collected}개 메시지 수집 완료")
-                    else:
-                        logger.info(f"ℹ️ 채널 '{channel.name}'에서 새 메시지 없음")
-                    
-                    total_collected += channel_collected
-                    
-                except discord.Forbidden:
-                    logger.warning(f"⚠️ 채널 '{channel.name}'({channel.id})에 접근 권한이 없습니다.")
-                except Exception as e:
-                    logger.error(f"❌ 채널 '{channel.name}'({channel.id}) 메시지 수집 중 오류: {str(e)}")
+            # 채널별 메시지 수집 (최대 max_concurrent_channels개 채널을 동시에 처리)
+            semaphore = asyncio.Semaphore(self.max_concurrent_channels)
+            failed_ids = set()
+            results = await asyncio.gather(*[
+                self._collect_channel_isolated(channel, db_manager, last_message_ids.get(channel.id), semaphore, failed_ids)
+                for channel in channels_to_collect
+            ])
+            total_collected = sum(results)
+            
+            # 스레드 목록 확인 시점 저장 (수집에 실패한 스레드가 있는 부모 채널은 다음에 다시 확인)
+            await self._save_threads_synced(guild, db_manager, threads_synced, channels_to_collect, failed_ids)
             
             # 마지막 수집 시간 업데이트 (서버별)
             collection_end_time = datetime.utcnow()
@@ -562,6 +432,7 @@ class MessageCollector:
             await db_manager.save_collection_metadata(guild_last_collected_key, collection_end_time.strftime('%Y-%m-%d %H:%M:%S'))
             
             logger.info(f"✅ 서버 '{guild.name}'({guild.id})의 메시지 수집 완료: {total_collected}개 메시지 (소요 시간: {collection_duration:.2f}초)")
+            logger.info(f"ℹ️ 요청 통계: {self.scheduler.format_stats()}")
             return total_collected
             
         except Exception as e:
@@ -598,9 +469,6 @@ class MessageCollector:
                     # 각 서버는 자체 마지막 수집 시간을 사용하므로 global_last_collection_time은 전달하지 않음
                     collected = await self.collect_guild_messages(guild)
                     total_collected += collected
-                    
-                    # 서버 간 간격을 두어 API 제한 방지
-                    await asyncio.sleep(2)
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -662,6 +530,11 @@ class MessageCollector:
     
     async def schedule_guild_collection(self, guild):
         """서버별 메시지 수집 스케줄링"""
+        # 실시간 수집 모드에서는 폴링을 누락분 보충에만 사용
+        if self.live_ingest_enabled:
+            await self.schedule_gap_fill_collection(guild)
+            return
+        
         guild_id = guild.id
         guild_name = guild.name
         
@@ -687,6 +560,7 @@ class MessageCollector:
             logger.info(f"💡 서버 '{guild_name}'({guild_id})의 저장된 메시지가 없거나 최초 실행입니다 (메시지 수: {guild_messages}). 즉시 수집을 시작합니다...")
             collected = await self.collect_guild_messages(guild)
             logger.info(f"✅ 서버 '{guild_name}'({guild_id})의 첫 번째 수집 완료: {collected}개 메시지")
+            self.start_backfill(guild)
         elif last_collection_time:
             # 마지막 수집 시간 기준으로 다음 예정 시간 계산
             while True:
@@ -710,6 +584,7 @@ class MessageCollector:
                     logger.info(f"🔄 서버 '{guild_name}'({guild_id}) 마지막 수집 후 {time_since_last/60:.1f}분이 지났습니다. 수집을 시작합니다.")
                     collected = await self.collect_guild_messages(guild)
                     logger.info(f"✅ 서버 '{guild_name}'({guild_id}) 수집 완료: {collected}개 메시지")
+                    self.start_backfill(guild)
                     
                     # 마지막 수집 시간 업데이트
                     last_collection_time = datetime.utcnow()
@@ -717,31 +592,620 @@ class MessageCollector:
                     # 1분 대기 후 다음 주기 시작
                     await asyncio.sleep(60)
     
+    def _channel_has_new_messages(self, channel, last_msg_id):
+        """채널에 커서 이후의 새 메시지가 있을 수 있는지 확인
+        
+        Args:
+            channel: 디스코드 채널 객체
+            last_msg_id: 저장된 폴링 커서 (스노우플레이크)
+            
+        Returns:
+            history 호출이 필요하면 True
+        """
+        channel_last_id = getattr(channel, 'last_message_id', None)
+        if channel_last_id is None:
+            # 메시지가 한 번도 올라오지 않은 채널
+            return False
+        if not last_msg_id:
+            return True
+        return int(channel_last_id) > int(last_msg_id)
+    
+    async def _collect_channel_isolated(self, channel, db_manager, last_msg_id, semaphore, failed_ids=None):
+        """동시 수집 슬롯을 얻어 채널 하나를 수집 (오류는 해당 채널 안에서만 처리)
+        
+        Args:
+            channel: 디스코드 텍스트 채널 또는 스레드 객체
+            db_manager: 사용할 데이터베이스 매니저
+            last_msg_id: 마지막으로 저장된 메시지 ID
+            semaphore: 동시에 수집할 채널 수를 제한하는 세마포어
+            failed_ids: 수집에 실패한 채널 ID를 기록할 집합 (선택)
+            
+        Returns:
+            저장한 메시지 수 (오류 시 0)
+        """
+        async with semaphore:
+            try:
+                logger.info(f"🔍 채널 '{channel.name}'({channel.id}) 메시지 수집 중...")
+                channel_collected = await self._collect_text_channel(channel, db_manager, last_msg_id)
+                
+                if channel_collected > 0:
+                    logger.info(f"✅ 채널 '{channel.name}'에서 {channel_collected}개 메시지 수집 완료")
+                else:
+                    logger.info(f"ℹ️ 채널 '{channel.name}'에서 새 메시지 없음")
+                
+                return channel_collected
+                
+            except discord.Forbidden:
+                logger.warning(f"⚠️ 채널 '{channel.name}'({channel.id})에 접근 권한이 없습니다.")
+            except Exception as e:
+                logger.error(f"❌ 채널 '{channel.name}'({channel.id}) 메시지 수집 중 오류: {str(e)}")
+                if failed_ids is not None:
+                    failed_ids.add(channel.id)
+            return 0
+    
+    async def _discover_threads(self, guild, parents, channel_states):
+        """부모 채널별 스레드 목록을 증분으로 확인
+        
+        활성 스레드는 게이트웨이 캐시(guild.threads)에서 가져오고, 보관된 스레드는
+        보관 시각 역순으로 조회하다가 부모 채널의 threads_synced_at에 도달하면 멈춥니다.
+        그 전에 보관된 스레드는 이미 확인했고, 보관된 스레드에 새 메시지가 올라오면
+        다시 활성 스레드가 되므로 매번 전체 목록을 조회할 필요가 없습니다.
+        
+        Args:
+            guild: 디스코드 서버 객체
+            parents: 스레드를 가질 수 있는 부모 채널 목록 (텍스트/포럼 채널)
+            channel_states: {채널 ID: ChannelState} 딕셔너리
+            
+        Returns:
+            (스레드 목록, {부모 채널 ID: 새로 확인한 가장 최근 보관 시각}) 튜플
+        """
+        parent_ids = {parent.id for parent in parents}
+        threads = {thread.id: thread for thread in guild.threads if thread.parent_id in parent_ids}
+        threads_synced = {}
+        
+        for parent in parents:
+            if not hasattr(parent, 'archived_threads'):
+                continue
+            state = channel_states.get(parent.id)
+            synced_at = state.threads_synced_at if state else None
+            newest_archived_at = None
+            
+            try:
+                async for thread in parent.archived_threads(limit=None):
+                    archived_at = thread.archive_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+                    if synced_at and archived_at <= synced_at:
+                        break
+                    if newest_archived_at is None or archived_at > newest_archived_at:
+                        newest_archived_at = archived_at
+                    threads.setdefault(thread.id, thread)
+            except discord.Forbidden:
+                logger.debug(f"채널 '{parent.name}'({parent.id})의 보관된 스레드를 조회할 권한이 없습니다.")
+                continue
+            except Exception as e:
+                logger.warning(f"⚠️ 채널 '{parent.name}'({parent.id}) 보관된 스레드 조회 중 오류: {str(e)}")
+                continue
+            
+            if newest_archived_at:
+                threads_synced[parent.id] = newest_archived_at
+        
+        return list(threads.values()), threads_synced
+    
+    async def _collect_forum_threads(self, forum, db_manager):
+        """포럼 채널의 스레드 중 저장된 커서 이후 새 메시지가 있는 스레드만 동시에 수집
+        
+        Args:
+            forum: 디스코드 포럼 채널 객체
+            db_manager: 사용할 데이터베이스 매니저
+            
+        Returns:
+            저장한 메시지 수
+        """
+        channel_states = await db_manager.get_channel_states(forum.guild.id)
+        threads, threads_synced = await self._discover_threads(forum.guild, [forum], channel_states)
+        
+        threads_to_collect = []
+        cursors = {}
+        for thread in threads:
+            state = channel_states.get(thread.id)
+            cursors[thread.id] = state.last_message_id if state else None
+            if self._channel_has_new_messages(thread, cursors[thread.id]):
+                threads_to_collect.append(thread)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_channels)
+        failed_ids = set()
+        results = await asyncio.gather(*[
+            self._collect_channel_isolated(thread, db_manager, cursors[thread.id], semaphore, failed_ids)
+            for thread in threads_to_collect
+        ])
+        await self._save_threads_synced(forum.guild, db_manager, threads_synced, threads_to_collect, failed_ids)
+        return sum(results)
+    
+    async def _save_threads_synced(self, guild, db_manager, threads_synced, collected_channels, failed_ids):
+        """보관된 스레드 목록을 어디까지 확인했는지 부모 채널 상태에 기록
+        
+        Args:
+            guild: 디스코드 서버 객체
+            db_manager: 사용할 데이터베이스 매니저
+            threads_synced: {부모 채널 ID: 가장 최근 보관 시각} 딕셔너리
+            collected_channels: 이번에 수집한 채널/스레드 목록
+            failed_ids: 수집에 실패한 채널 ID 집합
+        """
+        failed_parents = {
+            getattr(channel, 'parent_id', None) for channel in collected_channels if channel.id in failed_ids
+        }
+        writer = MessageBatchWriter(db_manager)
+        for parent_id, synced_at in threads_synced.items():
+            if parent_id not in failed_parents:
+                writer.set_channel_state(guild.id, parent_id, threads_synced_at=synced_at)
+        await writer.flush()
+    
+    async def _paced_history(self, channel, limit=None, before=None, after=None, oldest_first=False):
+        """channel.history를 요청 한 번(최대 100개) 단위로 나눠 스케줄러 슬롯 안에서 실행
+        
+        페이지마다 레이트 리밋 버킷의 남은 요청 수를 확인하고 기다린 뒤 요청하므로
+        고정된 대기 시간 없이 API 한도에 맞춰 수집할 수 있습니다.
+        
+        Args:
+            channel: history를 지원하는 디스코드 채널 객체
+            limit: 가져올 최대 메시지 수 (None이면 끝까지)
+            before: 이 메시지/시각 이전의 메시지만 조회
+            after: 이 메시지/시각 이후의 메시지만 조회
+            oldest_first: True면 오래된 메시지부터 조회
+            
+        Yields:
+            discord.Message
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_limit = 100 if remaining is None else min(100, remaining)
+            async with self.scheduler.slot(channel.id):
+                page = [
+                    message async for message in channel.history(
+                        limit=page_limit, before=before, after=after, oldest_first=oldest_first
+                    )
+                ]
+            
+            for message in page:
+                yield message
+            
+            # 요청한 수보다 적게 왔으면 조회 범위의 끝
+            if len(page) < page_limit:
+                return
+            if remaining is not None:
+                remaining -= len(page)
+            if oldest_first:
+                after = page[-1]
+            else:
+                before = page[-1]
+    
+    async def _collect_text_channel(self, channel, db_manager, last_msg_id=None):
+        """텍스트 채널의 새 메시지를 배치 단위로 수집하여 저장
+        
+        Args:
+            channel: 디스코드 텍스트 채널 객체
+            db_manager: 사용할 데이터베이스 매니저
+            last_msg_id: 마지막으로 저장된 메시지 ID (없으면 첫 수집으로 간주)
+            
+        Returns:
+            저장한 메시지 수
+        """
+        writer = MessageBatchWriter(db_manager, self.batch_size, self.flush_interval, analyzer=self.writer_analyzer)
+        channel_collected = 0
+        
+        # history 호출 전의 채널 마지막 메시지 ID까지는 이번 수집에서 모두 읽게 되므로
+        # 마지막 메시지가 삭제된 경우에도 커서가 그 위치까지 전진하도록 함
+        newest_seen_id = max(last_msg_id or 0, getattr(channel, 'last_message_id', None) or 0)
+        oldest_seen_id = None
+        seen_count = 0
+        first_contact_limit = 1000
+        
+        try:
+            if last_msg_id:
+                logger.info(f"ℹ️ 채널 '{channel.name}'의 마지막 메시지 ID: {last_msg_id}")
+                # 마지막 메시지 이후의 새 메시지만 수집
+                history = self._paced_history(channel, after=discord.Object(id=last_msg_id), oldest_first=True)
+            else:
+                # 첫 수집 시에는 최신 메시지 1000개만 수집하고 나머지는 백필로 수집
+                history = self._paced_history(channel, limit=first_contact_limit)
+            
+            async for message in history:
+                newest_seen_id = max(newest_seen_id, message.id)
+                oldest_seen_id = message.id if oldest_seen_id is None else min(oldest_seen_id, message.id)
+                seen_count += 1
+                if await writer.add(self.message_to_dict(message, analyze=False)):
+                    channel_collected += 1
+            
+            # 폴링 커서 갱신 (남은 메시지와 같은 트랜잭션으로 저장)
+            # 실시간 수집분과 무관하게 폴링으로 끝까지 읽은 위치를 기록
+            if newest_seen_id:
+                writer.set_channel_state(
+                    channel.guild.id, channel.id,
+                    last_message_id=newest_seen_id,
+                    last_seen_count=seen_count,
+                    last_collected_at=datetime.utcnow()
+                )
+                if isinstance(channel, discord.Thread):
+                    writer.set_channel_state(channel.guild.id, channel.id, parent_id=channel.parent_id)
+            
+            # 첫 수집이면 가장 오래된 메시지를 백필 시작점으로 기록
+            if not last_msg_id and oldest_seen_id is not None:
+                writer.set_channel_state(
+                    channel.guild.id, channel.id,
+                    backfill_before_id=oldest_seen_id,
+                    backfill_complete=seen_count < first_contact_limit
+                )
+        finally:
+            # 채널이 끝나면 남은 메시지를 모두 저장
+            await writer.flush()
+        
+        return channel_collected
+    
+    async def schedule_gap_fill_collection(self, guild):
+        """실시간 수집 모드의 서버별 스케줄링
+        
+        새 메시지는 on_message에서 저장되므로, 봇이 꺼져 있던 동안(시작 시)과
+        새 게이트웨이 세션으로 재연결된 뒤에만 폴링으로 누락된 메시지를 보충합니다.
+        """
+        event = self.gap_fill_events.setdefault(guild.id, asyncio.Event())
+        # 봇이 꺼져 있던 동안의 메시지를 먼저 보충
+        event.set()
+        
+        while True:
+            await event.wait()
+            
+            # 다른 서버 수집이 진행 중이면 끝날 때까지 대기 (요청이 버려지지 않도록)
+            while self.is_collecting:
+                await asyncio.sleep(5)
+            
+            event.clear()
+            logger.info(f"🔄 서버 '{guild.name}'({guild.id}) 누락 메시지 보충 수집을 시작합니다.")
+            collected = await self.collect_guild_messages(guild)
+            logger.info(f"✅ 서버 '{guild.name}'({guild.id}) 보충 수집 완료: {collected}개 메시지")
+            self.start_backfill(guild)
+    
+    def start_backfill(self, guild):
+        """서버의 과거 메시지 백필 태스크 시작 (이미 실행 중이면 무시)"""
+        if not self.backfill_enabled:
+            return None
+        
+        task = self.backfill_tasks.get(guild.id)
+        if task is None or task.done():
+            task = asyncio.create_task(self.backfill_guild(guild))
+            self.backfill_tasks[guild.id] = task
+        return task
+    
+    async def _wait_for_incremental_collection(self):
+        """증분 수집이 진행 중이면 끝날 때까지 대기 (백필은 낮은 우선순위로 실행)"""
+        while self.is_collecting:
+            await asyncio.sleep(1)
+    
+    async def backfill_guild(self, guild):
+        """서버의 모든 텍스트 채널에서 아직 수집하지 않은 과거 메시지를 수집
+        
+        Returns:
+            백필로 저장한 메시지 수
+        """
+        db_manager = self.bot.get_guild_db_manager(guild.id)
+        text_channels = [c for c in guild.channels if isinstance(c, discord.TextChannel)]
+        channel_states = await db_manager.get_channel_states(guild.id)
+        
+        pending_channels = [
+            channel for channel in text_channels
+            if not (channel_states.get(channel.id) and channel_states[channel.id].backfill_complete)
+        ]
+        
+        # 백필이 끝나지 않은 스레드 (보관된 스레드는 캐시에 없으므로 API로 조회)
+        for channel_id, state in channel_states.items():
+            if not state.parent_id or state.backfill_complete:
+                continue
+            thread = guild.get_thread(channel_id)
+            if thread is None:
+                try:
+                    thread = await guild.fetch_channel(channel_id)
+                except discord.HTTPException as e:
+                    logger.debug(f"스레드 {channel_id}를 조회할 수 없어 백필을 건너뜁니다: {str(e)}")
+                    continue
+            pending_channels.append(thread)
+        if not pending_channels:
+            return 0
+        
+        logger.info(f"📚 서버 '{guild.name}'({guild.id}) 과거 메시지 백필 시작: {len(pending_channels)}개 채널")
+        total_backfilled = 0
+        
+        for channel in pending_channels:
+            await self._wait_for_incremental_collection()
+            try:
+                total_backfilled += await self.backfill_channel(channel, db_manager, channel_states.get(channel.id))
+            except discord.Forbidden:
+                logger.warning(f"⚠️ 채널 '{channel.name}'({channel.id})에 접근 권한이 없어 백필을 건너뜁니다.")
+            except Exception as e:
+                logger.error(f"❌ 채널 '{channel.name}'({channel.id}) 백필 중 오류: {str(e)}")
+        
+        logger.info(f"📚 서버 '{guild.name}'({guild.id}) 과거 메시지 백필 완료: {total_backfilled}개 메시지")
+        logger.info(f"ℹ️ 요청 통계: {self.scheduler.format_stats()}")
+        return total_backfilled
+    
+    async def backfill_channel(self, channel, db_manager, state=None):
+        """채널의 과거 메시지를 before= 커서로 거슬러 올라가며 수집
+        
+        backfill_page_size개마다 메시지와 프론티어를 같은 트랜잭션으로 커밋하므로
+        중단되더라도 다음 실행에서 마지막 프론티어부터 이어서 수집합니다.
+        
+        Args:
+            channel: 디스코드 텍스트 채널 객체
+            db_manager: 사용할 데이터베이스 매니저
+            state: 채널의 ChannelState (없으면 None)
+            
+        Returns:
+            저장한 메시지 수
+        """
+        if state and state.backfill_complete:
+            return 0
+        
+        # 프론티어: 이 ID보다 오래된 메시지를 수집 (상태가 없으면 저장된 가장 오래된 메시지 기준)
+        frontier = state.backfill_before_id if state else None
+        if not frontier:
+            oldest_id = await db_manager.get_oldest_message_id(channel.id)
+            frontier = int(oldest_id) if oldest_id else None
+        
+        # 남은 기간이 길면 스노우플레이크 구간으로 나눠 병렬 백필
+        if self.backfill_partitions > 1:
+            ranges = await db_manager.get_backfill_ranges(channel.guild.id, channel.id)
+            if ranges or self._backfill_span_days(channel, frontier) >= self.backfill_partition_min_days:
+                return await self._backfill_channel_partitioned(channel, db_manager, frontier, ranges)
+        
+        logger.info(f"📚 채널 '{channel.name}'({channel.id}) 백필 중... (프론티어: {frontier or '최신'})")
+        
+        # 커밋 시점은 백필 페이지 단위로만 결정
+        writer = MessageBatchWriter(db_manager, self.backfill_page_size, float('inf'), analyzer=self.writer_analyzer)
+        backfilled = 0
+        guild_id = channel.guild.id
+        
+        before = discord.Object(id=frontier) if frontier else None
+        try:
+            async for message in self._paced_history(channel, before=before):
+                # 프론티어를 메시지마다 앞당겨 두면 어느 배치에서 커밋되든 메시지와 함께 저장됨
+                writer.set_channel_state(guild_id, channel.id, backfill_before_id=message.id)
+                if await writer.add(self.message_to_dict(message, analyze=False)):
+                    backfilled += 1
+                
+                # 증분 수집이 시작되면 페이지 경계에서 양보
+                if self.is_collecting and len(writer.buffer) == 0:
+                    await self._wait_for_incremental_collection()
+            
+            # 끝까지 읽었으면 백필 완료 표시
+            writer.set_channel_state(guild_id, channel.id, backfill_complete=True)
+            logger.info(f"✅ 채널 '{channel.name}'({channel.id}) 백필 완료: {backfilled}개 메시지")
+        finally:
+            await writer.flush()
+        
+        return backfilled
+    
+    def _backfill_upper_bound(self, channel, frontier):
+        """백필할 메시지 ID의 상한 (이 ID보다 오래된 메시지가 대상)"""
+        if frontier:
+            return int(frontier)
+        last_message_id = getattr(channel, 'last_message_id', None)
+        if last_message_id:
+            return int(last_message_id) + 1
+        return discord.utils.time_snowflake(datetime.now(timezone.utc), high=True)
+    
+    def _backfill_span_days(self, channel, frontier):
+        """채널 생성 시점부터 프론티어까지 남은 백필 기간 (일)"""
+        upper = self._backfill_upper_bound(channel, frontier)
+        span = discord.utils.snowflake_time(upper) - discord.utils.snowflake_time(channel.id)
+        return span.total_seconds() / 86400
+    
+    async def _backfill_channel_partitioned(self, channel, db_manager, frontier, ranges):
+        """채널 생성 시점부터 프론티어까지를 스노우플레이크 구간으로 나눠 동시에 백필
+        
+        구간마다 after=/before= 쌍으로 history를 읽고, 모든 구간이 같은 배치 버퍼에
+        메시지와 구간 커서를 기록하므로 완료된 구간과 진행 위치가 재시작 후에도 유지됩니다.
+        
+        Args:
+            channel: 디스코드 텍스트 채널 객체
+            db_manager: 사용할 데이터베이스 매니저
+            frontier: 순차 백필 프론티어 (구간을 새로 만들 때의 상한)
+            ranges: 저장된 BackfillRange 목록 (없으면 새로 분할)
+            
+        Returns:
+            저장한 메시지 수
+        """
+        guild_id = channel.guild.id
+        writer = MessageBatchWriter(db_manager, self.backfill_page_size, float('inf'), analyzer=self.writer_analyzer)
+        
+        if ranges:
+            pending = [(r.range_start, r.cursor) for r in ranges if not r.complete]
+        else:
+            # 채널 생성 시점 이전에는 메시지가 없으므로 채널 ID를 하한으로 사용
+            # (포럼 게시글은 첫 메시지 ID가 스레드 ID와 같으므로 1을 빼서 포함시킴)
+            lower = int(channel.id) - 1
+            upper = self._backfill_upper_bound(channel, frontier)
+            bounds = [lower + (upper - lower) * i // self.backfill_partitions for i in range(self.backfill_partitions + 1)]
+            pending = []
+            for range_start, range_end in zip(bounds, bounds[1:]):
+                writer.set_backfill_range(guild_id, channel.id, range_start, range_end=range_end, cursor=range_end, complete=False)
+                pending.append((range_start, range_end))
+            await writer.flush()
+        
+        logger.info(f"📚 채널 '{channel.name}'({channel.id}) 구간 분할 백필 중... (남은 구간 {len(pending)}개)")
+        counts = {}
+        
+        async def backfill_range(range_start, cursor):
+            counts[range_start] = 0
+            history = self._paced_history(
+                channel,
+                before=discord.Object(id=cursor),
+                after=discord.Object(id=range_start)
+            )
+            async for message in history:
+                # 구간 커서를 메시지마다 앞당겨 두면 어느 배치에서 커밋되든 메시지와 함께 저장됨
+                writer.set_backfill_range(guild_id, channel.id, range_start, cursor=message.id)
+                if await writer.add(self.message_to_dict(message, analyze=False)):
+                    counts[range_start] += 1
+                
+                # 증분 수집이 시작되면 페이지 경계에서 양보
+                if self.is_collecting and len(writer.buffer) == 0:
+                    await self._wait_for_incremental_collection()
+            
+            writer.set_backfill_range(guild_id, channel.id, range_start, complete=True)
+        
+        try:
+            results = await asyncio.gather(
+                *[backfill_range(range_start, cursor) for range_start, cursor in pending],
+                return_exceptions=True
+            )
+            failed = [result for result in results if isinstance(result, Exception)]
+            if failed:
+                logger.warning(f"⚠️ 채널 '{channel.name}'({channel.id}) 백필 구간 {len(failed)}개 실패: {str(failed[0])}")
+            else:
+                # 모든 구간을 끝까지 읽었으면 채널 백필 완료 표시
+                writer.set_channel_state(guild_id, channel.id, backfill_complete=True)
+                logger.info(f"✅ 채널 '{channel.name}'({channel.id}) 구간 분할 백필 완료: {sum(counts.values())}개 메시지")
+        finally:
+            await writer.flush()
+        
+        return sum(counts.values())
+    
+    def request_gap_fill(self):
+        """모든 서버에 누락분 보충 수집 요청 (재연결 후 호출)"""
+        logger.info("🔌 게이트웨이 재연결로 누락 메시지 보충 수집을 요청합니다.")
+        for event in self.gap_fill_events.values():
+            event.set()
+    
+    async def ingest_live_message(self, message):
+        """게이트웨이로 받은 메시지를 실시간 저장 버퍼에 추가
+        
+        Args:
+            message: Discord 메시지 객체
+            
+        Returns:
+            버퍼에 추가되었는지 여부
+        """
+        if not self.live_ingest_enabled or not message.guild:
+            return False
+        
+        # 봇 자신의 메시지는 무시
+        if self.bot_id:
+            bot_ids = [bot_id.strip() for bot_id in str(self.bot_id).split(',')]
+            if str(message.author.id) in bot_ids:
+                return False
+        
+        try:
+            guild_id = message.guild.id
+            writer = self.live_writers.get(guild_id)
+            if writer is None:
+                db_manager = self.bot.get_guild_db_manager(guild_id)
+                writer = MessageBatchWriter(db_manager, self.live_batch_size, self.live_flush_interval, analyzer=self.writer_analyzer)
+                self.live_writers[guild_id] = writer
+            
+            # 메시지가 뜸해도 flush_interval 안에 저장되도록 주기적 저장 태스크 실행
+            if self.live_flush_task is None or self.live_flush_task.done():
+                self.live_flush_task = asyncio.create_task(self._live_flush_loop())
+            
+            return await writer.add(self.message_to_dict(message, analyze=False))
+        except Exception as e:
+            logger.error(f"실시간 메시지 저장 중 오류 발생: {str(e)}")
+            return False
+    
+    async def _live_flush_loop(self):
+        """실시간 저장 버퍼를 주기적으로 저장"""
+        while True:
+            await asyncio.sleep(self.live_flush_interval / 2)
+            await self.flush_live_messages(only_due=True)
+    
+    async def flush_live_messages(self, only_due=False):
+        """실시간 저장 버퍼에 남은 메시지 저장
+        
+        Args:
+            only_due: True면 flush_interval이 지난 버퍼만 저장
+            
+        Returns:
+            저장된 메시지 수
+        """
+        saved = 0
+        for guild_id, writer in list(self.live_writers.items()):
+            if only_due and not writer.should_flush():
+                continue
+            try:
+                saved += await writer.flush()
+            except Exception as e:
+                logger.error(f"서버 {guild_id} 실시간 메시지 저장 중 오류 발생: {str(e)}")
+        return saved
+    
     def start_collection_scheduler(self):
         """메시지 수집 스케줄러 시작"""
         self.collection_task = asyncio.create_task(self.schedule_collection())
         logger.info("🚀 메시지 수집 스케줄러가 시작되었습니다.")
+        self.start_enrichment_worker()
+        self.start_maintenance_task()
         return self.collection_task
     
-    async def _save_message(self, message, db_manager):
-        """단일 메시지를 처리하여 DB에 저장
+    def start_maintenance_task(self):
+        """데이터베이스 유지보수 백그라운드 작업 시작 (이미 실행 중이면 무시)"""
+        if self.maintenance_task is None or self.maintenance_task.done():
+            self.maintenance_task = asyncio.create_task(self._maintenance_loop())
+        return self.maintenance_task
+    
+    async def _maintenance_loop(self):
+        """열려 있는 모든 데이터베이스의 WAL 체크포인트와 통계 갱신, 검색 색인 저장을 주기적으로 실행"""
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            for db_manager in list(db_managers.values()):
+                result = await db_manager.run_maintenance()
+                checkpoint = result.get('wal_checkpoint')
+                if checkpoint:
+                    logger.debug(f"🧹 데이터베이스 유지보수: {db_manager.db_path} WAL 페이지 {checkpoint[1]}개 체크포인트")
+            await save_ngram_snapshots()
+            if self.config.get('SEARCH_MODE') in ('vector', 'hybrid'):
+                from .embeddings import save_vector_indexes
+                await save_vector_indexes()
+    
+    def start_enrichment_worker(self):
+        """분석 대기 메시지를 채우는 백그라운드 작업 시작 (이미 실행 중이면 무시)"""
+        if self.enrichment_task is None or self.enrichment_task.done():
+            self.enrichment_task = asyncio.create_task(self._enrichment_loop())
+        return self.enrichment_task
+    
+    async def _enrichment_loop(self):
+        """허용된 서버의 분석 대기 메시지를 주기적으로 분석"""
+        while True:
+            try:
+                for guild in self.bot.guilds:
+                    if not self.bot.is_guild_allowed(guild.id):
+                        continue
+                    db_manager = self.bot.get_guild_db_manager(guild.id)
+                    enriched = await self.enrich_pending_messages(db_manager)
+                    if enriched:
+                        logger.info(f"🧠 서버 '{guild.name}'({guild.id}) 메시지 {enriched}개 분석 완료")
+            except Exception as e:
+                logger.error(f"❌ 백그라운드 메시지 분석 중 오류: {str(e)}")
+            await asyncio.sleep(self.enrichment_interval)
+    
+    async def enrich_pending_messages(self, db_manager):
+        """분석 대기 중이거나 이전 버전으로 분석된 메시지를 배치 단위로 분석해 갱신
         
         Args:
-            message: Discord 메시지 객체
             db_manager: 사용할 데이터베이스 매니저
             
         Returns:
-            성공 여부 (True/False)
+            분석 필드를 갱신한 메시지 수
         """
-        try:
-            # 메시지를 딕셔너리로 변환
-            message_dict = self.message_to_dict(message)
+        total = 0
+        while True:
+            pending = await db_manager.get_pending_analysis(ANALYZER_VERSION, self.enrichment_batch_size)
+            if not pending:
+                break
             
-            # 메시지가 유효하면 저장
-            if message_dict:
-                await db_manager.save_messages([message_dict])
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"메시지 저장 중 오류 발생: {str(e)}")
-            return False 
\ No newline at end of file
+            analyses = await self.analyzer.analyze_many([content for _, content in pending])
+            updates = [
+                dict(analysis_to_columns(analysis), id=message_id, content=content)
+                for (message_id, content), analysis in zip(pending, analyses)
+            ]
+            updated = await db_manager.update_message_analysis(updates)
+            total += updated
+            
+            # 갱신하지 못한 배치(조회 후 모두 수정됨, 저장 오류 등)는 다음 주기에 다시 시도
+            if updated == 0:
+                break
+        return total
@@ -36,9 +36,62 @@ def get_config():
         'DATABASE_PATH': os.getenv('DATABASE_PATH', 'db/discord_messages.db'),
         'COLLECTION_INTERVAL': int(os.getenv('COLLECTION_INTERVAL', 3 * 60 * 60)),  # 기본 3시간 (초 단위)
         'MAX_MESSAGES_PER_FETCH': int(os.getenv('MAX_MESSAGES_PER_FETCH', 1000)),   # 한 번에 가져올 최대 메시지 수
+        'COLLECTION_BATCH_SIZE': int(os.getenv('COLLECTION_BATCH_SIZE', 500)),      # 한 번에 DB에 저장할 메시지 수
+        'COLLECTION_FLUSH_INTERVAL': float(os.getenv('COLLECTION_FLUSH_INTERVAL', 5)),  # 배치가 차지 않아도 저장하는 간격 (초)
+        'COLLECTION_MAX_CONCURRENT_CHANNELS': int(os.getenv('COLLECTION_MAX_CONCURRENT_CHANNELS', 4)),  # 동시에 수집할 최대 채널 수
+        'REQUEST_MAX_CONCURRENCY': int(os.getenv('REQUEST_MAX_CONCURRENCY', 8)),  # 동시에 보낼 최대 history 요청 수 (429 발생 시 자동으로 줄어듦)
+        
+        # 과거 메시지 백필 설정
+        'BACKFILL_ENABLED': os.getenv('BACKFILL_ENABLED', 'true').lower() in ('1', 'true', 'yes'),  # 채널 전체 기록을 과거로 거슬러 수집
+        'BACKFILL_PAGE_SIZE': int(os.getenv('BACKFILL_PAGE_SIZE', 1000)),  # 백필 시 한 번에 커밋할 메시지 수
+        'BACKFILL_PARTITIONS': int(os.getenv('BACKFILL_PARTITIONS', 4)),   # 오래된 채널을 나눠 동시에 백필할 구간 수 (1이면 순차)
+        'BACKFILL_PARTITION_MIN_DAYS': float(os.getenv('BACKFILL_PARTITION_MIN_DAYS', 30)),  # 구간 분할을 적용할 최소 남은 기간 (일)
+        
+        # 실시간 수집 설정
+        'LIVE_INGEST_ENABLED': os.getenv('LIVE_INGEST_ENABLED', 'true').lower() in ('1', 'true', 'yes'),  # on_message로 받은 메시지를 바로 저장
+        'LIVE_INGEST_BATCH_SIZE': int(os.getenv('LIVE_INGEST_BATCH_SIZE', 100)),       # 실시간 저장 배치 크기
+        'LIVE_INGEST_FLUSH_INTERVAL': float(os.getenv('LIVE_INGEST_FLUSH_INTERVAL', 2)),  # 실시간 메시지 최대 저장 지연 (초)
+        
+        # 메시지 분석 설정
+        'ANALYSIS_PROCESS_THRESHOLD': int(os.getenv('ANALYSIS_PROCESS_THRESHOLD', 1000)),  # 이 수 이상의 배치는 프로세스 풀에서 분석
+        'ANALYSIS_MAX_WORKERS': int(os.getenv('ANALYSIS_MAX_WORKERS', 0)),  # 분석 프로세스 수 (0이면 CPU 수 기준, 최대 4)
+        'ANALYSIS_MODE': os.getenv('ANALYSIS_MODE', 'inline').lower(),  # inline: 저장 시 분석, deferred: 원문만 저장하고 백그라운드에서 분석
+        'ENRICHMENT_BATCH_SIZE': int(os.getenv('ENRICHMENT_BATCH_SIZE', 1000)),  # 백그라운드 분석 시 한 번에 갱신할 메시지 수
+        'ENRICHMENT_INTERVAL': float(os.getenv('ENRICHMENT_INTERVAL', 30)),  # 분석 대기 메시지 확인 간격 (초)
+        
+        # SQLite 저장소 설정
+        'DB_STORAGE_PROFILE': os.getenv('DB_STORAGE_PROFILE', 'wal').lower(),  # wal: WAL 모드와 성능 PRAGMA 적용, default: SQLite 기본값 (rollback journal)
+        'DB_MMAP_SIZE': int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024)),  # 메모리 매핑 크기 (바이트, wal 프로필)
+        'DB_CACHE_SIZE_KB': int(os.getenv('DB_CACHE_SIZE_KB', 64 * 1024)),  # 연결당 페이지 캐시 크기 (KB, wal 프로필)
+        'DB_MAINTENANCE_INTERVAL': float(os.getenv('DB_MAINTENANCE_INTERVAL', 3600)),  # WAL 체크포인트와 PRAGMA optimize 실행 간격 (초)
+        'DB_WRITE_COALESCE_INTERVAL': float(os.getenv('DB_WRITE_COALESCE_INTERVAL', 0.02)),  # 쓰기 작업을 한 트랜잭션으로 모으는 최대 대기 시간 (초)
+        'DB_WRITE_MAX_OPERATIONS': int(os.getenv('DB_WRITE_MAX_OPERATIONS', 100)),  # 한 트랜잭션으로 묶을 최대 쓰기 작업 수
+        'DB_READ_POOL_SIZE': int(os.getenv('DB_READ_POOL_SIZE', 4)),  # 검색용 읽기 전용 연결 수 (동시에 처리할 수 있는 질문 수)
+        
         'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
         'ALLOWED_GUILD_IDS': os.getenv('ALLOWED_GUILD_IDS', ''),
         
+        # 질문 검색 설정
+        'SEARCH_MODE': os.getenv('SEARCH_MODE', 'bm25').lower(),  # bm25: 전문 검색 인덱스 순위 검색 한 번, ngram: 메모리 n-gram 색인 검색, vector: 임베딩 유사도 검색, hybrid: bm25와 vector 순위 결합, legacy: 단계별 LIKE 검색
+        'SEARCH_RECENCY_WEIGHT': float(os.getenv('SEARCH_RECENCY_WEIGHT', 0.3)),  # 점수에서 최신성이 차지하는 비율 (0이면 최신성 무시)
+        'SEARCH_RECENCY_HALF_LIFE_DAYS': float(os.getenv('SEARCH_RECENCY_HALF_LIFE_DAYS', 180)),  # 최신성 가중치가 절반이 되는 메시지 나이 (일)
+        'SEARCH_TITLE_BOOST': float(os.getenv('SEARCH_TITLE_BOOST', 0.5)),  # 검색어가 첫 줄(제목)에 있을 때 더하는 가중치
+        'SEARCH_CANDIDATE_FACTOR': int(os.getenv('SEARCH_CANDIDATE_FACTOR', 3)),  # 제목 가중치로 다시 정렬할 후보 수 (limit의 배수)
+        
+        # 임베딩 검색 설정
+        'EMBEDDING_MODEL': os.getenv('EMBEDDING_MODEL', 'hashing'),  # hashing: 오프라인 CPU 해싱 임베딩, st:<모델명>: sentence-transformers 모델
+        'EMBEDDING_DIM': int(os.getenv('EMBEDDING_DIM', 256)),  # 해싱 임베딩 차원 수
+        'EMBEDDING_BATCH_SIZE': int(os.getenv('EMBEDDING_BATCH_SIZE', 512)),  # 한 번에 임베딩해서 파일에 추가할 메시지 수
+        'EMBEDDING_SEARCH_CHUNK_ROWS': int(os.getenv('EMBEDDING_SEARCH_CHUNK_ROWS', 16384)),  # 검색 시 한 번에 내적을 계산할 행 수
+        
+        # 근사 최근접 이웃(IVF-PQ) 검색 설정
+        'ANN_ENABLED': os.getenv('ANN_ENABLED', 'true').lower() in ('1', 'true', 'yes'),  # 큰 서버의 임베딩 검색에 근사 검색 인덱스 사용
+        'ANN_MIN_ROWS': int(os.getenv('ANN_MIN_ROWS', 50000)),  # 이 수보다 임베딩이 적은 서버는 전체 행렬을 정확히 검색
+        'ANN_NLIST': int(os.getenv('ANN_NLIST', 0)),  # 거친 군집 수 (0이면 4 * sqrt(행 수))
+        'ANN_NPROBE': int(os.getenv('ANN_NPROBE', 32)),  # 검색할 군집 수 (늘리면 재현율이 오르고 느려짐)
+        'ANN_PQ_SUBVECTORS': int(os.getenv('ANN_PQ_SUBVECTORS', 32)),  # PQ 부분 벡터 수 (임베딩 차원의 약수, 벡터당 바이트 수)
+        'ANN_REFINE': int(os.getenv('ANN_REFINE', 10)),  # 근사 점수로 k * 이 값만큼 후보를 고른 뒤 원래 벡터로 재정렬 (0이면 재정렬 안 함)
+        
         # LLM 관련 설정
         'LLM_API_URL': os.getenv('LLM_API_URL', 'http://localhost:1234/v1/chat/completions'),
         'BOT_ID': os.getenv('BOT_ID')
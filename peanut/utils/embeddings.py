@@ -0,0 +1,517 @@
+import os
+import re
+import math
+import zlib
+import struct
+import asyncio
+import logging
+from array import array
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, delete, insert, exists, and_
+
+from .config import get_config
+from .ngram_index import tokenize, content_checksum
+from .ann_index import IVFPQIndex, build_ivfpq_index
+from ..db.database import DiscordMessage, EmbeddingRow
+
+# 로깅 설정
+logger = logging.getLogger('discord.embeddings')
+
+# 근사 검색 인덱스를 학습한 행 수의 이 배수보다 행이 많아지면 다시 학습
+ANN_RETRAIN_FACTOR = 4
+
+class HashingEmbedder:
+    """오프라인 CPU 해싱 임베딩
+
+    토큰과 토큰의 문자 2/3-gram을 crc32로 dim개 차원에 해싱하고(부호도 해시로 결정)
+    로그 빈도로 가중한 뒤 L2 정규화합니다. 학습이나 모델 파일 없이 같은 입력에 항상 같은 벡터를 만듭니다.
+    """
+
+    def __init__(self, dim=256):
+        self.dim = max(8, int(dim))
+        self.name = f"hashing-{self.dim}"
+
+    def features(self, content: str) -> Counter:
+        """해싱할 특징 (토큰 전체와 토큰의 문자 2/3-gram)"""
+        features = Counter()
+        for token in tokenize(content):
+            features['w:' + token] += 1
+            for size in (2, 3):
+                for i in range(len(token) - size + 1):
+                    features[token[i:i + size]] += 1
+        return features
+
+    def embed(self, contents: List[str]) -> np.ndarray:
+        """내용 목록을 (len(contents), dim) float32 정규화 벡터로 변환"""
+        matrix = np.zeros((len(contents), self.dim), dtype=np.float32)
+        for i, content in enumerate(contents):
+            features = self.features(content or '')
+            if not features:
+                continue
+            indices = np.empty(len(features), dtype=np.int64)
+            values = np.empty(len(features), dtype=np.float32)
+            for j, (feature, count) in enumerate(features.items()):
+                hashed = zlib.crc32(feature.encode('utf-8'))
+                indices[j] = hashed % self.dim
+                values[j] = (1.0 + math.log(count)) * (1.0 if hashed & 0x80000000 else -1.0)
+            np.add.at(matrix[i], indices, values)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 모델 임베딩 (패키지와 모델이 있을 때만 사용)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = 'st-' + re.sub(r'[^0-9A-Za-z_.-]+', '_', model_name)
+
+    def embed(self, contents: List[str]) -> np.ndarray:
+        return self.model.encode(
+            [content or '' for content in contents],
+            normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+def get_embedder(model=None, dim=None):
+    """설정된 임베딩 모델 반환 (sentence-transformers를 불러올 수 없으면 해싱 임베딩)
+
+    Args:
+        model: 'hashing' 또는 'st:<모델명>' (없으면 EMBEDDING_MODEL 설정)
+        dim: 해싱 임베딩 차원 수 (없으면 EMBEDDING_DIM 설정)
+    """
+    config = get_config()
+    model = model or config.get('EMBEDDING_MODEL', 'hashing')
+    dim = dim or config.get('EMBEDDING_DIM', 256)
+    if model.startswith('st:'):
+        try:
+            return SentenceTransformerEmbedder(model[3:])
+        except Exception as e:
+            logger.error(f"임베딩 모델 {model[3:]}을(를) 불러올 수 없어 해싱 임베딩을 사용합니다: {str(e)}")
+    return HashingEmbedder(dim)
+
+class VectorFile:
+    """행을 뒤에 추가하기만 하는 float16 .npy 행렬 파일
+
+    헤더 크기를 HEADER_SIZE로 고정해 행을 추가한 뒤 헤더의 행 수만 제자리에서 고칩니다.
+    데이터를 먼저 쓰고 헤더를 나중에 쓰므로, 중간에 멈추면 헤더의 행 수까지만 유효합니다.
+    일반 .npy 파일이므로 np.load(path, mmap_mode='r')로도 읽을 수 있습니다.
+    """
+
+    HEADER_SIZE = 128
+    DTYPE = np.dtype('<f2')
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * self.DTYPE.itemsize
+        self._matrix = None
+        if os.path.exists(path):
+            self.rows = self._read_header()
+        else:
+            self.rows = 0
+            with open(path, 'wb') as f:
+                self._write_header(f, 0)
+
+    def _read_header(self) -> int:
+        with open(self.path, 'rb') as f:
+            np.lib.format.read_magic(f)
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            if f.tell() != self.HEADER_SIZE or dtype != self.DTYPE or fortran_order or shape[1:] != (self.dim,):
+                raise ValueError(f"임베딩 파일 형식이 맞지 않습니다: {self.path} (shape={shape}, dtype={dtype})")
+        # 헤더를 쓰기 전에 멈춘 경우를 대비해 실제 파일 크기와 비교
+        stored_rows = (os.path.getsize(self.path) - self.HEADER_SIZE) // self.row_bytes
+        return min(shape[0], stored_rows)
+
+    def _write_header(self, f, rows: int):
+        header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d, %d), }" % (self.DTYPE.str, rows, self.dim)
+        header = header.ljust(self.HEADER_SIZE - 10 - 1) + '\n'
+        f.seek(0)
+        f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1'))
+
+    def append(self, vectors: np.ndarray) -> int:
+        """행 추가
+
+        Returns:
+            추가한 첫 행 번호
+        """
+        data = np.ascontiguousarray(vectors, dtype=self.DTYPE)
+        first_row = self.rows
+        with open(self.path, 'r+b') as f:
+            f.seek(self.HEADER_SIZE + first_row * self.row_bytes)
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            self._write_header(f, first_row + len(data))
+        self.rows = first_row + len(data)
+        return first_row
+
+    def truncate(self, rows: int):
+        """rows 이후의 행 제거"""
+        with open(self.path, 'r+b') as f:
+            f.truncate(self.HEADER_SIZE + rows * self.row_bytes)
+            self._write_header(f, rows)
+        self.rows = rows
+        self._matrix = None
+
+    def matrix(self) -> np.ndarray:
+        """현재 행 수만큼의 읽기 전용 메모리 매핑 행렬"""
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            if self.rows == 0:
+                self._matrix = np.empty((0, self.dim), dtype=self.DTYPE)
+            else:
+                self._matrix = np.memmap(
+                    self.path, dtype=self.DTYPE, mode='r',
+                    offset=self.HEADER_SIZE, shape=(self.rows, self.dim)
+                )
+        return self._matrix
+
+def top_k_rows(matrix: np.ndarray, query: np.ndarray, k: int, valid: np.ndarray, chunk_rows: int = 16384) -> List[Tuple[int, float]]:
+    """행렬을 chunk_rows행씩 float32로 바꿔 내적하고 상위 k개 행 반환
+
+    Args:
+        matrix: (행 수, 차원) 행렬 (memmap 가능)
+        query: (차원,) 질의 벡터
+        k: 반환할 행 수
+        valid: 행별 검색 대상 여부 (False인 행은 제외)
+        chunk_rows: 한 번에 계산할 행 수
+
+    Returns:
+        [(행 번호, 점수)] 점수 내림차순
+    """
+    rows = min(len(matrix), len(valid))
+    best_rows = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    for start in range(0, rows, chunk_rows):
+        end = min(rows, start + chunk_rows)
+        scores = np.asarray(matrix[start:end], dtype=np.float32) @ query
+        scores[~valid[start:end]] = -np.inf
+        if len(scores) > k:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        best_rows = np.concatenate([best_rows, candidates + start])
+        best_scores = np.concatenate([best_scores, scores[candidates]])
+        if len(best_rows) > k:
+            keep = np.argpartition(best_scores, -k)[-k:]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+    order = np.argsort(-best_scores)
+    return [(int(best_rows[i]), float(best_scores[i])) for i in order if np.isfinite(best_scores[i])]
+
+class VectorStore:
+    """데이터베이스 하나의 메시지 임베딩 저장소
+
+    임베딩은 데이터베이스 옆의 <db>.<모델>.npy 파일에 행으로 추가하고, 행 번호와 메시지 ID는
+    embedding_rows 테이블에 저장합니다. 시작하면 아직 임베딩하지 않은 메시지를 최신순으로 채우고,
+    이후에는 DatabaseManager가 저장한 새 메시지와 내용이 바뀐 메시지만 임베딩합니다.
+
+    행이 ANN_MIN_ROWS개 이상이면 IVF-PQ 근사 검색 인덱스(<db>.<모델>.ivfpq.npz)를 만들어
+    ANN_NPROBE개 군집만 검색하고, 그보다 작은 서버는 전체 행렬을 정확히 검색합니다.
+    """
+
+    def __init__(self, db_manager, embedder=None):
+        config = get_config()
+        self.db_manager = db_manager
+        self.embedder = embedder or get_embedder()
+        self.model = self.embedder.name
+        self.path = f"{os.path.splitext(db_manager.db_path)[0]}.{self.model}.npy"
+        self.batch_size = max(1, config.get('EMBEDDING_BATCH_SIZE', 512))
+        self.chunk_rows = max(1, config.get('EMBEDDING_SEARCH_CHUNK_ROWS', 16384))
+
+        # 근사 최근접 이웃 인덱스 설정
+        self.ann_enabled = config.get('ANN_ENABLED', True)
+        self.ann_min_rows = max(1, config.get('ANN_MIN_ROWS', 50000))
+        self.ann_nlist = max(0, config.get('ANN_NLIST', 0))
+        self.ann_nprobe = max(1, config.get('ANN_NPROBE', 32))
+        self.ann_subvectors = math.gcd(self.embedder.dim, max(1, config.get('ANN_PQ_SUBVECTORS', 32)))
+        self.ann_refine = max(0, config.get('ANN_REFINE', 10))
+        self.ann_path = f"{os.path.splitext(self.path)[0]}.ivfpq.npz"
+        self.ann: Optional[IVFPQIndex] = None
+        self.ann_dirty = False
+
+        self.file: Optional[VectorFile] = None
+        self.row_ids = array('q')          # 행 번호 → 메시지 ID (매핑이 없는 행은 0)
+        self.row_checksums = array('I')    # 행 번호 → 임베딩한 내용 체크섬
+        self.rows_by_message: Dict[int, int] = {}
+        self.ready = False
+        self._pending: Dict[int, str] = {}  # 저장 콜백으로 받은 임베딩할 메시지
+        self._wakeup = None
+        self._task = None
+        db_manager.add_message_listener(self.on_messages_saved)
+
+    def start(self):
+        """백그라운드 임베딩 작업 시작 (이미 시작했으면 무시)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        try:
+            await self._open()
+            self.ready = True
+            logger.info(f"임베딩 저장소 준비 완료: {self.path} (행 {self.file.rows}개)")
+        except Exception as e:
+            logger.error(f"임베딩 저장소를 열 수 없습니다: {str(e)}", exc_info=True)
+            return
+
+        # 아직 임베딩하지 않은 저장된 메시지 채우기
+        try:
+            total = 0
+            while True:
+                count = await self.embed_missing()
+                if not count:
+                    break
+                total += count
+            if total:
+                logger.info(f"메시지 {total}개를 임베딩했습니다: {self.path}")
+            await self.update_ann_index()
+        except Exception as e:
+            logger.error(f"메시지 임베딩 중 오류 발생: {str(e)}", exc_info=True)
+
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                while await self.embed_pending():
+                    pass
+                await self.update_ann_index()
+            except Exception as e:
+                logger.error(f"새 메시지 임베딩 중 오류 발생: {str(e)}", exc_info=True)
+
+    async def _open(self):
+        """임베딩 파일과 매핑 테이블을 읽고 서로 맞춤"""
+        async with self.db_manager.ReadSessionLocal() as session:
+            mappings = (await session.execute(
+                select(EmbeddingRow.row, EmbeddingRow.message_id, EmbeddingRow.checksum)
+                .where(EmbeddingRow.model == self.model)
+                .order_by(EmbeddingRow.row)
+            )).all()
+
+        self.file = await asyncio.to_thread(VectorFile, self.path, self.embedder.dim)
+        mapped_rows = mappings[-1][0] + 1 if mappings else 0
+
+        # 매핑을 저장하기 전에 멈춰 파일에만 추가된 행 제거
+        if self.file.rows > mapped_rows:
+            await asyncio.to_thread(self.file.truncate, mapped_rows)
+
+        # 파일에 없는 행의 매핑 제거 (파일을 지운 경우 등)
+        if mapped_rows > self.file.rows:
+            file_rows = self.file.rows
+
+            async def operation(session):
+                await session.execute(
+                    delete(EmbeddingRow).where(EmbeddingRow.model == self.model, EmbeddingRow.row >= file_rows)
+                )
+            await self.db_manager.writer.submit(operation)
+            mappings = [mapping for mapping in mappings if mapping[0] < file_rows]
+            logger.warning(f"임베딩 파일에 없는 매핑 {mapped_rows - file_rows}개를 지웠습니다: {self.path}")
+
+        self.row_ids = array('q', [0]) * self.file.rows
+        self.row_checksums = array('I', [0]) * self.file.rows
+        for row, message_id, checksum in mappings:
+            self.row_ids[row] = message_id
+            self.row_checksums[row] = checksum or 0
+            self.rows_by_message[message_id] = row
+
+        if self.ann_enabled:
+            self.ann = await asyncio.to_thread(self._load_ann_index)
+
+    def _load_ann_index(self) -> Optional[IVFPQIndex]:
+        """저장된 근사 검색 인덱스를 읽고 인덱스 이후에 추가된 행 반영"""
+        index = IVFPQIndex.load(self.ann_path, self.embedder.dim)
+        if index is None:
+            return None
+        if index.covered_rows > self.file.rows:
+            logger.warning(f"근사 검색 인덱스가 임베딩 파일보다 커서 다시 만듭니다: {self.ann_path}")
+            return None
+        if index.covered_rows < self.file.rows:
+            index.add(np.asarray(self.file.matrix()[index.covered_rows:], dtype=np.float32), index.covered_rows)
+            self.ann_dirty = True
+        return index
+
+    async def update_ann_index(self):
+        """행 수가 ANN_MIN_ROWS에 이르렀거나 학습 때보다 ANN_RETRAIN_FACTOR배 늘었으면 인덱스를 새로 학습"""
+        if not self.ann_enabled or self.file.rows < self.ann_min_rows:
+            return
+        if self.ann is not None and self.file.rows <= self.ann.trained_rows * ANN_RETRAIN_FACTOR:
+            return
+
+        index = await asyncio.to_thread(
+            build_ivfpq_index, self.file.matrix(),
+            nlist=self.ann_nlist, m=self.ann_subvectors, chunk_rows=self.chunk_rows
+        )
+        self.ann = index
+        self.ann_dirty = True
+        logger.info(
+            f"근사 검색 인덱스를 만들었습니다: {self.ann_path} "
+            f"(행 {index.covered_rows}개, 군집 {index.nlist}개, PQ 부분 벡터 {index.m}개)"
+        )
+        await self.save_ann_index()
+
+    async def save_ann_index(self) -> bool:
+        """바뀐 근사 검색 인덱스 저장 (스레드에서 실행)"""
+        if self.ann is None or not self.ann_dirty:
+            return False
+        self.ann_dirty = False
+        try:
+            await asyncio.to_thread(self.ann.save, self.ann_path)
+            return True
+        except Exception as e:
+            self.ann_dirty = True
+            logger.error(f"근사 검색 인덱스 저장 중 오류 발생: {str(e)}")
+            return False
+
+    def on_messages_saved(self, rows):
+        """DatabaseManager가 메시지를 커밋한 뒤 호출하는 콜백"""
+        for row in rows:
+            if row.get('content'):
+                self._pending[int(row['id'])] = row['content']
+        if self._pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def embed_missing(self) -> int:
+        """임베딩이 없는 저장된 메시지를 최신순으로 한 배치 임베딩
+
+        Returns:
+            임베딩한 메시지 수
+        """
+        async with self.db_manager.ReadSessionLocal() as session:
+            rows = (await session.execute(
+                select(DiscordMessage.id, DiscordMessage.content).where(
+                    DiscordMessage.content.isnot(None),
+                    DiscordMessage.content != "",
+                    ~exists().where(and_(EmbeddingRow.model == self.model, EmbeddingRow.message_id == DiscordMessage.id))
+                ).order_by(DiscordMessage.id.desc()).limit(self.batch_size)
+            )).all()
+        return await self._embed_rows(rows)
+
+    async def embed_pending(self) -> int:
+        """저장 콜백으로 받은 새 메시지/내용이 바뀐 메시지 중 한 배치 임베딩
+
+        Returns:
+            임베딩한 메시지 수
+        """
+        rows = []
+        while self._pending and len(rows) < self.batch_size:
+            message_id, content = self._pending.popitem()
+            row = self.rows_by_message.get(message_id)
+            if row is None or self.row_checksums[row] != content_checksum(content):
+                rows.append((message_id, content))
+        return await self._embed_rows(rows)
+
+    async def _embed_rows(self, rows) -> int:
+        """(메시지 ID, 내용) 목록을 임베딩해 파일에 추가하고 매핑 저장"""
+        if not rows:
+            return 0
+
+        contents = [content for _, content in rows]
+        first_row = await asyncio.to_thread(self._embed_and_append, contents)
+
+        replaced = [message_id for message_id, _ in rows if message_id in self.rows_by_message]
+        mappings = [
+            {'model': self.model, 'row': first_row + i, 'message_id': message_id, 'checksum': content_checksum(content)}
+            for i, (message_id, content) in enumerate(rows)
+        ]
+
+        async def operation(session):
+            if replaced:
+                await session.execute(
+                    delete(EmbeddingRow).where(EmbeddingRow.model == self.model, EmbeddingRow.message_id.in_(replaced))
+                )
+            await session.execute(insert(EmbeddingRow), mappings)
+        try:
+            await self.db_manager.writer.submit(operation)
+        except Exception:
+            # 파일에 추가된 행은 매핑 없는 행(0)으로 남기고, 메시지는 다음 배치에서 다시 임베딩
+            for message_id, content in rows:
+                self._pending.setdefault(message_id, content)
+            raise
+
+        for message_id in replaced:
+            self.row_ids[self.rows_by_message[message_id]] = 0
+        # 매핑 저장에 실패했던 이전 배치의 행이 있으면 0으로 채워 행 번호를 파일과 맞춤
+        missing = first_row + len(mappings) - len(self.row_ids)
+        if missing > 0:
+            self.row_ids.extend(array('q', [0]) * missing)
+            self.row_checksums.extend(array('I', [0]) * missing)
+        for mapping in mappings:
+            self.row_ids[mapping['row']] = mapping['message_id']
+            self.row_checksums[mapping['row']] = mapping['checksum']
+            self.rows_by_message[mapping['message_id']] = mapping['row']
+        return len(rows)
+
+    def _embed_and_append(self, contents: List[str]) -> int:
+        vectors = self.embedder.embed(contents)
+        first_row = self.file.append(vectors)
+        if self.ann is not None:
+            try:
+                self.ann.add(vectors, first_row)
+                self.ann_dirty = True
+            except Exception as e:
+                # 인덱스가 파일과 어긋나면 버리고 전체 검색 사용 (다음 학습 때 다시 만듦)
+                logger.error(f"근사 검색 인덱스에 추가하지 못했습니다: {str(e)}")
+                self.ann = None
+        return first_row
+
+    async def search(self, query: str, k: int = 30) -> Optional[List[Tuple[int, float]]]:
+        """질문과 코사인 유사도가 높은 메시지 검색
+
+        Returns:
+            [(메시지 ID, 유사도)] 유사도 내림차순 (저장소가 준비되지 않았으면 None)
+        """
+        if not self.ready:
+            return None
+        return await asyncio.to_thread(self._search, query, k)
+
+    def _search(self, query: str, k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        query_vector = self.embedder.embed([query])[0].astype(np.float32)
+        matrix = self.file.matrix()
+        row_ids = np.frombuffer(self.row_ids[:len(matrix)], dtype=np.int64)
+        valid = row_ids != 0
+
+        ann = self.ann
+        if ann is None or ann.covered_rows < self.ann_min_rows:
+            hits = top_k_rows(matrix, query_vector, k, valid, self.chunk_rows)
+        else:
+            rows, scores = ann.search(query_vector, k * max(1, self.ann_refine), nprobe or self.ann_nprobe, valid)
+            if self.ann_refine and len(rows):
+                # PQ 근사 점수로 고른 후보를 원래 벡터로 다시 계산해 정렬
+                rows = np.sort(rows)
+                scores = np.asarray(matrix[rows], dtype=np.float32) @ query_vector
+                order = np.argsort(-scores)[:k]
+                rows, scores = rows[order], scores[order]
+            hits = [(int(row), float(score)) for row, score in zip(rows[:k], scores[:k])]
+        return [(int(row_ids[row]), score) for row, score in hits]
+
+    def stats(self) -> Dict[str, Any]:
+        """임베딩 저장소 통계"""
+        return {
+            'model': self.model,
+            'rows': self.file.rows if self.file else 0,
+            'messages': len(self.rows_by_message),
+            'pending': len(self._pending),
+            'ann_rows': self.ann.covered_rows if self.ann else 0,
+        }
+
+# 데이터베이스 경로별 임베딩 저장소
+vector_stores: Dict[str, VectorStore] = {}
+
+def get_vector_store(db_manager) -> VectorStore:
+    """데이터베이스 매니저의 임베딩 저장소 반환 (없으면 생성)"""
+    store = vector_stores.get(db_manager.db_path)
+    if store is None:
+        store = VectorStore(db_manager)
+        vector_stores[db_manager.db_path] = store
+    return store
+
+async def save_vector_indexes():
+    """바뀐 근사 검색 인덱스를 모두 저장"""
+    for store in list(vector_stores.values()):
+        await store.save_ann_index()
@@ -12,8 +12,10 @@ import requests
 # sentence_transformers 관련 임포트 제거
 # from sentence_transformers import SentenceTransformer, util
 
-from ..db.database import get_db_manager, DiscordMessage
-from sqlalchemy import select, func, or_, and_
+from ..db.database import get_db_manager, DiscordMessage, datetime_to_snowflake
+from ..db.fts import messages_fts, fts_contains, fts_match, fts_bm25, MIN_TERM_LENGTH
+from .ngram_index import get_ngram_indexer
+from sqlalchemy import select, func, or_, and_, literal
 from sqlalchemy.sql import text
 
 # 로깅 설정
@@ -51,12 +53,19 @@ class LLMManager:
         
         # 봇의 사용자 ID (메시지 필터링용)
         self.bot_id = self.config.get('BOT_ID', None)
-        # 봇 ID 목록으로 변환 (쉼표로 구분된 문자열일 경우)
+        # 봇 ID 목록으로 변환 (쉼표로 구분된 문자열일 경우, author_id 컬럼과 같은 정수로 비교)
         self.bot_id_list = []
         if self.bot_id:
-            self.bot_id_list = [bid.strip() for bid in self.bot_id.split(',') if bid.strip()]
+            self.bot_id_list = [int(bid.strip()) for bid in self.bot_id.split(',') if bid.strip().isdigit()]
             logger.info(f"메시지 검색에서 제외할 봇 ID 목록: {self.bot_id_list}")
         
+        # 질문 검색 방식과 순위 가중치
+        self.search_mode = self.config.get('SEARCH_MODE', 'bm25')
+        self.recency_weight = min(1.0, max(0.0, self.config.get('SEARCH_RECENCY_WEIGHT', 0.3)))
+        self.recency_half_life = max(1.0, self.config.get('SEARCH_RECENCY_HALF_LIFE_DAYS', 180))
+        self.title_boost = max(0.0, self.config.get('SEARCH_TITLE_BOOST', 0.5))
+        self.candidate_factor = max(1, self.config.get('SEARCH_CANDIDATE_FACTOR', 3))
+        
         logger.info(f"LLM 매니저가 초기화되었습니다. API URL: {self.api_url}")
         if self.model_name:
             logger.info(f"추정 모델: {self.model_name}")
@@ -223,9 +232,259 @@ class LLMManager:
         logger.debug(f"질문 의도 분석: {intent}")
         return intent
         
+    def _content_match(self, term: str, condition):
+        """term이 내용에 들어 있어야 참이 되는 조건에 전문 검색 인덱스 후보 조건을 추가
+        
+        인덱스에서 찾은 메시지만 condition(LIKE)으로 확인하므로 전체 메시지를 훑지 않습니다.
+        인덱스가 없거나 term이 너무 짧으면 condition을 그대로 사용합니다.
+        """
+        if getattr(self.db_manager, 'fts_available', False) and len(term) >= MIN_TERM_LENGTH:
+            return and_(DiscordMessage.id.in_(fts_contains(term)), condition)
+        return condition
+
+    def get_search_terms(self, query: str) -> List[str]:
+        """순위 검색에 사용할 검색어 (키워드, 짧은 질문이면 질문 전체 포함, 대소문자 무시 중복 제거)"""
+        terms = self.extract_keywords(query)
+        direct_query = query.strip()
+        if len(direct_query.split()) <= 3 and len(direct_query) >= MIN_TERM_LENGTH:
+            # 짧은 질문은 질문 전체가 그대로 들어 있는 메시지가 가장 관련성이 높음
+            terms = [direct_query] + terms
+        
+        unique_terms = {}
+        for term in terms:
+            unique_terms.setdefault(term.lower(), term)
+        return list(unique_terms.values())
+    
+    def _recency_factor(self, now_snowflake: int, message_id=DiscordMessage.id):
+        """메시지 나이에 따른 점수 배율 (최신 메시지 1.0, 반감기마다 최신성 몫이 줄어듦)
+        
+        message_id가 컬럼이면 SQL 식, 정수면 값을 반환합니다.
+        """
+        # 스노우플레이크 ID의 상위 비트는 밀리초 타임스탬프 (ID 차이 / 2^22 / 하루 밀리초 = 일 수)
+        age_days = (now_snowflake - message_id) / (4194304 * 86400000.0)
+        return (1.0 - self.recency_weight) + self.recency_weight / (1.0 + age_days / self.recency_half_life)
+    
+    def _score_match(self, msg: DiscordMessage, base_score: float, terms: List[str], short_terms: List[str]):
+        """SQL 점수에 제목/첫 줄 가중치와 짧은 검색어 일치를 반영
+        
+        Returns:
+            (최종 점수, 일치한 검색어 목록)
+        """
+        content_lower = (msg.content or '').lower()
+        thread_lower = (msg.thread_name or '').lower()
+        matched_terms = [term for term in terms + short_terms
+                         if term.lower() in content_lower or term.lower() in thread_lower]
+        
+        score = base_score
+        first_line = content_lower.split('\n', 1)[0]
+        if any(term.lower() in first_line for term in matched_terms):
+            score *= 1.0 + self.title_boost
+            # 마크다운 제목이나 키-값 형식의 첫 줄은 정보성이 높음
+            if first_line.startswith('#') or ':' in first_line:
+                score *= 1.0 + self.title_boost
+        
+        # trigram 인덱스로 찾을 수 없는 2글자 검색어는 후보 안에서 일치 여부로 가중치 부여
+        if short_terms:
+            short_hits = sum(1 for term in short_terms if term.lower() in content_lower)
+            score *= 1.0 + short_hits / len(short_terms)
+        
+        return score, matched_terms
+    
+    async def search_messages(self, query: str, limit: int = 30) -> List[Dict[str, Any]]:
+        """전문 검색 인덱스의 BM25 순위로 질문과 관련된 메시지를 한 번에 검색
+        
+        3글자 이상 검색어는 인덱스에서 BM25와 최신성 배율로 정렬한 후보를 가져오고,
+        제목/첫 줄 가중치와 2글자 검색어 일치를 반영해 다시 정렬합니다.
+        검색어가 모두 2글자이거나 긴 검색어가 일치하지 않으면 인덱스를 쓸 수 없으므로
+        2글자 검색어를 LIKE로 찾은 최신 후보를 같은 방식으로 정렬합니다.
+        
+        Args:
+            query: 사용자 질문
+            limit: 반환할 최대 메시지 수
+            
+        Returns:
+            점수 순 결과 목록 [{'message', 'score', 'bm25', 'matched_terms'}] (실패 시 빈 목록)
+        """
+        try:
+            terms = self.get_search_terms(query)
+            long_terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+            short_terms = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+            if not terms:
+                return []
+            
+            conditions = [
+                DiscordMessage.content.isnot(None),
+                DiscordMessage.content != ""
+            ]
+            if self.bot_id_list:
+                conditions.append(DiscordMessage.author_id.notin_(self.bot_id_list))
+            
+            recency = self._recency_factor(datetime_to_snowflake(datetime.now(timezone.utc)))
+            candidate_limit = limit * self.candidate_factor
+            
+            async with self.db_manager.ReadSessionLocal() as session:
+                rows = []
+                if long_terms:
+                    bm25 = fts_bm25()
+                    stmt = select(DiscordMessage, bm25, recency).select_from(messages_fts).join(
+                        DiscordMessage, DiscordMessage.id == messages_fts.c.rowid
+                    ).where(
+                        fts_match(long_terms), *conditions
+                    ).order_by(bm25 * recency).limit(candidate_limit)
+                    rows = (await session.execute(stmt)).all()
+                
+                if not rows and short_terms:
+                    # 2글자 검색어만 있거나 긴 검색어가 일치하지 않으면 LIKE로 최신 후보 검색
+                    stmt = select(DiscordMessage, literal(0.0), recency).where(
+                        *conditions,
+                        or_(*[DiscordMessage.content.ilike(f'%{term}%') for term in short_terms])
+                    ).order_by(DiscordMessage.id.desc()).limit(candidate_limit)
+                    rows = (await session.execute(stmt)).all()
+            
+            results = []
+            for msg, bm25_score, recency_factor in rows:
+                # BM25는 음수이므로 부호를 바꿔 클수록 관련성이 높은 점수로 사용 (LIKE 후보는 최신성만 사용)
+                base_score = -bm25_score * recency_factor if bm25_score else recency_factor
+                score, matched_terms = self._score_match(msg, base_score, long_terms, short_terms)
+                results.append({
+                    'message': msg,
+                    'score': score,
+                    'bm25': -bm25_score,
+                    'matched_terms': matched_terms,
+                })
+            
+            results.sort(key=lambda result: result['score'], reverse=True)
+            return results[:limit]
+        
+        except Exception as e:
+            logger.error(f"순위 검색 중 오류 발생: {str(e)}", exc_info=True)
+            return []
+    
+    async def search_ngram_index(self, query: str, limit: int = 30) -> Optional[List[Dict[str, Any]]]:
+        """메모리 n-gram 색인으로 질문과 관련된 메시지 검색
+        
+        색인에서 검색어가 많이 일치하는 최신 후보 ID를 찾고, 후보 메시지만 읽어
+        실제 일치 여부 확인 후 일치한 검색어 수, 최신성, 제목/첫 줄 가중치로 정렬합니다.
+        
+        Returns:
+            search_messages와 같은 형식의 결과 목록 (색인이 아직 준비되지 않았으면 None)
+        """
+        indexer = get_ngram_indexer(self.db_manager)
+        indexer.start()
+        terms = self.get_search_terms(query)
+        hits = indexer.search(terms, limit * self.candidate_factor)
+        if hits is None:
+            return None
+        if not hits:
+            return []
+        
+        try:
+            conditions = [
+                DiscordMessage.id.in_([message_id for message_id, _ in hits]),
+                DiscordMessage.content.isnot(None),
+                DiscordMessage.content != ""
+            ]
+            if self.bot_id_list:
+                conditions.append(DiscordMessage.author_id.notin_(self.bot_id_list))
+            
+            async with self.db_manager.ReadSessionLocal() as session:
+                messages = (await session.execute(select(DiscordMessage).where(*conditions))).scalars().all()
+            
+            now_snowflake = datetime_to_snowflake(datetime.now(timezone.utc))
+            results = []
+            for msg in messages:
+                score, matched_terms = self._score_match(msg, self._recency_factor(now_snowflake, msg.id), terms, [])
+                # 색인 후보 중 gram만 겹치고 실제로는 검색어가 없는 메시지 제외
+                if not matched_terms:
+                    continue
+                results.append({
+                    'message': msg,
+                    'score': score * len(matched_terms),
+                    'bm25': 0.0,
+                    'matched_terms': matched_terms,
+                })
+            
+            results.sort(key=lambda result: result['score'], reverse=True)
+            return results[:limit]
+        
+        except Exception as e:
+            logger.error(f"n-gram 색인 검색 중 오류 발생: {str(e)}", exc_info=True)
+            return []
+    
+    async def search_vectors(self, query: str, limit: int = 30) -> Optional[List[Dict[str, Any]]]:
+        """메시지 임베딩과 질문 임베딩의 코사인 유사도로 관련 메시지 검색
+        
+        Returns:
+            search_messages와 같은 형식의 결과 목록 ('similarity' 포함, 저장소가 준비되지 않았으면 None)
+        """
+        # numpy를 쓰는 임베딩 모듈은 벡터 검색을 켠 경우에만 불러옴
+        from .embeddings import get_vector_store
+        
+        store = get_vector_store(self.db_manager)
+        store.start()
+        try:
+            hits = await store.search(query, limit * self.candidate_factor)
+            if hits is None:
+                return None
+            if not hits:
+                return []
+            
+            similarities = dict(hits)
+            conditions = [
+                DiscordMessage.id.in_(list(similarities)),
+                DiscordMessage.content.isnot(None),
+                DiscordMessage.content != ""
+            ]
+            if self.bot_id_list:
+                conditions.append(DiscordMessage.author_id.notin_(self.bot_id_list))
+            
+            async with self.db_manager.ReadSessionLocal() as session:
+                messages = (await session.execute(select(DiscordMessage).where(*conditions))).scalars().all()
+            
+            now_snowflake = datetime_to_snowflake(datetime.now(timezone.utc))
+            terms = self.get_search_terms(query)
+            results = []
+            for msg in messages:
+                similarity = similarities[msg.id]
+                _, matched_terms = self._score_match(msg, 0.0, terms, [])
+                results.append({
+                    'message': msg,
+                    'score': max(similarity, 0.0) * self._recency_factor(now_snowflake, msg.id),
+                    'bm25': 0.0,
+                    'similarity': similarity,
+                    'matched_terms': matched_terms,
+                })
+            
+            results.sort(key=lambda result: result['score'], reverse=True)
+            return results[:limit]
+        
+        except Exception as e:
+            logger.error(f"임베딩 검색 중 오류 발생: {str(e)}", exc_info=True)
+            return []
+    
+    def _fuse_results(self, result_lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """여러 검색 결과 순위를 역순위 합(RRF)으로 결합 (점수 척도가 달라도 순위만 사용)"""
+        fused = {}
+        for results in result_lists:
+            for rank, result in enumerate(results):
+                entry = fused.setdefault(result['message'].id, dict(result, score=0.0))
+                entry['score'] += 1.0 / (60 + rank + 1)
+                entry['matched_terms'] = list(dict.fromkeys(entry['matched_terms'] + result['matched_terms']))
+                if 'similarity' in result:
+                    entry['similarity'] = result['similarity']
+                if result['bm25']:
+                    entry['bm25'] = result['bm25']
+        return sorted(fused.values(), key=lambda result: result['score'], reverse=True)[:limit]
+    
     async def find_relevant_messages(self, query: str, limit: int = 30) -> List[DiscordMessage]:
         """질문과 관련된 메시지 검색
         
+        SEARCH_MODE가 ngram이면 메모리 n-gram 색인(준비되기 전에는 bm25)을 사용합니다.
+        vector면 임베딩 유사도 검색, hybrid면 bm25와 임베딩 검색 순위를 결합합니다
+        (임베딩 저장소가 준비되기 전에는 bm25).
+        전문 검색 인덱스가 있으면 BM25 순위 검색(search_messages)을 한 번 실행하고,
+        없거나 SEARCH_MODE가 legacy면 단계별 LIKE 검색을 사용합니다.
+        
         Args:
             query: 사용자 질문
             limit: 검색할 최대 메시지 수
@@ -233,6 +492,30 @@ class LLMManager:
         Returns:
             관련 메시지 목록
         """
+        results = None
+        if self.search_mode == 'ngram':
+            results = await self.search_ngram_index(query, limit)
+        elif self.search_mode in ('vector', 'hybrid'):
+            results = await self.search_vectors(query, limit)
+            if results is not None and self.search_mode == 'hybrid' and getattr(self.db_manager, 'fts_available', False):
+                results = self._fuse_results([await self.search_messages(query, limit), results], limit)
+        
+        if results is None and self.search_mode != 'legacy' and getattr(self.db_manager, 'fts_available', False):
+            results = await self.search_messages(query, limit)
+        
+        if results is not None:
+            if results:
+                top = ', '.join(f"{result['message'].id}({result['score']:.2f}: {'/'.join(result['matched_terms'])})"
+                                for result in results[:3])
+                logger.info(f"순위 검색으로 {len(results)}개의 관련 메시지를 찾았습니다. 상위: {top}")
+                return [result['message'] for result in results]
+            logger.warning("관련 메시지를 찾을 수 없습니다. 최근 메시지를 반환합니다.")
+            return await self.get_recent_messages(limit)
+        
+        return await self._find_relevant_messages_legacy(query, limit)
+    
+    async def _find_relevant_messages_legacy(self, query: str, limit: int = 30) -> List[DiscordMessage]:
+        """단계별 LIKE 검색 (정확한 키워드 → OR 조건 → 확장 → 부분 일치 순으로 결과가 없을 때만 다음 단계)"""
         try:
             # 짧은 쿼리를 위한 직접 검색 처리 (3단어 이하)
             words = query.strip().split()
@@ -241,7 +524,7 @@ class LLMManager:
                 direct_query = query.strip().lower()
                 logger.info(f"짧은 쿼리 감지: '{direct_query}' - 직접 검색 시도")
                 
-                async with self.db_manager.AsyncSessionLocal() as session:
+                async with self.db_manager.ReadSessionLocal() as session:
                     # 기본 쿼리 조건
                     conditions = [
                         DiscordMessage.content.isnot(None),
@@ -265,20 +548,20 @@ class LLMManager:
                     
                     # 1. 제목/첫줄 검색 (가장 우선순위 높음)
                     direct_conditions.append(
-                        DiscordMessage.content.ilike(f"# {direct_query}%")  # 마크다운 제목 형식 검색
+                        self._content_match(direct_query, DiscordMessage.content.ilike(f"# {direct_query}%"))  # 마크다운 제목 형식 검색
                     )
                     direct_conditions.append(
-                        DiscordMessage.content.ilike(f"## {direct_query}%")  # 마크다운 부제목 형식 검색
+                        self._content_match(direct_query, DiscordMessage.content.ilike(f"## {direct_query}%"))  # 마크다운 부제목 형식 검색
                     )
                     direct_conditions.append(
-                        DiscordMessage.content.ilike(f"{direct_query}:%")  # 키-값 형식 검색
+                        self._content_match(direct_query, DiscordMessage.content.ilike(f"{direct_query}:%"))  # 키-값 형식 검색
                     )
                     
                     # 2. 전체 내용 검색
                     for word in words:
                         if len(word) >= 2:  # 2글자 이상 단어만 검색
                             direct_conditions.append(
-                                DiscordMessage.content.ilike(f"%{word}%")
+                                self._content_match(word, DiscordMessage.content.ilike(f"%{word}%"))
                             )
                     
                     # 직접 검색 실행
@@ -306,7 +589,7 @@ class LLMManager:
             
             logger.info(f"검색 키워드: {', '.join(keywords)}")
             
-            async with self.db_manager.AsyncSessionLocal() as session:
+            async with self.db_manager.ReadSessionLocal() as session:
                 # 기본 쿼리 조건: 내용이 비어있지 않고 봇 메시지 제외
                 conditions = [
                     DiscordMessage.content.isnot(None),
@@ -335,12 +618,12 @@ class LLMManager:
                     if re.search(r'[A-Z0-9]', keyword):
                         # 정확한 대소문자 매치
                         stmt = select(DiscordMessage).where(
-                            and_(*conditions, DiscordMessage.content.contains(keyword))
+                            and_(*conditions, self._content_match(keyword, DiscordMessage.content.contains(keyword)))
                         ).order_by(DiscordMessage.created_at.desc()).limit(limit)
                     else:
                         # 일반 키워드는 대소문자 구분 없이 검색
                         stmt = select(DiscordMessage).where(
-                            and_(*conditions, DiscordMessage.content.ilike(f'%{keyword}%'))
+                            and_(*conditions, self._content_match(keyword, DiscordMessage.content.ilike(f'%{keyword}%')))
                         ).order_by(DiscordMessage.created_at.desc()).limit(limit)
                     
                     # 결과 가져오기
@@ -399,7 +682,7 @@ class LLMManager:
                 keyword_conditions = []
                 for keyword in keywords:
                     if len(keyword) > 1:  # 2글자 이상인 키워드만 사용
-                        keyword_conditions.append(DiscordMessage.content.ilike(f'%{keyword}%'))
+                        keyword_conditions.append(self._content_match(keyword, DiscordMessage.content.ilike(f'%{keyword}%')))
                 
                 # 시간 관련 질문인 경우 최근 메시지를 더 중요하게 고려
                 time_limit = limit
@@ -437,7 +720,7 @@ class LLMManager:
                 for keyword in keywords[:5]:  # 상위 5개 키워드만 변형
                     if len(keyword) >= 4:  # 4글자 이상인 단어만 부분 매칭
                         # 단어의 앞부분만 사용한 검색
-                        expanded_conditions.append(DiscordMessage.content.ilike(f'%{keyword[:len(keyword)-1]}%'))
+                        expanded_conditions.append(self._content_match(keyword[:len(keyword)-1], DiscordMessage.content.ilike(f'%{keyword[:len(keyword)-1]}%')))
                 
                 # 확장 검색 실행
                 if expanded_conditions:
@@ -473,7 +756,7 @@ class LLMManager:
                         if len(keyword) > 2:
                             # SQL LIKE 패턴 적용
                             partial_conditions.append(
-                                DiscordMessage.content.ilike(f'%{keyword[:3]}%')  # 앞 3글자만 검색
+                                self._content_match(keyword[:3], DiscordMessage.content.ilike(f'%{keyword[:3]}%'))  # 앞 3글자만 검색
                             )
                     
                     if partial_conditions:
@@ -531,7 +814,7 @@ class LLMManager:
             logger.info(f"최근 {limit}개 메시지를 가져오는 중...")
             
             # 최근 메시지 가져오기
-            async with self.db_manager.AsyncSessionLocal() as session:
+            async with self.db_manager.ReadSessionLocal() as session:
                 # 비어있지 않은 메시지만 가져옴, 봇 메시지 제외
                 stmt = select(DiscordMessage).where(
                     DiscordMessage.content.isnot(None),
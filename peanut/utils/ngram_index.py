@@ -0,0 +1,446 @@
+import os
+import re
+import sys
+import zlib
+import heapq
+import struct
+import asyncio
+import logging
+from array import array
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from sqlalchemy import text
+
+# 로깅 설정
+logger = logging.getLogger('discord.ngram')
+
+# 스냅샷 형식 버전 (토큰화 규칙이나 저장 구조를 바꾸면 올려서 다시 만듦)
+SNAPSHOT_VERSION = 2
+
+# 스냅샷 파일 헤더 (식별자, 버전, 문서 수, gram 수, 삭제된 문서 수)
+SNAPSHOT_MAGIC = b'PNGRAM'
+SNAPSHOT_HEADER = struct.Struct('<6sIQQQ')
+
+# 색인 대상 토큰 (한글, 영문 소문자, 숫자가 이어진 부분)
+TOKEN_PATTERN = re.compile(r'[0-9a-z가-힣]+')
+
+# 삭제된 문서 비율이 이 값을 넘으면 문서 번호를 다시 매겨 색인을 압축
+COMPACT_RATIO = 0.2
+
+# 초기 색인 시 한 번에 읽을 메시지 수
+BUILD_FETCH_SIZE = 5000
+
+def tokenize(content: str) -> List[str]:
+    """내용을 소문자 한글/영문/숫자 토큰으로 분리"""
+    return TOKEN_PATTERN.findall(content.lower()) if content else []
+
+def content_grams(content: str) -> set:
+    """메시지 내용의 토큰별 문자 2-gram과 3-gram (한 글자 토큰은 색인하지 않음)"""
+    grams = set()
+    for token in tokenize(content):
+        length = len(token)
+        for i in range(length - 1):
+            grams.add(token[i:i + 2])
+            if i < length - 2:
+                grams.add(token[i:i + 3])
+    return grams
+
+def term_grams(term: str) -> set:
+    """검색어가 들어 있는 메시지가 모두 가지고 있어야 하는 gram (토큰마다 가능한 가장 긴 gram)"""
+    grams = set()
+    for token in tokenize(term):
+        if len(token) < 2:
+            continue
+        size = 3 if len(token) >= 3 else 2
+        grams.update(token[i:i + size] for i in range(len(token) - size + 1))
+    return grams
+
+def content_checksum(content: str) -> int:
+    """같은 내용으로 다시 저장된 메시지를 건너뛰기 위한 내용 체크섬"""
+    return zlib.crc32((content or '').encode('utf-8'))
+
+def _write_array(f, values: array):
+    """정수 배열을 리틀 엔디언으로 쓰기"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+def _read_array(f, typecode: str, count: int) -> array:
+    """리틀 엔디언 정수 배열 count개 읽기 (파일이 짧으면 EOFError)"""
+    values = array(typecode)
+    values.fromfile(f, count)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+class NgramIndex:
+    """메시지 내용의 문자 2/3-gram 역색인
+
+    메시지마다 추가된 순서대로 문서 번호를 매기고, gram마다 그 gram을 가진 문서 번호를
+    오름차순 array('I')로 저장합니다. 문서 번호는 항상 늘어나는 방향으로만 추가되므로
+    새 메시지를 색인해도 목록을 다시 정렬할 필요가 없습니다. 메시지 ID(스노우플레이크)는
+    32비트에 들어가지 않아 문서 번호 → 메시지 ID 표(doc_ids)로 따로 보관합니다.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.doc_ids = array('q')          # 문서 번호 → 메시지 ID (삭제된 문서는 0)
+        self.doc_checksums = array('I')    # 문서 번호 → 내용 체크섬
+        self.doc_numbers: Dict[int, int] = {}  # 메시지 ID → 문서 번호
+        self.removed_count = 0
+
+    def __len__(self):
+        return len(self.doc_numbers)
+
+    def add(self, message_id: int, content: str) -> bool:
+        """메시지 색인 (내용이 바뀐 메시지는 기존 문서를 지우고 새 문서로 추가)
+
+        Returns:
+            색인이 바뀌었으면 True
+        """
+        message_id = int(message_id)
+        checksum = content_checksum(content)
+        doc = self.doc_numbers.get(message_id)
+        if doc is not None:
+            if self.doc_checksums[doc] == checksum:
+                return False
+            self._remove_doc(doc)
+
+        doc = len(self.doc_ids)
+        self.doc_ids.append(message_id)
+        self.doc_checksums.append(checksum)
+        self.doc_numbers[message_id] = doc
+        postings = self.postings
+        for gram in content_grams(content):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array('I', (doc,))
+            else:
+                posting.append(doc)
+        return True
+
+    def add_many(self, rows) -> int:
+        """(메시지 ID, 내용) 목록 색인
+
+        Returns:
+            색인이 바뀐 메시지 수
+        """
+        changed = sum(1 for message_id, content in rows if self.add(message_id, content))
+        if changed and self.removed_count > len(self.doc_ids) * COMPACT_RATIO:
+            self.compact()
+        return changed
+
+    def remove(self, message_id: int) -> bool:
+        """메시지를 검색 결과에서 제외 (posting에는 compact 때까지 남음)"""
+        doc = self.doc_numbers.get(int(message_id))
+        if doc is None:
+            return False
+        self._remove_doc(doc)
+        return True
+
+    def _remove_doc(self, doc: int):
+        del self.doc_numbers[self.doc_ids[doc]]
+        self.doc_ids[doc] = 0
+        self.removed_count += 1
+
+    def compact(self):
+        """삭제된 문서를 posting에서 빼고 남은 문서 번호를 앞에서부터 다시 매김 (순서 유지)"""
+        mapping = array('q', [-1]) * len(self.doc_ids)
+        doc_ids = array('q')
+        doc_checksums = array('I')
+        for doc, message_id in enumerate(self.doc_ids):
+            if message_id:
+                mapping[doc] = len(doc_ids)
+                doc_ids.append(message_id)
+                doc_checksums.append(self.doc_checksums[doc])
+
+        postings = {}
+        for gram, posting in self.postings.items():
+            compacted = array('I', [mapping[doc] for doc in posting if mapping[doc] >= 0])
+            if compacted:
+                postings[gram] = compacted
+
+        self.postings = postings
+        self.doc_ids = doc_ids
+        self.doc_checksums = doc_checksums
+        self.doc_numbers = {message_id: doc for doc, message_id in enumerate(doc_ids)}
+        self.removed_count = 0
+
+    def lookup(self, term: str) -> Optional[set]:
+        """검색어가 들어 있을 수 있는 문서 번호 집합
+
+        검색어의 gram을 모두 가진 문서이므로 gram이 떨어져 있는 드문 경우가 섞일 수 있습니다.
+
+        Returns:
+            문서 번호 집합 (검색어가 두 글자 미만 토큰뿐이라 찾을 수 없으면 None)
+        """
+        grams = term_grams(term)
+        if not grams:
+            return None
+
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+
+        # 가장 짧은 posting부터 교집합 (C 구현 집합 연산이라 Python 반복보다 빠름)
+        postings.sort(key=len)
+        docs = set(postings[0])
+        for posting in postings[1:]:
+            docs.intersection_update(posting)
+            if not docs:
+                break
+        return docs
+
+    def search(self, terms: List[str], limit: int = 30) -> List[Tuple[int, List[str]]]:
+        """검색어가 많이 일치하고 최근인 메시지 순으로 검색
+
+        Returns:
+            [(메시지 ID, 일치한 검색어 목록)] (일치한 검색어 수, 메시지 ID 내림차순)
+        """
+        term_docs = {}
+        for term in terms:
+            docs = self.lookup(term)
+            if docs:
+                term_docs[term] = docs
+        if not term_docs:
+            return []
+
+        counts = Counter()
+        for docs in term_docs.values():
+            counts.update(docs)
+
+        doc_ids = self.doc_ids
+        top = heapq.nlargest(
+            limit,
+            (doc for doc in counts if doc_ids[doc]),
+            key=lambda doc: (counts[doc], doc_ids[doc])
+        )
+        return [
+            (doc_ids[doc], [term for term, docs in term_docs.items() if doc in docs])
+            for doc in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """색인 크기 통계"""
+        return {
+            'documents': len(self.doc_numbers),
+            'removed': self.removed_count,
+            'grams': len(self.postings),
+            'postings': sum(len(posting) for posting in self.postings.values()),
+        }
+
+    def save(self, path: str):
+        """스냅샷 파일로 저장 (임시 파일에 쓴 뒤 교체)
+
+        헤더 뒤에 문서 표, gram별 posting 길이와 UTF-8 길이, gram 문자열, 이어 붙인 posting 순서로
+        정수 배열을 그대로 씁니다.
+        """
+        grams = list(self.postings)
+        encoded = [gram.encode('utf-8') for gram in grams]
+        posting_lengths = array('I', (len(self.postings[gram]) for gram in grams))
+        gram_lengths = array('I', (len(data) for data in encoded))
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self.doc_ids), len(grams), self.removed_count))
+            for values in (self.doc_ids, self.doc_checksums, posting_lengths, gram_lengths):
+                _write_array(f, values)
+            f.write(b''.join(encoded))
+            for gram in grams:
+                _write_array(f, self.postings[gram])
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['NgramIndex']:
+        """스냅샷 파일 읽기 (없거나 형식/버전이 다르거나 손상되었으면 None)"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(SNAPSHOT_HEADER.size)
+                if len(header) < SNAPSHOT_HEADER.size or not header.startswith(SNAPSHOT_MAGIC):
+                    logger.info(f"n-gram 색인 스냅샷 형식이 달라 다시 만듭니다: {path}")
+                    return None
+                _, version, doc_count, gram_count, removed_count = SNAPSHOT_HEADER.unpack(header)
+                if version != SNAPSHOT_VERSION:
+                    logger.info(f"n-gram 색인 스냅샷 버전이 달라 다시 만듭니다: {path}")
+                    return None
+
+                doc_ids = _read_array(f, 'q', doc_count)
+                doc_checksums = _read_array(f, 'I', doc_count)
+                posting_lengths = _read_array(f, 'I', gram_count)
+                gram_lengths = _read_array(f, 'I', gram_count)
+                gram_bytes = f.read(sum(gram_lengths))
+                if len(gram_bytes) != sum(gram_lengths):
+                    raise ValueError("gram 문자열이 잘렸습니다.")
+                posting_data = _read_array(f, 'I', sum(posting_lengths))
+                if f.read(1):
+                    raise ValueError("파일 끝에 알 수 없는 데이터가 있습니다.")
+            if posting_data and max(posting_data) >= doc_count:
+                raise ValueError("posting의 문서 번호가 문서 수를 벗어났습니다.")
+
+            postings = {}
+            gram_offset = posting_offset = 0
+            for gram_length, posting_length in zip(gram_lengths, posting_lengths):
+                gram = gram_bytes[gram_offset:gram_offset + gram_length].decode('utf-8')
+                postings[gram] = posting_data[posting_offset:posting_offset + posting_length]
+                gram_offset += gram_length
+                posting_offset += posting_length
+
+            index = cls()
+            index.postings = postings
+            index.doc_ids = doc_ids
+            index.doc_checksums = doc_checksums
+            index.removed_count = removed_count
+            index.doc_numbers = {message_id: doc for doc, message_id in enumerate(doc_ids) if message_id}
+            return index
+        except Exception as e:
+            logger.warning(f"n-gram 색인 스냅샷을 읽을 수 없어 다시 만듭니다: {str(e)}")
+            return None
+
+    def sync(self, engine) -> Dict[str, int]:
+        """데이터베이스와 색인을 맞춤 (색인에 없는 메시지 추가, 데이터베이스에서 삭제된 메시지 제외)
+
+        Args:
+            engine: 동기 SQLAlchemy 엔진
+
+        Returns:
+            {'added': 추가된 수, 'removed': 제외된 수}
+        """
+        added = 0
+        with engine.connect() as conn:
+            if not self.doc_numbers:
+                # 빈 색인은 전체 메시지를 순서대로 읽어 색인
+                result = conn.execution_options(stream_results=True).execute(
+                    text("SELECT id, content FROM discord_messages WHERE content IS NOT NULL AND content != '' ORDER BY id")
+                )
+                while True:
+                    rows = result.fetchmany(BUILD_FETCH_SIZE)
+                    if not rows:
+                        break
+                    added += self.add_many(rows)
+                return {'added': added, 'removed': 0}
+
+            db_ids = set(conn.execute(
+                text("SELECT id FROM discord_messages WHERE content IS NOT NULL AND content != ''")
+            ).scalars())
+            missing = sorted(db_ids.difference(self.doc_numbers))
+            removed = [message_id for message_id in self.doc_numbers if message_id not in db_ids]
+            for message_id in removed:
+                self.remove(message_id)
+
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                placeholders = ', '.join(str(message_id) for message_id in chunk)
+                rows = conn.execute(
+                    text(f"SELECT id, content FROM discord_messages WHERE id IN ({placeholders})")
+                ).all()
+                added += self.add_many(rows)
+
+        if removed and self.removed_count > len(self.doc_ids) * COMPACT_RATIO:
+            self.compact()
+        return {'added': added, 'removed': len(removed)}
+
+class NgramIndexer:
+    """데이터베이스 하나의 n-gram 색인을 만들고 저장된 메시지로 계속 갱신
+
+    시작하면 스냅샷을 읽고(없으면 전체 색인) 데이터베이스와 맞춘 뒤 스레드에서 저장합니다.
+    색인을 만들거나 저장하는 동안 커밋된 메시지는 모아 두었다가 끝난 뒤 이벤트 루프에서 반영하므로
+    색인 자료구조는 한 번에 한 곳에서만 바뀝니다.
+    """
+
+    def __init__(self, db_manager, snapshot_path=None):
+        self.db_manager = db_manager
+        self.snapshot_path = snapshot_path or f"{os.path.splitext(db_manager.db_path)[0]}.ngram"
+        self.index: Optional[NgramIndex] = None
+        self.ready = False
+        self.dirty = False
+        self._busy = False
+        self._pending = []
+        self._task = None
+        db_manager.add_message_listener(self.on_messages_saved)
+
+    def start(self):
+        """백그라운드에서 색인 준비 시작 (이미 시작했으면 무시)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._build())
+        return self._task
+
+    async def _build(self):
+        self._busy = True
+        try:
+            self.index, result = await asyncio.to_thread(self._load_and_sync)
+            self.ready = True
+            logger.info(
+                f"n-gram 색인 준비 완료: {self.db_manager.db_path} "
+                f"(메시지 {len(self.index)}개, 추가 {result['added']}개, 제외 {result['removed']}개)"
+            )
+        except Exception as e:
+            logger.error(f"n-gram 색인 생성 중 오류 발생: {str(e)}", exc_info=True)
+        finally:
+            self._finish_busy()
+
+    def _load_and_sync(self):
+        index = NgramIndex.load(self.snapshot_path) or NgramIndex()
+        result = index.sync(self.db_manager.engine)
+        if result['added'] or result['removed'] or not os.path.exists(self.snapshot_path):
+            index.save(self.snapshot_path)
+        return index, result
+
+    def _finish_busy(self):
+        """색인 준비/저장 중 모아 둔 메시지 반영"""
+        self._busy = False
+        pending, self._pending = self._pending, []
+        if pending and self.index is not None:
+            self.on_messages_saved(pending)
+
+    def on_messages_saved(self, rows):
+        """DatabaseManager가 메시지를 커밋한 뒤 호출하는 콜백"""
+        if self._busy or self.index is None:
+            self._pending.extend(rows)
+            return
+        if self.index.add_many((row['id'], row.get('content')) for row in rows):
+            self.dirty = True
+
+    def search(self, terms: List[str], limit: int = 30) -> Optional[List[Tuple[int, List[str]]]]:
+        """색인 검색 (준비되지 않았으면 None)"""
+        if not self.ready:
+            return None
+        return self.index.search(terms, limit)
+
+    async def save(self) -> bool:
+        """바뀐 내용이 있으면 스냅샷 저장 (스레드에서 실행)"""
+        if not self.ready or not self.dirty or self._busy:
+            return False
+        self._busy = True
+        self.dirty = False
+        try:
+            await asyncio.to_thread(self.index.save, self.snapshot_path)
+            return True
+        except Exception as e:
+            self.dirty = True
+            logger.error(f"n-gram 색인 스냅샷 저장 중 오류 발생: {str(e)}")
+            return False
+        finally:
+            self._finish_busy()
+
+# 데이터베이스 경로별 색인 관리자
+ngram_indexers: Dict[str, NgramIndexer] = {}
+
+def get_ngram_indexer(db_manager) -> NgramIndexer:
+    """데이터베이스 매니저의 n-gram 색인 관리자 반환 (없으면 생성)"""
+    indexer = ngram_indexers.get(db_manager.db_path)
+    if indexer is None:
+        indexer = NgramIndexer(db_manager)
+        ngram_indexers[db_manager.db_path] = indexer
+    return indexer
+
+async def save_ngram_snapshots():
+    """바뀐 n-gram 색인을 모두 스냅샷으로 저장"""
+    for indexer in list(ngram_indexers.values()):
+        await indexer.save()
@@ -0,0 +1,170 @@
+import re
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+# 로깅 설정
+logger = logging.getLogger('discord.collector')
+
+# 메시지 조회 요청 경로에서 채널 ID 추출 (/channels/{channel_id}/messages)
+MESSAGES_ROUTE = re.compile(r'/channels/(\d+)/messages')
+
+class BucketState:
+    """레이트 리밋 버킷 하나의 남은 요청 수와 초기화 시각"""
+
+    def __init__(self):
+        self.bucket = None          # X-RateLimit-Bucket 해시
+        self.limit = None           # 초기화 주기당 허용 요청 수
+        self.remaining = None       # 남은 요청 수 (요청을 보낼 때마다 미리 차감)
+        self.reset_at = 0.0         # 남은 요청 수가 초기화되는 시각 (time.monotonic 기준)
+
+class RequestScheduler:
+    """디스코드 REST 레이트 리밋 헤더를 읽어 history 요청 속도를 조절하는 스케줄러
+
+    aiohttp TraceConfig로 응답의 X-RateLimit-* 헤더를 읽어 채널(버킷)별 남은 요청 수를
+    추적하고, 남은 요청이 없으면 초기화될 때까지 기다린 뒤 요청합니다.
+    동시에 보내는 요청 수는 429 응답을 받으면 절반으로 줄이고, 제한 없이
+    성공하면 조금씩 늘립니다 (AIMD).
+    """
+
+    def __init__(self, max_concurrency=8, min_concurrency=1, increase_every=20):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.concurrency = max(self.min_concurrency, self.max_concurrency // 2)
+        self.increase_every = max(1, int(increase_every))
+
+        self.buckets = {}           # 채널 ID -> BucketState
+        self.global_reset_at = 0.0  # 전역 레이트 리밋 해제 시각
+        self._in_flight = 0
+        self._successes = 0
+        self._slot_available = asyncio.Condition()
+
+        # 통계
+        self.wait_seconds = 0.0
+        self.work_seconds = 0.0
+        self.request_count = 0
+        self.rate_limited_count = 0
+
+        # discord.py HTTP 클라이언트에 전달할 트레이스 설정
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    def _get_bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = BucketState()
+            self.buckets[key] = bucket
+        return bucket
+
+    async def _on_request_end(self, session, trace_config_ctx, params):
+        """응답 헤더에서 레이트 리밋 정보를 읽어 버킷 상태와 동시성을 갱신"""
+        match = MESSAGES_ROUTE.search(params.url.path)
+        if not match:
+            return
+
+        headers = params.response.headers
+        bucket = self._get_bucket(int(match.group(1)))
+        now = time.monotonic()
+
+        try:
+            if 'X-RateLimit-Bucket' in headers:
+                bucket.bucket = headers['X-RateLimit-Bucket']
+            if 'X-RateLimit-Limit' in headers:
+                bucket.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                bucket.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset-After' in headers:
+                bucket.reset_at = now + float(headers['X-RateLimit-Reset-After'])
+        except ValueError:
+            logger.debug(f"레이트 리밋 헤더를 해석할 수 없습니다: {dict(headers)}")
+
+        if params.response.status == 429:
+            self.rate_limited_count += 1
+            retry_after = float(headers.get('Retry-After', 1) or 1)
+            if headers.get('X-RateLimit-Global') or headers.get('X-RateLimit-Scope') == 'global':
+                self.global_reset_at = now + retry_after
+            else:
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+
+            # 제한에 걸리면 동시 요청 수를 절반으로 줄임
+            previous = self.concurrency
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self._successes = 0
+            logger.warning(f"⚠️ 레이트 리밋(429) 발생: 동시 요청 수 {previous} → {self.concurrency}, {retry_after:.2f}초 대기")
+        elif params.response.status < 400:
+            # 제한 없이 성공하면 동시 요청 수를 조금씩 늘림
+            self._successes += 1
+            if self._successes >= self.increase_every and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._successes = 0
+                async with self._slot_available:
+                    self._slot_available.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, key=None):
+        """요청 하나를 보낼 수 있을 때까지 기다린 뒤 요청 구간을 감싸는 컨텍스트
+
+        Args:
+            key: 버킷 키 (history 요청은 채널 ID)
+        """
+        wait_started = time.monotonic()
+
+        # 동시 요청 수 제한
+        async with self._slot_available:
+            await self._slot_available.wait_for(lambda: self._in_flight < self.concurrency)
+            self._in_flight += 1
+
+        try:
+            # 전역 제한 및 버킷의 남은 요청 수 확인
+            while True:
+                now = time.monotonic()
+                delay = self.global_reset_at - now
+                bucket = self.buckets.get(key) if key is not None else None
+                if bucket and bucket.remaining is not None and bucket.remaining <= 0:
+                    if bucket.reset_at > now:
+                        delay = max(delay, bucket.reset_at - now)
+                    else:
+                        # 초기화 시각이 지났으면 헤더를 다시 받을 때까지 한 번은 허용
+                        bucket.remaining = bucket.limit or 1
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            # 같은 버킷에 동시에 요청하는 다른 태스크를 위해 남은 요청 수를 미리 차감
+            if bucket and bucket.remaining is not None:
+                bucket.remaining -= 1
+
+            work_started = time.monotonic()
+            self.wait_seconds += work_started - wait_started
+            self.request_count += 1
+            try:
+                yield
+            finally:
+                self.work_seconds += time.monotonic() - work_started
+        finally:
+            async with self._slot_available:
+                self._in_flight -= 1
+                self._slot_available.notify()
+
+    def stats(self):
+        """대기/작업 시간과 요청 통계 반환"""
+        return {
+            'requests': self.request_count,
+            'rate_limited': self.rate_limited_count,
+            'wait_seconds': round(self.wait_seconds, 3),
+            'work_seconds': round(self.work_seconds, 3),
+            'concurrency': self.concurrency,
+        }
+
+    def format_stats(self):
+        """로그용 통계 문자열"""
+        stats = self.stats()
+        return (
+            f"요청 {stats['requests']}회, 429 {stats['rate_limited']}회, "
+            f"제한 대기 {stats['wait_seconds']:.2f}초 / 요청 처리 {stats['work_seconds']:.2f}초, "
+            f"현재 동시 요청 수 {stats['concurrency']}"
+        )